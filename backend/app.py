@@ -11,7 +11,7 @@ def create_app():
     load_dotenv()
     app.config.from_object(Config)
     # CORS: Allow all origins for development (restrict in production)
-    CORS(app, resources={r"/api/*": {"origins": "*"}}, supports_credentials=True)
+    CORS(app, resources={r"/api/*": {"origins": "*"}}, supports_credentials=True, expose_headers=["X-Next-Cursor", "ETag"])
     app.config["SWAGGER"] = {
         "title": "Roundup Investing API",
         "uiversion": 3,
@@ -31,7 +31,7 @@ def create_app():
         return TokenBlocklist.query.filter_by(jti=jti).first() is not None
 
     with app.app_context():
-        from .models import user, transaction, roundup, ledger, mandate, investment, kyc, event, otp_code, phone_account, cap_setting, token_blocklist, user_profile, redemption
+        from .models import user, transaction, roundup, ledger, mandate, investment, kyc, event, otp_code, phone_account, cap_setting, token_blocklist, user_profile, redemption, roundup_cap_counter, user_balance, order_outbox, portfolio_snapshot, holding, job_checkpoint, job_lease
         db.create_all()
 
     swagger_template = {
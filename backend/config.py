@@ -22,3 +22,18 @@ class Config:
     BSESTAR_MF_PASSWORD = os.environ.get("BSESTAR_MF_PASSWORD")
     SAFEGOLD_API_TOKEN = os.environ.get("SAFEGOLD_API_TOKEN")
     PAY_WEBHOOK_SECRET = os.environ.get("PAY_WEBHOOK_SECRET")
+    INGEST_MAX_BATCH_SIZE = int(os.environ.get("INGEST_MAX_BATCH_SIZE", "5000"))
+    IMPORT_CHUNK_SIZE = int(os.environ.get("IMPORT_CHUNK_SIZE", "1000"))
+    DEDUPE_FILTER_CAPACITY = int(os.environ.get("DEDUPE_FILTER_CAPACITY", "1000000"))
+    DEDUPE_FILTER_ERROR_RATE = float(os.environ.get("DEDUPE_FILTER_ERROR_RATE", "0.001"))
+    ROUNDUP_RECOMPUTE_CHUNK_SIZE = int(os.environ.get("ROUNDUP_RECOMPUTE_CHUNK_SIZE", "1000"))
+    ROUNDUP_RECOMPUTE_INLINE = os.environ.get("ROUNDUP_RECOMPUTE_INLINE", "false").lower() == "true"
+    MAX_PAGE_SIZE = int(os.environ.get("MAX_PAGE_SIZE", "200"))
+    PROVIDER_MAX_WORKERS = int(os.environ.get("PROVIDER_MAX_WORKERS", "8"))
+    PROVIDER_TIMEOUT_SECONDS = float(os.environ.get("PROVIDER_TIMEOUT_SECONDS", "10"))
+    PRICE_STORE_DIR = os.environ.get("PRICE_STORE_DIR")  # defaults to <instance>/prices
+    DEBIT_MAX_WORKERS = int(os.environ.get("DEBIT_MAX_WORKERS", "8"))
+    DEBIT_COMMIT_BATCH = int(os.environ.get("DEBIT_COMMIT_BATCH", "25"))
+    UPI_RATE_LIMIT_PER_SEC = float(os.environ.get("UPI_RATE_LIMIT_PER_SEC", "20"))
+    UPI_RATE_LIMIT_BURST = float(os.environ.get("UPI_RATE_LIMIT_BURST", "40"))
+    NOTIFY_DISPATCH_BATCH = int(os.environ.get("NOTIFY_DISPATCH_BATCH", "500"))
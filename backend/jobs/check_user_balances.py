@@ -0,0 +1,63 @@
+"""
+Consistency check for the user_balances and holdings projections.
+
+This job:
+1. Aggregates pending roundups per user from the roundups table
+2. Compares the result with each user_balances row
+3. Rewrites any row that drifted (or is missing) and logs the correction
+4. Does the same for holdings, from executed orders and redemptions
+
+Schedule: Run nightly, or by hand after manual data fixes
+Cron: 30 2 * * * cd /path/to/Arcon && python -m backend.jobs.check_user_balances
+"""
+
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from backend.services.balance_service import rebuild_pending_balances
+from backend.services.holdings_service import rebuild_holdings
+from backend.app import create_app
+
+
+def check_user_balances(user_id=None):
+    """
+    Rebuild drifted balance and holding rows (all users, or one).
+
+    Returns:
+        dict: user_id -> (stored pending_paise, actual pending_paise) for each
+        balance fix; holding fixes are only logged
+    """
+    app = create_app()
+
+    with app.app_context():
+        fixed = rebuild_pending_balances(user_id)
+        for uid, (old, new) in sorted(fixed.items()):
+            print(f"[FIXED] User {uid}: pending ₹{old / 100:.2f} -> ₹{new / 100:.2f}")
+        holdings = rebuild_holdings(user_id)
+        for (uid, product), (old, new) in sorted(holdings.items()):
+            print(f"[FIXED] User {uid} {product}: available ₹{old / 100:.2f} -> ₹{new / 100:.2f}")
+        print(f"\n[CHECK END] {len(fixed)} balance rows, {len(holdings)} holding rows corrected")
+        return fixed
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Check and rebuild user pending balances and holdings")
+    parser.add_argument("--user-id", type=int, default=None)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("User Balance and Holdings Consistency Check")
+    print("=" * 60)
+
+    try:
+        check_user_balances(args.user_id)
+    except Exception as e:
+        print(f"\n[CRITICAL ERROR] Job failed: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,102 @@
+"""
+Bulk import of historical bank statements for one user.
+
+This job:
+1. Reads an NDJSON or CSV statement file line by line (never fully in memory)
+2. Normalizes amounts to paise and groups rows into fixed-size chunks
+3. Bulk-inserts each chunk's transactions and roundups and commits it
+4. Prints progress after every chunk and a summary at the end
+
+Usage:
+    python -m backend.jobs.import_statements --user-id 42 --file statement.csv
+    python -m backend.jobs.import_statements --user-id 42 --file feed.ndjson --chunk-size 2000
+
+CSV files need a header row with an `amount` column (rupees); `merchant`,
+`description` and `timestamp` (ISO 8601) are optional. NDJSON lines use the
+same keys as `POST /api/transactions/batch`.
+"""
+
+import argparse
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from backend.extensions import db
+from backend.models.user import User
+from backend.models.event import EventLog
+from backend.services.ingest_service import STATEMENT_FORMATS, import_statement, iter_statement_rows
+from backend.app import create_app
+
+
+def detect_format(path: str) -> str:
+    return "csv" if path.lower().endswith(".csv") else "ndjson"
+
+
+def run_import(user_id: int, path: str, fmt: str = None, chunk_size: int = 1000) -> dict:
+    """
+    Import one statement file for one user.
+
+    Returns:
+        dict: Import totals (rows, created, failed, roundups, chunks, errors)
+    """
+    fmt = (fmt or detect_format(path)).lower()
+    if fmt not in STATEMENT_FORMATS:
+        raise ValueError(f"Unsupported format: {fmt}")
+
+    app = create_app()
+
+    with app.app_context():
+        user = User.query.get(user_id)
+        if not user:
+            raise ValueError(f"User {user_id} not found")
+
+        print(f"\n[IMPORT START] user={user_id} file={path} format={fmt} chunk_size={chunk_size}")
+
+        def report(totals):
+            print(
+                f"[PROGRESS] chunk {totals['chunks']}: {totals['rows']} rows read, "
+                f"{totals['created']} created, {totals['failed']} failed, "
+                f"roundups ₹{totals['roundup_total_paise'] / 100:.2f}"
+            )
+
+        with open(path, newline="", encoding="utf-8-sig") as fh:
+            totals = import_statement(user, iter_statement_rows(fh, fmt), chunk_size=chunk_size, progress=report)
+
+        db.session.add(EventLog(
+            user_id=user_id,
+            event_type="statement_imported",
+            message=f"Imported {totals['created']} of {totals['rows']} statement rows ({fmt})",
+            amount_paise=totals["roundup_total_paise"],
+        ))
+        db.session.commit()
+
+        for err in totals["errors"]:
+            print(f"[ROW ERROR] row {err['row']}: {err['error']}")
+        print(f"\n[IMPORT END] {totals['created']}/{totals['rows']} rows imported in {totals['chunks']} chunks")
+        return totals
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import a bank statement (NDJSON or CSV) for one user")
+    parser.add_argument("--user-id", type=int, required=True)
+    parser.add_argument("--file", required=True)
+    parser.add_argument("--format", choices=sorted(STATEMENT_FORMATS))
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args(argv)
+    return run_import(args.user_id, args.file, args.format, max(1, args.chunk_size))
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Bank Statement Import Job")
+    print("=" * 60)
+
+    try:
+        main()
+    except Exception as e:
+        print(f"\n[CRITICAL ERROR] Import failed: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
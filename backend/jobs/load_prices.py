@@ -0,0 +1,65 @@
+"""
+Daily price load: NAVs and gold rates into the price store.
+
+This job:
+1. Groups every scheme in SCHEME_CODES by the provider that sells it
+2. Fetches the latest prices with one get_prices call per provider
+3. Writes today's price into each instrument's file (rerunning the same day
+   overwrites that day's record)
+
+Schedule: Daily, after NAVs are published
+Cron: 0 23 * * * cd /path/to/Arcon && python -m backend.jobs.load_prices
+"""
+
+import sys
+import os
+from collections import defaultdict
+from datetime import date
+from typing import Dict
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from backend.services.omnibus_service import SCHEME_CODES, provider_for
+from backend.services.price_store import get_price_store
+
+
+def load_prices(day: date = None) -> Dict[str, int]:
+    """Fetch and store the price of every scheme for ``day``; must run in an app context."""
+    day = day or date.today()
+    schemes = defaultdict(set)
+    for product_type, scheme in SCHEME_CODES.items():
+        provider = provider_for(product_type)
+        if provider is not None:
+            schemes[provider].add(scheme)
+    store = get_price_store()
+    loaded = {}
+    for provider, codes in schemes.items():
+        try:
+            prices = provider.get_prices(sorted(codes))
+        except Exception as e:
+            print(f"[ERROR] Price fetch failed for {sorted(codes)}: {str(e)}")
+            continue
+        for code, price in prices.items():
+            store.write(code, {day: int(price)})
+            loaded[code] = int(price)
+            print(f"[PRICE] {code}: ₹{int(price) / 100:.4f}")
+    return loaded
+
+
+if __name__ == "__main__":
+    from backend.app import create_app
+
+    print("=" * 60)
+    print("Daily Price Load")
+    print("=" * 60)
+
+    try:
+        with create_app().app_context():
+            loaded = load_prices()
+        print(f"\n[PRICES END] {len(loaded)} instruments updated")
+    except Exception as e:
+        print(f"\n[CRITICAL ERROR] Job failed: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -4,12 +4,26 @@ Scheduled job to process UPI AutoPay mandate debits.
 This job:
 1. Finds mandates due for debit (next_debit_at <= now, status=active)
 2. Checks if 24h pre-notification was sent (RBI compliance)
-3. If not sent: sends notification and reschedules for 24h later
-4. If sent: executes debit via payment provider
-5. Handles failures with retry logic
+3. If not sent: sends notification and reschedules for 24h later; a batch's
+   notices are written with one bulk insert, committed, then dispatched together
+4. If sent: executes debit via payment provider, on a worker pool throttled
+   by a token bucket sized to the provider's rate limit, committing results
+   in small batches
+5. Handles failures with retry logic: low balance waits 24h for a fresh
+   notice, other errors back off exponentially (DEBIT_RETRY_BASE, capped)
 6. Updates next_debit_at based on frequency
 
-Schedule: Run every 6 hours via cron or task scheduler
+Only the replica holding the job's lease (job_lease_service: an advisory
+lock on PostgreSQL, a heartbeated job_leases row elsewhere) runs a pass; the
+others exit. Mandates are also claimed in batches with a row lease (FOR
+UPDATE SKIP LOCKED on PostgreSQL), so nothing is debited twice even alongside
+the scheduler daemon.
+Batches are walked in id order and each commits with a job_checkpoints row;
+a run that dies midway resumes after the last committed batch, and memory
+stays bounded by one batch however large the backlog.
+
+Schedule: Debits are fired at their due time by the scheduler daemon
+(python -m backend.jobs.scheduler); keep this job on cron as a catch-up sweep
 Cron: 0 */6 * * * cd /path/to/Arcon && python -m backend.jobs.mandate_debits
 
 For production: Use Celery, APScheduler, or cloud scheduler (AWS EventBridge, GCP Cloud Scheduler)
@@ -17,23 +31,45 @@ For production: Use Celery, APScheduler, or cloud scheduler (AWS EventBridge, GC
 
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
+from typing import List, Tuple
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 
+from flask import current_app
+
 from backend.extensions import db
 from backend.models.mandate import Mandate
 from backend.models.event import EventLog
-from backend.models.roundup import Roundup
+from backend.models.job_checkpoint import JobCheckpoint
 from backend.providers import get_upi_provider
+from backend.services.balance_service import get_pending_balance, get_pending_balances
+from backend.services.checkpoint_service import advance, finish, start_or_resume
+from backend.services.job_lease_service import JobLeaseHolder
+from backend.services.notification_service import dispatch_notifications, send_pre_debit_notifications
+from backend.services.rate_limiter import get_rate_limiter
+from backend.services.sql_helpers import claim_batch, release_claims
 from backend.app import create_app
 
+# Mandates claimed per batch, and how long a worker owns them before another may take over.
+DEBIT_CLAIM_BATCH = 100
+DEBIT_LEASE = timedelta(minutes=30)
+DEBIT_JOB_NAME = "mandate_debits"
+# An unfinished run younger than this is resumed from its checkpoint instead of starting over.
+DEBIT_RESUME_WINDOW = timedelta(hours=6)
+# Other failed debits back off (1h, 2h, 4h, ...) instead of staying due on every tick.
+DEBIT_RETRY_BASE = timedelta(hours=1)
+DEBIT_RETRY_MAX = timedelta(hours=12)
+
 
 def send_pre_debit_notification(mandate: Mandate, amount_paise: int):
     """
     Send 24-hour advance notice for mandate debit (RBI compliance).
     
+    Batch callers queue notices and use send_pre_debit_notifications instead.
+    
     Args:
         mandate: Mandate object
         amount_paise: Amount to be debited
@@ -41,42 +77,122 @@ def send_pre_debit_notification(mandate: Mandate, amount_paise: int):
     Returns:
         bool: True if notification sent successfully
     """
-    from backend.models.user import User
-    
-    user = User.query.get(mandate.user_id)
-    if not user:
-        return False
-    
-    # In production: Send actual SMS/email/push notification
-    # For now: Log the event
-    message = f"Auto-debit scheduled: ₹{amount_paise / 100:.2f} will be debited in 24 hours for your roundup investment"
-    
-    event = EventLog(
-        user_id=mandate.user_id,
-        event_type="pre_debit_sent",
-        message=message,
-        amount_paise=amount_paise
+    messages = send_pre_debit_notifications([(mandate, amount_paise)])
+    db.session.commit()
+    dispatch_notifications(messages)
+    return bool(messages)
+
+
+def _upi_rate_limiter():
+    return get_rate_limiter(
+        "upi",
+        current_app.config.get("UPI_RATE_LIMIT_PER_SEC", 20),
+        current_app.config.get("UPI_RATE_LIMIT_BURST", 40),
     )
+
+
+def debit_idempotency_key(mandate: Mandate) -> str:
+    """
+    Provider idempotency key for the mandate's current debit attempt.
+
+    Derived from committed state only: the cycle (last successful debit) and
+    the recorded failures. A debit whose outcome was never committed (crash,
+    failed commit) is retried with the same key, so the provider returns the
+    first charge instead of taking the money twice; a recorded failure or
+    success moves on to a new key.
+    """
+    cycle = mandate.last_debit_at or mandate.created_at
+    stamp = cycle.strftime("%Y%m%d%H%M%S") if cycle else "0"
+    return f"mandate-{mandate.id}-{stamp}-{mandate.failure_count or 0}"
+
+
+def request_debit(provider, limiter, mandate_id: int, external_mandate_id: str, amount_paise: int,
+                  idempotency_key: str = None):
+    """
+    Network half of a debit: wait for rate-limit tokens, then call the provider.
+
+    Safe to run on a worker thread; it takes plain values and touches no DB state.
+    """
+    limiter.acquire(getattr(provider, "API_CALLS_PER_DEBIT", 1))
+    return provider.execute_debit(
+        external_mandate_id=external_mandate_id,
+        amount_paise=amount_paise,
+        description=f"Roundup investment auto-debit for mandate {mandate_id}",
+        idempotency_key=idempotency_key,
+    )
+
+
+def _retry_delay(failure_count: int) -> timedelta:
+    return min(DEBIT_RETRY_MAX, DEBIT_RETRY_BASE * 2 ** (failure_count - 1))
+
+
+def apply_debit_result(mandate: Mandate, amount_paise: int, result: dict = None, error: Exception = None):
+    """
+    DB half of a debit: record the provider's outcome on the mandate (no commit).
     
-    db.session.add(event)
+    Args:
+        mandate: Mandate object
+        amount_paise: Amount debited
+        result: Provider response, when the call returned
+        error: Exception raised by the call, if any
     
-    # Mark notification as sent
-    mandate.pre_debit_notification_sent_at = datetime.utcnow()
+    Returns:
+        dict: Provider response on success, else status=failed with the error
+    """
+    if error is None and result.get("status") in ["authorized", "captured", "paid", "issued"]:
+        # Success
+        print(f"[DEBIT] Successfully debited ₹{amount_paise / 100:.2f} for mandate {mandate.id}")
+        
+        mandate.last_debit_at = datetime.utcnow()
+        mandate.failure_count = 0  # Reset on success
+        mandate.pre_debit_notification_sent_at = None  # Reset for next cycle
+        
+        # Update next debit based on frequency
+        if mandate.frequency == "daily":
+            mandate.next_debit_at = datetime.utcnow() + timedelta(days=1)
+        elif mandate.frequency == "weekly":
+            mandate.next_debit_at = datetime.utcnow() + timedelta(weeks=1)
+        elif mandate.frequency == "monthly":
+            mandate.next_debit_at = datetime.utcnow() + timedelta(days=30)
+        
+        return result
     
-    db.session.commit()
+    # Failed
+    e = error or Exception(f"Debit failed: {result.get('error', 'Unknown error')}")
+    print(f"[DEBIT ERROR] Mandate {mandate.id}: {str(e)}")
     
-    print(f"[PRE-DEBIT] Notification sent to user {user.id}: {message}")
+    # Track failure
+    mandate.failure_count = (mandate.failure_count or 0) + 1
+    mandate.last_failure_reason = str(e)
     
-    # TODO: Integrate with SMS provider (Twilio, MSG91, etc.)
-    # TODO: Send email via SendGrid/AWS SES
-    # TODO: Send push notification via Firebase
+    # Auto-pause after 3 failures
+    if mandate.failure_count >= 3:
+        mandate.status = "paused"
+        print(f"[AUTO-PAUSE] Mandate {mandate.id} paused after 3 consecutive failures")
+        
+        event = EventLog(
+            user_id=mandate.user_id,
+            event_type="mandate_auto_paused",
+            message=f"Mandate {mandate.id} auto-paused due to repeated failures: {mandate.last_failure_reason}"
+        )
+        db.session.add(event)
+    
+    # For insufficient balance: retry in 24h
+    if "insufficient" in str(e).lower() or "balance" in str(e).lower():
+        mandate.next_debit_at = datetime.utcnow() + timedelta(hours=24)
+        mandate.pre_debit_notification_sent_at = None  # Resend notification
+        print(f"[RETRY] Will retry mandate {mandate.id} in 24 hours")
+    else:
+        delay = _retry_delay(mandate.failure_count)
+        mandate.next_debit_at = datetime.utcnow() + delay
+        print(f"[RETRY] Will retry mandate {mandate.id} in {delay}")
     
-    return True
+    return {"status": "failed", "error": str(e)}
 
 
 def execute_mandate_debit(mandate: Mandate, amount_paise: int):
     """
-    Execute debit against active mandate via payment provider.
+    Execute debit against active mandate via payment provider and commit.
     
     Args:
         mandate: Mandate object
@@ -85,69 +201,93 @@ def execute_mandate_debit(mandate: Mandate, amount_paise: int):
     Returns:
         dict: Provider response with payment_id and status
     """
-    provider = get_upi_provider()
-    
     try:
-        result = provider.execute_debit(
-            external_mandate_id=mandate.external_mandate_id,
-            amount_paise=amount_paise,
-            description=f"Roundup investment auto-debit for mandate {mandate.id}"
-        )
-        
-        if result.get("status") in ["authorized", "captured", "paid", "issued"]:
-            # Success
-            print(f"[DEBIT] Successfully debited ₹{amount_paise / 100:.2f} for mandate {mandate.id}")
-            
-            mandate.last_debit_at = datetime.utcnow()
-            mandate.failure_count = 0  # Reset on success
-            mandate.pre_debit_notification_sent_at = None  # Reset for next cycle
-            
-            # Update next debit based on frequency
-            if mandate.frequency == "daily":
-                mandate.next_debit_at = datetime.utcnow() + timedelta(days=1)
-            elif mandate.frequency == "weekly":
-                mandate.next_debit_at = datetime.utcnow() + timedelta(weeks=1)
-            elif mandate.frequency == "monthly":
-                mandate.next_debit_at = datetime.utcnow() + timedelta(days=30)
-            
-            db.session.commit()
-            
-            return result
-        else:
-            # Failed
-            raise Exception(f"Debit failed: {result.get('error', 'Unknown error')}")
-    
+        result, error = request_debit(
+            get_upi_provider(), _upi_rate_limiter(), mandate.id, mandate.external_mandate_id, amount_paise,
+            debit_idempotency_key(mandate),
+        ), None
     except Exception as e:
-        print(f"[DEBIT ERROR] Mandate {mandate.id}: {str(e)}")
-        
-        # Track failure
-        mandate.failure_count = (mandate.failure_count or 0) + 1
-        mandate.last_failure_reason = str(e)
-        
-        # Auto-pause after 3 failures
-        if mandate.failure_count >= 3:
-            mandate.status = "paused"
-            print(f"[AUTO-PAUSE] Mandate {mandate.id} paused after 3 consecutive failures")
-            
-            event = EventLog(
-                user_id=mandate.user_id,
-                event_type="mandate_auto_paused",
-                message=f"Mandate {mandate.id} auto-paused due to repeated failures: {mandate.last_failure_reason}"
-            )
-            db.session.add(event)
-        
-        # For insufficient balance: retry in 24h
-        if "insufficient" in str(e).lower() or "balance" in str(e).lower():
-            mandate.next_debit_at = datetime.utcnow() + timedelta(hours=24)
-            mandate.pre_debit_notification_sent_at = None  # Resend notification
-            print(f"[RETRY] Will retry mandate {mandate.id} in 24 hours")
-        
-        db.session.commit()
-        
-        return {"status": "failed", "error": str(e)}
+        result, error = None, e
+    outcome = apply_debit_result(mandate, amount_paise, result, error)
+    db.session.commit()
+    return outcome
+
+
+def run_debits(debits: List[Tuple[Mandate, int]]) -> int:
+    """
+    Execute queued ``(mandate, amount_paise)`` debits on a worker pool.
+
+    Only the rate-limited provider calls run on the pool; outcomes are
+    applied on this thread as they complete and committed every
+    DEBIT_COMMIT_BATCH debits. Each call carries debit_idempotency_key, so
+    outcomes lost to a crash before their commit are recovered by the next
+    run without charging twice. If a commit fails, every outcome that did
+    not make it to the DB is still logged before the error is raised.
+    Returns the number of successful debits.
+    """
+    if not debits:
+        return 0
+    provider = get_upi_provider()
+    limiter = _upi_rate_limiter()
+    commit_every = max(1, current_app.config.get("DEBIT_COMMIT_BATCH", 25))
+    succeeded = 0
+    uncommitted = []
+    commit_error = None
+
+    def commit():
+        nonlocal commit_error
+        try:
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            commit_error = e
+            for mandate_id, amount, outcome in uncommitted:
+                _log_unrecorded(mandate_id, amount, outcome)
+        uncommitted.clear()
+
+    with ThreadPoolExecutor(
+        max_workers=max(1, current_app.config.get("DEBIT_MAX_WORKERS", 8)), thread_name_prefix="debit"
+    ) as pool:
+        futures = {
+            pool.submit(
+                request_debit, provider, limiter, m.id, m.external_mandate_id, amount, debit_idempotency_key(m)
+            ): (m, amount)
+            for m, amount in debits
+        }
+        # Read before any commit expires the mandates.
+        mandate_ids = {future: m.id for future, (m, _) in futures.items()}
+        for future in as_completed(futures):
+            mandate, amount = futures[future]
+            try:
+                result, error = future.result(), None
+            except Exception as e:
+                result, error = None, e
+            if commit_error is not None:
+                # The session is unusable for this batch; record the outcome in the log instead.
+                outcome = result if error is None else {"status": "failed", "error": str(error)}
+                _log_unrecorded(mandate_ids[future], amount, outcome)
+                continue
+            outcome = apply_debit_result(mandate, amount, result, error)
+            if outcome.get("status") != "failed":
+                succeeded += 1
+            uncommitted.append((mandate_ids[future], amount, outcome))
+            if len(uncommitted) >= commit_every:
+                commit()
+    if commit_error is None:
+        commit()
+    if commit_error is not None:
+        raise commit_error
+    return succeeded
+
+
+def _log_unrecorded(mandate_id: int, amount_paise: int, outcome: dict) -> None:
+    print(
+        f"[DEBIT UNRECORDED] Mandate {mandate_id}: ₹{amount_paise / 100:.2f} "
+        f"status={outcome.get('status')} payment_id={outcome.get('payment_id')} error={outcome.get('error')}"
+    )
 
 
-def calculate_debit_amount(mandate: Mandate) -> int:
+def calculate_debit_amount(mandate: Mandate, pending_paise: int = None) -> int:
     """
     Calculate amount to debit for this mandate.
     
@@ -155,80 +295,194 @@ def calculate_debit_amount(mandate: Mandate) -> int:
     
     Args:
         mandate: Mandate object
+        pending_paise: The user's pending total if already fetched (batch prefetch)
     
     Returns:
         int: Amount in paise
     """
-    # Get sum of pending roundups for this user
-    pending_sum = db.session.query(db.func.coalesce(db.func.sum(Roundup.amount_paise), 0)).filter(
-        Roundup.user_id == mandate.user_id,
-        Roundup.status == "pending"
-    ).scalar()
+    # Pending roundup total for this user, from its balance row
+    if pending_paise is None:
+        pending_paise, _ = get_pending_balance(mandate.user_id)
     
     # Cap at mandate max_amount
-    amount = min(int(pending_sum), mandate.max_amount_paise)
+    amount = min(int(pending_paise), mandate.max_amount_paise)
     
     return amount
 
 
+def process_mandate(mandate: Mandate, now: datetime, pending_paise: int = None, commit: bool = True,
+                    debits: List[Tuple[Mandate, int]] = None, notices: List[Tuple[Mandate, int]] = None):
+    """
+    Notify or debit one due mandate (the caller holds its lease).
+
+    Batch callers pass the prefetched pending total, ``commit=False`` and
+    ``debits``/``notices`` lists: skips are then committed with the batch,
+    debits are queued for run_debits and notices for
+    send_pre_debit_notifications instead of being handled inline.
+    """
+    print(f"\n--- Processing Mandate {mandate.id} ---")
+    
+    # Calculate debit amount
+    amount_paise = calculate_debit_amount(mandate, pending_paise)
+    
+    if amount_paise <= 0:
+        print(f"[SKIP] Mandate {mandate.id}: No pending roundups, skipping debit")
+        # Update next debit to tomorrow
+        if mandate.frequency == "daily":
+            mandate.next_debit_at = datetime.utcnow() + timedelta(days=1)
+        elif mandate.frequency == "weekly":
+            mandate.next_debit_at = datetime.utcnow() + timedelta(weeks=1)
+        elif mandate.frequency == "monthly":
+            mandate.next_debit_at = datetime.utcnow() + timedelta(days=30)
+        
+        mandate.pre_debit_notification_sent_at = None
+        if commit:
+            db.session.commit()
+        return
+    
+    # Check if 24h pre-notification was sent
+    notification_sent = mandate.pre_debit_notification_sent_at is not None
+    
+    if notification_sent:
+        # Check if 24 hours have passed
+        time_since_notification = now - mandate.pre_debit_notification_sent_at
+        
+        if time_since_notification < timedelta(hours=24):
+            print(f"[WAIT] Mandate {mandate.id}: Notification sent {time_since_notification.total_seconds() / 3600:.1f}h ago, waiting for 24h")
+            return
+        
+        # Execute debit
+        print(f"[EXECUTE] Mandate {mandate.id}: Debiting ₹{amount_paise / 100:.2f}")
+        if debits is not None:
+            debits.append((mandate, amount_paise))
+        else:
+            execute_mandate_debit(mandate, amount_paise)
+    
+    else:
+        # Send pre-debit notification
+        print(f"[NOTIFY] Mandate {mandate.id}: Sending 24h pre-debit notice for ₹{amount_paise / 100:.2f}")
+        if notices is not None:
+            notices.append((mandate, amount_paise))
+        else:
+            send_pre_debit_notification(mandate, amount_paise)
+
+
+def process_claimed(token: str, mandate_ids: List[int], now: datetime) -> int:
+    """
+    Notify or debit a batch of mandates claimed with ``token``, then release them.
+
+    Notices are committed (with any skips so far) before they are dispatched;
+    debits are executed and committed on the worker pool; whatever is left
+    is for the caller's commit. Returns the number of mandates processed.
+    """
+    mandates = Mandate.query.filter(Mandate.id.in_(mandate_ids)).order_by(Mandate.id).all()
+    # One query for every user's pending total in the batch, instead of one per mandate.
+    pending = get_pending_balances(m.user_id for m in mandates)
+    debits, notices = [], []
+    for mandate in mandates:
+        process_mandate(mandate, now, pending[mandate.user_id], commit=False, debits=debits, notices=notices)
+    if notices:
+        # One INSERT for the batch's events and one UPDATE for its mandates.
+        messages = send_pre_debit_notifications(notices, now)
+        db.session.commit()
+        dispatch_notifications(messages)
+        print(f"\n[PRE-DEBIT] Sent {len(messages)} pre-debit notifications")
+    if debits:
+        print(f"\n[DEBITS] Executing {len(debits)} debits")
+        run_debits(debits)
+    release_claims(Mandate, Mandate.id, mandate_ids, token)
+    return len(mandates)
+
+
+def process_mandates(mandate_ids: List[int], now: datetime = None) -> int:
+    """
+    Claim and process the given mandates if they are still due; must run in an app context.
+
+    Used by the scheduler daemon to fire mandates at their due time. Ids that
+    are no longer due, active or free (another worker holds the lease) are
+    skipped. Commits, and returns the number processed.
+    """
+    now = now or datetime.utcnow()
+    token, claimed = claim_batch(
+        Mandate,
+        Mandate.id,
+        [Mandate.status == "active", Mandate.next_debit_at <= now, Mandate.id.in_(mandate_ids)],
+        Mandate.id,
+        len(mandate_ids),
+        DEBIT_LEASE,
+        now,
+    )
+    if not claimed:
+        return 0
+    count = process_claimed(token, claimed, now)
+    db.session.commit()
+    db.session.expunge_all()
+    return count
+
+
 def process_due_debits():
     """
     Main job function: Process all mandates due for debit.
+
+    Every replica may run it; the one holding the job's lease does the work
+    and the others exit straight away.
     """
     app = create_app()
     
     with app.app_context():
+        lease = JobLeaseHolder(DEBIT_JOB_NAME, DEBIT_LEASE)
+        if not lease.acquire():
+            print(f"\n[JOB SKIP] Another worker holds the {DEBIT_JOB_NAME} lease")
+            return
+        try:
+            _run_due_debits(lease)
+        finally:
+            lease.release()
+
+
+def _run_due_debits(lease: JobLeaseHolder):
+    checkpoint = start_or_resume(DEBIT_JOB_NAME, DEBIT_RESUME_WINDOW)
+    # A resumed run keeps its original cut-off, so it finishes the same due set.
+    due_before = checkpoint.run_started_at
+    after = checkpoint.last_key
+    if after:
+        print(f"\n[JOB RESUME] Continuing run from {due_before} after mandate {after}")
+    else:
+        print(f"\n[JOB START] Processing due mandates at {due_before}")
+
+    processed = 0
+    while True:
         now = datetime.utcnow()
-        
-        # Find active mandates due for debit
-        due_mandates = Mandate.query.filter(
-            Mandate.status == "active",
-            Mandate.next_debit_at <= now
-        ).all()
-        
-        print(f"\n[JOB START] Processing {len(due_mandates)} due mandates at {now}")
-        
-        for mandate in due_mandates:
-            print(f"\n--- Processing Mandate {mandate.id} ---")
-            
-            # Calculate debit amount
-            amount_paise = calculate_debit_amount(mandate)
-            
-            if amount_paise <= 0:
-                print(f"[SKIP] Mandate {mandate.id}: No pending roundups, skipping debit")
-                # Update next debit to tomorrow
-                if mandate.frequency == "daily":
-                    mandate.next_debit_at = datetime.utcnow() + timedelta(days=1)
-                elif mandate.frequency == "weekly":
-                    mandate.next_debit_at = datetime.utcnow() + timedelta(weeks=1)
-                elif mandate.frequency == "monthly":
-                    mandate.next_debit_at = datetime.utcnow() + timedelta(days=30)
-                
-                mandate.pre_debit_notification_sent_at = None
-                db.session.commit()
-                continue
-            
-            # Check if 24h pre-notification was sent
-            notification_sent = mandate.pre_debit_notification_sent_at is not None
-            
-            if notification_sent:
-                # Check if 24 hours have passed
-                time_since_notification = now - mandate.pre_debit_notification_sent_at
-                
-                if time_since_notification < timedelta(hours=24):
-                    print(f"[WAIT] Mandate {mandate.id}: Notification sent {time_since_notification.total_seconds() / 3600:.1f}h ago, waiting for 24h")
-                    continue
-                
-                # Execute debit
-                print(f"[EXECUTE] Mandate {mandate.id}: Debiting ₹{amount_paise / 100:.2f}")
-                execute_mandate_debit(mandate, amount_paise)
-            
-            else:
-                # Send pre-debit notification
-                print(f"[NOTIFY] Mandate {mandate.id}: Sending 24h pre-debit notice for ₹{amount_paise / 100:.2f}")
-                send_pre_debit_notification(mandate, amount_paise)
-        
-        print(f"\n[JOB END] Processed {len(due_mandates)} mandates")
+        # Claim a batch of due mandates; other workers skip the ones leased here.
+        token, mandate_ids = claim_batch(
+            Mandate,
+            Mandate.id,
+            [Mandate.status == "active", Mandate.next_debit_at <= due_before, Mandate.id > after],
+            Mandate.id,
+            DEBIT_CLAIM_BATCH,
+            DEBIT_LEASE,
+            now,
+        )
+        if not mandate_ids:
+            break
+        after = mandate_ids[-1]
+        print(f"\n[BATCH] Claimed {len(mandate_ids)} due mandates")
+
+        count = process_claimed(token, mandate_ids, now)
+        processed += count
+        # Remaining skips and the checkpoint are committed together with the claim release.
+        advance(checkpoint, after, count)
+        db.session.commit()
+        # Drop the batch's ORM objects so memory stays bounded by one batch.
+        db.session.expunge_all()
+        if not lease.hold():
+            # The checkpoint stays "running", so the new leader resumes after this batch.
+            print(f"\n[JOB STOP] Lost the {DEBIT_JOB_NAME} lease after {processed} mandates")
+            return
+        checkpoint = db.session.get(JobCheckpoint, DEBIT_JOB_NAME)
+
+    finish(checkpoint)
+    print(f"\n[JOB END] Processed {processed} mandates")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,65 @@
+"""
+Outbox worker and order reconciler.
+
+This job:
+1. Claims due order_outbox entries in batches (token + lease, so several
+   workers never send the same order)
+2. Sends each batch to the providers as omnibus orders in one bulk call
+3. Applies the outcomes: executed orders invest their reserved roundups and
+   write the ledger debit, failed ones release the roundups back to pending,
+   provider errors are retried with exponential backoff
+4. Polls providers in bulk for orders still pending after placement and
+   applies the same transitions
+
+Schedule: Every minute
+Cron: * * * * * cd /path/to/Arcon && python -m backend.jobs.order_outbox
+"""
+
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from backend.services.order_outbox_service import claim_due_entries, dispatch_claimed, reconcile_pending_orders
+
+DEFAULT_BATCH_SIZE = 500
+
+
+def drain_outbox(batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """Dispatch due outbox entries until none are left; must run in an app context."""
+    sent = 0
+    while True:
+        token = claim_due_entries(batch_size)
+        if not token:
+            return sent
+        count = dispatch_claimed(token)
+        print(f"[OUTBOX] Dispatched {count} orders")
+        sent += count
+
+
+if __name__ == "__main__":
+    import argparse
+    from backend.app import create_app
+
+    parser = argparse.ArgumentParser(description="Drain the order outbox and reconcile pending orders")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--skip-reconcile", action="store_true")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Order Outbox Worker")
+    print("=" * 60)
+
+    try:
+        with create_app().app_context():
+            sent = drain_outbox(max(1, args.batch_size))
+            print(f"\n[OUTBOX END] {sent} orders dispatched")
+            if not args.skip_reconcile:
+                result = reconcile_pending_orders(max(1, args.batch_size))
+                print(f"[RECONCILE END] {result or 'no pending orders'}")
+    except Exception as e:
+        print(f"\n[CRITICAL ERROR] Job failed: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
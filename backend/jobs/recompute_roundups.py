@@ -0,0 +1,300 @@
+"""
+Background job to recompute a user's pending roundups after a rounding_base change.
+
+This job:
+1. Streams the user's pending roundups joined to their transaction amounts,
+   in id order and fixed-size chunks
+2. Recomputes each chunk with the vectorized roundup engine
+3. Keeps the daily/monthly cap counters consistent: decreases hand allowance
+   back, increases are only granted up to the remaining cap of the period the
+   roundup was created in
+4. Writes the chunk with one conditional UPDATE ... RETURNING, moves the
+   counters and the user's pending balance for the rows it changed, and
+   commits it together with the user's job checkpoint
+5. Records start, progress and completion in EventLog
+
+Triggered from PATCH /api/user/settings on a background thread, or by hand:
+    python -m backend.jobs.recompute_roundups --user-id 42
+
+The request is stored as a running job_checkpoints row in the same commit as
+the rounding_base change, so a recompute lost to a restart is finished by:
+Cron: */10 * * * * cd /path/to/Arcon && python -m backend.jobs.recompute_roundups --resume
+"""
+
+import sys
+import os
+import logging
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from sqlalchemy import update
+
+from backend.extensions import db
+from backend.models.cap_setting import CapSetting
+from backend.models.event import EventLog
+from backend.models.job_checkpoint import JobCheckpoint
+from backend.models.roundup import Roundup
+from backend.models.transaction import Transaction
+from backend.models.user import User
+from backend.services.balance_service import adjust_pending_balance
+from backend.services.checkpoint_service import advance, finish, request_run, start_or_resume
+from backend.services.roundup_engine import calculate_roundups
+from backend.services.roundup_service import claim_cap_allowance, release_cap_allowance
+
+DEFAULT_CHUNK_SIZE = 1000
+# One job_checkpoints row per user: "roundup_recompute:<user_id>".
+RECOMPUTE_JOB_PREFIX = "roundup_recompute:"
+# A running checkpoint that has not advanced for this long lost its process.
+RECOMPUTE_STALE_AFTER = timedelta(minutes=10)
+RECOMPUTE_RESUME_WINDOW = timedelta(days=7)
+
+# user_id -> True when another recompute was requested while one was running
+_running = {}
+_running_lock = threading.Lock()
+
+
+def _fetch_chunk(user_id: int, after_id: int, chunk_size: int):
+    return (
+        db.session.query(Roundup.id, Roundup.amount_paise, Roundup.created_at, Transaction.amount_paise)
+        .join(Transaction, Transaction.id == Roundup.transaction_id)
+        .filter(Roundup.user_id == user_id, Roundup.status == "pending", Roundup.id > after_id)
+        .order_by(Roundup.id)
+        .limit(chunk_size)
+        .all()
+    )
+
+
+def _apply_chunk(user_id: int, cap, rows, rounding_base: int) -> dict:
+    """
+    Recompute one chunk and write it with one conditional UPDATE (no commit).
+
+    Only rows still pending with the amount that was read are rewritten
+    (RETURNING says which); the cap counters and the pending balance move
+    for those rows alone, so a roundup reserved or invested meanwhile keeps
+    both untouched.
+    """
+    new_amounts = calculate_roundups([tx_amount for _, _, _, tx_amount in rows], rounding_base).tolist()
+    old_amounts = {rid: old for rid, old, _, _ in rows}
+    created = {rid: created_at for rid, _, created_at, _ in rows}
+
+    # Group increases per creation day so each is checked against that day's and month's cap.
+    increases = defaultdict(list)
+    changes = {}
+    for (rid, old, created_at, _), new in zip(rows, new_amounts):
+        if new < old:
+            changes[rid] = new
+        elif new > old:
+            increases[created_at.date()].append((rid, old, created_at, new - old))
+
+    for entries in increases.values():
+        granted = claim_cap_allowance(user_id, cap, [delta for _, _, _, delta in entries], entries[0][2])
+        for (rid, old, _, _), extra in zip(entries, granted):
+            if extra:
+                changes[rid] = old + extra
+
+    updated = set()
+    if changes:
+        table = Roundup.__table__
+        updated = set(db.session.scalars(
+            update(table)
+            .where(
+                db.tuple_(table.c.id, table.c.amount_paise).in_([(rid, old_amounts[rid]) for rid in changes]),
+                table.c.status == "pending",
+            )
+            .values(amount_paise=db.case(changes, value=table.c.id))
+            .returning(table.c.id)
+        ))
+
+    for rid, new in changes.items():
+        old = old_amounts[rid]
+        if new < old and rid in updated:
+            release_cap_allowance(user_id, old - new, created[rid])
+        elif new > old and rid not in updated:
+            # Claimed above for a row that has left pending since: hand it back.
+            release_cap_allowance(user_id, new - old, created[rid])
+
+    delta = sum(changes[rid] - old_amounts[rid] for rid in updated)
+    adjust_pending_balance(user_id, delta, 0)
+    return {"updated": len(updated), "delta_paise": delta}
+
+
+def _job_name(user_id: int) -> str:
+    return f"{RECOMPUTE_JOB_PREFIX}{user_id}"
+
+
+def request_recompute(user_id: int) -> None:
+    """
+    Record that ``user_id`` needs a full recompute (no commit).
+
+    Commit it together with the rounding_base change: if the process running
+    the recompute dies, resume_stalled_recomputes picks the request up.
+    """
+    request_run(_job_name(user_id))
+
+
+def recompute_pending_roundups(user_id: int, chunk_size: int = DEFAULT_CHUNK_SIZE) -> dict:
+    """
+    Recompute all pending roundups of one user with their current rounding_base.
+
+    Must be called inside an app context. Each chunk is committed with the
+    user's job checkpoint, so an interrupted run resumes after the last
+    committed chunk; the started event is only written for a fresh run.
+
+    Returns:
+        dict: scanned, updated and delta_paise totals (of this call)
+    """
+    user = User.query.get(user_id)
+    if not user:
+        return {"scanned": 0, "updated": 0, "delta_paise": 0}
+    base = user.rounding_base
+    cap = CapSetting.query.filter_by(user_id=user_id).first()
+
+    checkpoint = start_or_resume(_job_name(user_id), RECOMPUTE_RESUME_WINDOW)
+    started = None
+    if checkpoint.last_key:
+        started = (
+            EventLog.query
+            .filter_by(user_id=user_id, event_type="roundup_recompute_started")
+            .order_by(EventLog.id.desc())
+            .first()
+        )
+    if started is None:
+        started = EventLog(
+            user_id=user_id,
+            event_type="roundup_recompute_started",
+            message=f"Recomputing pending roundups for rounding base ₹{base}",
+        )
+        db.session.add(started)
+        db.session.commit()
+
+    totals = {"scanned": 0, "updated": 0, "delta_paise": 0}
+    after_id = checkpoint.last_key
+    while True:
+        rows = _fetch_chunk(user_id, after_id, chunk_size)
+        if not rows:
+            break
+        result = _apply_chunk(user_id, cap, rows, base)
+        after_id = rows[-1][0]
+        totals["scanned"] += len(rows)
+        totals["updated"] += result["updated"]
+        totals["delta_paise"] += result["delta_paise"]
+        advance(checkpoint, after_id, len(rows))
+        started.message = (
+            f"Recomputing pending roundups for rounding base ₹{base}: "
+            f"{checkpoint.processed} scanned, {totals['updated']} updated"
+        )
+        db.session.commit()
+
+    db.session.add(EventLog(
+        user_id=user_id,
+        event_type="roundup_recompute_completed",
+        message=f"Recomputed {checkpoint.processed} pending roundups for rounding base ₹{base} ({totals['updated']} changed)",
+        amount_paise=totals["delta_paise"],
+    ))
+    finish(checkpoint)
+    return totals
+
+
+def resume_stalled_recomputes(stale_after: timedelta = RECOMPUTE_STALE_AFTER) -> int:
+    """
+    Finish recomputes whose checkpoint is still running but has not moved for ``stale_after``.
+
+    These were requested, or started, by a process that died before
+    completing them. Must be called inside an app context; returns how many
+    were resumed.
+    """
+    cutoff = datetime.utcnow() - stale_after
+    names = [
+        name for (name,) in
+        db.session.query(JobCheckpoint.job_name).filter(
+            JobCheckpoint.job_name.like(f"{RECOMPUTE_JOB_PREFIX}%"),
+            JobCheckpoint.status == "running",
+            JobCheckpoint.updated_at < cutoff,
+        )
+    ]
+    for name in names:
+        user_id = int(name[len(RECOMPUTE_JOB_PREFIX):])
+        result = recompute_pending_roundups(user_id)
+        print(f"[RESUMED] User {user_id}: {result['scanned']} scanned, {result['updated']} updated")
+    return len(names)
+
+
+def _run_until_settled(app, user_id: int, chunk_size: int) -> None:
+    """Run the recompute, repeating while further base changes arrived meanwhile."""
+    with app.app_context():
+        try:
+            while True:
+                recompute_pending_roundups(user_id, chunk_size)
+                with _running_lock:
+                    if not _running.get(user_id):
+                        _running.pop(user_id, None)
+                        return
+                    _running[user_id] = False
+                # The base changed again mid-run: start the next pass from the first roundup.
+                request_recompute(user_id)
+                db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logging.error(f"Roundup recompute failed for user {user_id}: {e}")
+            with _running_lock:
+                _running.pop(user_id, None)
+            db.session.add(EventLog(user_id=user_id, event_type="roundup_recompute_failed", message=str(e)[:255]))
+            db.session.commit()
+        finally:
+            db.session.remove()
+
+
+def schedule_recompute(app, user_id: int, chunk_size: int = DEFAULT_CHUNK_SIZE, inline: bool = False) -> None:
+    """
+    Start a background recompute for ``user_id`` and return immediately.
+
+    If one is already running in this process it is asked to run once more
+    instead of starting a second, overlapping pass.
+    """
+    with _running_lock:
+        if user_id in _running:
+            _running[user_id] = True
+            return
+        _running[user_id] = False
+    if inline:
+        _run_until_settled(app, user_id, chunk_size)
+        return
+    threading.Thread(
+        target=_run_until_settled,
+        args=(app, user_id, chunk_size),
+        name=f"roundup-recompute-{user_id}",
+        daemon=True,
+    ).start()
+
+
+if __name__ == "__main__":
+    import argparse
+    from backend.app import create_app
+
+    parser = argparse.ArgumentParser(description="Recompute pending roundups for one user, or resume stalled ones")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--user-id", type=int)
+    group.add_argument("--resume", action="store_true")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Pending Roundup Recompute Job")
+    print("=" * 60)
+
+    try:
+        with create_app().app_context():
+            if args.resume:
+                print(f"\n[DONE] Resumed {resume_stalled_recomputes()} stalled recomputes")
+            else:
+                result = recompute_pending_roundups(args.user_id, max(1, args.chunk_size))
+                print(f"\n[DONE] {result['scanned']} scanned, {result['updated']} updated, delta ₹{result['delta_paise'] / 100:.2f}")
+    except Exception as e:
+        print(f"\n[CRITICAL ERROR] Job failed: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,195 @@
+"""
+Batch portfolio revaluation for every user.
+
+This job:
+1. Looks up one price per instrument for the valuation day in the price
+   store (last stored price on or before that day)
+2. Walks users in id order, one chunk at a time, loading their executed
+   orders and redemptions as (user, product) aggregates with two GROUP BY
+   queries
+3. Lays the aggregates out as user x product NumPy matrices (units, cost,
+   cost without units) and values the whole chunk at once: units x price
+   vector, at cost where an order has no units or a product has no price,
+   the same rules as valuation_service.compute_positions_value
+4. Replaces the chunk's portfolio_snapshots rows for that day with one
+   multi-row INSERT and commits, so a rerun for the same day is idempotent
+
+Schedule: Daily, after the price load
+Cron: 30 23 * * * cd /path/to/Arcon && python -m backend.jobs.revalue_portfolios
+"""
+
+import sys
+import os
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+import numpy as np
+from sqlalchemy import delete, insert
+
+from backend.extensions import db
+from backend.models.investment import InvestmentOrder
+from backend.models.portfolio_snapshot import PortfolioSnapshot
+from backend.models.redemption import Redemption
+from backend.models.user import User
+from backend.services.omnibus_service import scheme_for
+from backend.services.price_store import get_price_store
+
+DEFAULT_CHUNK_SIZE = 10_000
+MICRO = 1_000_000
+
+
+def value_units(units: np.ndarray, price: np.ndarray) -> np.ndarray:
+    """floor(units_micro x price / 1e6) without overflowing int64 for large holdings."""
+    whole, frac = np.divmod(units, MICRO)
+    return whole * price + frac * price // MICRO
+
+
+def _chunk_aggregates(lo: int, hi: int):
+    orders = (
+        db.session.query(
+            InvestmentOrder.user_id,
+            InvestmentOrder.product_type,
+            db.func.sum(InvestmentOrder.amount_paise),
+            db.func.coalesce(db.func.sum(InvestmentOrder.units_micro), 0),
+            db.func.sum(db.case((InvestmentOrder.units_micro.is_(None), InvestmentOrder.amount_paise), else_=0)),
+        )
+        .filter(InvestmentOrder.status == "executed", InvestmentOrder.user_id.between(lo, hi))
+        .group_by(InvestmentOrder.user_id, InvestmentOrder.product_type)
+        .all()
+    )
+    redemptions = (
+        db.session.query(Redemption.user_id, Redemption.product_type, db.func.sum(Redemption.units_micro))
+        .filter(
+            Redemption.status == "executed",
+            Redemption.units_micro.isnot(None),
+            Redemption.user_id.between(lo, hi),
+        )
+        .group_by(Redemption.user_id, Redemption.product_type)
+        .all()
+    )
+    return orders, redemptions
+
+
+def revalue_chunk(orders: List[tuple], redemptions: List[tuple], prices: Dict[str, Optional[int]]) -> Dict[str, np.ndarray]:
+    """
+    Value one chunk of (user_id, product_type, ...) aggregate rows.
+
+    Args:
+        orders: (user_id, product_type, invested_paise, units_micro, unit_less_paise)
+        redemptions: (user_id, product_type, units_micro)
+        prices: product_type -> price in paise per unit (None when unknown)
+
+    Returns:
+        dict of arrays, one entry per user: user_id, invested_paise, value_paise
+    """
+    if not orders:
+        empty = np.empty(0, dtype=np.int64)
+        return {"user_id": empty, "invested_paise": empty, "value_paise": empty}
+    columns = list(zip(*orders))
+    user_ids, user_idx = np.unique(np.array(columns[0], dtype=np.int64), return_inverse=True)
+    products, product_idx = np.unique(np.array(columns[1], dtype=object), return_inverse=True)
+    shape = (user_ids.size, products.size)
+
+    invested = np.zeros(shape, dtype=np.int64)
+    units = np.zeros(shape, dtype=np.int64)
+    unit_less = np.zeros(shape, dtype=np.int64)
+    invested[user_idx, product_idx] = np.array(columns[2], dtype=np.int64)
+    units[user_idx, product_idx] = np.array(columns[3], dtype=np.int64)
+    unit_less[user_idx, product_idx] = np.array(columns[4], dtype=np.int64)
+
+    if redemptions:
+        r_users, r_products, r_units = zip(*redemptions)
+        r_users = np.array(r_users, dtype=np.int64)
+        r_user_idx = np.searchsorted(user_ids, r_users)
+        product_pos = {p: i for i, p in enumerate(products)}
+        r_product_idx = np.array([product_pos.get(p, -1) for p in r_products], dtype=np.int64)
+        known = (r_user_idx < user_ids.size) & (r_product_idx >= 0)
+        known[known] = user_ids[r_user_idx[known]] == r_users[known]
+        np.subtract.at(units, (r_user_idx[known], r_product_idx[known]), np.array(r_units, dtype=np.int64)[known])
+
+    price = np.array([prices.get(p) or 0 for p in products], dtype=np.int64)
+    priced = np.array([prices.get(p) is not None for p in products])
+    value = np.where(priced, value_units(np.maximum(units, 0), price) + unit_less, invested)
+    return {"user_id": user_ids, "invested_paise": invested.sum(axis=1), "value_paise": value.sum(axis=1)}
+
+
+def _write_snapshots(result: Dict[str, np.ndarray], lo: int, hi: int, as_of: date, now: datetime) -> None:
+    db.session.execute(
+        delete(PortfolioSnapshot).where(PortfolioSnapshot.as_of == as_of, PortfolioSnapshot.user_id.between(lo, hi)),
+        execution_options={"synchronize_session": False},
+    )
+    if not result["user_id"].size:
+        return
+    pnl = result["value_paise"] - result["invested_paise"]
+    db.session.execute(insert(PortfolioSnapshot), [
+        {"user_id": uid, "as_of": as_of, "invested_paise": inv, "value_paise": val, "pnl_paise": p, "created_at": now}
+        for uid, inv, val, p in zip(
+            result["user_id"].tolist(), result["invested_paise"].tolist(), result["value_paise"].tolist(), pnl.tolist()
+        )
+    ])
+
+
+def revalue_portfolios(as_of: date = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, int]:
+    """
+    Write portfolio_snapshots for every user with executed orders. Must be called inside an app context.
+
+    Returns:
+        dict: users, invested_paise, value_paise, chunks
+    """
+    as_of = as_of or date.today()
+    now = datetime.utcnow()
+    store = get_price_store()
+    product_types = [p for (p,) in db.session.query(InvestmentOrder.product_type).distinct()]
+    prices = {p: store.price_on(scheme_for(p), as_of) for p in product_types}
+    print(f"[PRICES] {as_of.isoformat()}: " + ", ".join(f"{p}={v}" for p, v in sorted(prices.items())))
+
+    totals = {"users": 0, "invested_paise": 0, "value_paise": 0, "chunks": 0}
+    after = 0
+    while True:
+        ids = [uid for (uid,) in db.session.query(User.id).filter(User.id > after).order_by(User.id).limit(chunk_size)]
+        if not ids:
+            break
+        lo, hi = ids[0], ids[-1]
+        after = hi
+        orders, redemptions = _chunk_aggregates(lo, hi)
+        result = revalue_chunk(orders, redemptions, prices)
+        _write_snapshots(result, lo, hi, as_of, now)
+        db.session.commit()
+        totals["users"] += int(result["user_id"].size)
+        totals["invested_paise"] += int(result["invested_paise"].sum())
+        totals["value_paise"] += int(result["value_paise"].sum())
+        totals["chunks"] += 1
+        print(f"[CHUNK] users<= {hi}: {result['user_id'].size} valued")
+    return totals
+
+
+if __name__ == "__main__":
+    import argparse
+    from backend.app import create_app
+
+    parser = argparse.ArgumentParser(description="Revalue every portfolio and write portfolio_snapshots")
+    parser.add_argument("--as-of", type=date.fromisoformat, default=None, help="Price day (YYYY-MM-DD), default today")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Portfolio Revaluation Job")
+    print("=" * 60)
+
+    try:
+        started = datetime.utcnow()
+        with create_app().app_context():
+            result = revalue_portfolios(args.as_of, max(1, args.chunk_size))
+        elapsed = (datetime.utcnow() - started).total_seconds()
+        print(
+            f"\n[REVALUE END] {result['users']} users, AUM ₹{result['value_paise'] / 100:.2f} "
+            f"(invested ₹{result['invested_paise'] / 100:.2f}) in {elapsed:.1f}s"
+        )
+    except Exception as e:
+        print(f"\n[CRITICAL ERROR] Job failed: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
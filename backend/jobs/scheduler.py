@@ -0,0 +1,247 @@
+"""
+Long-running scheduler daemon for UPI AutoPay mandate debits.
+
+This process:
+1. Loads the due time of every active mandate due within the horizon into a
+   min-heap (one (due_at, mandate_id) entry each)
+2. Sleeps until the earliest due time, then fires the mandates that are due
+   through mandate_debits.process_mandates (same claim/lease, notice and
+   rate-limited debit path as the batch job)
+3. Fires at most MAX_PER_TICK mandates per tick, so a crowd of mandates due
+   at the same instant (e.g. midnight start dates) is spread over the
+   following seconds instead of hitting the provider as one burst
+4. Polls mandates.updated_at every REFRESH_INTERVAL and re-times only the
+   rows that changed (created, paused, rescheduled, notified, debited);
+   a full reload every RELOAD_INTERVAL is the safety net
+
+A mandate that has had its 24h notice is due again once that notice is 24
+hours old; one leased by another worker is due again when the lease ends.
+Replaces the 6-hourly cron as the primary trigger, so debits land within a
+tick of next_debit_at. Run it on every replica for availability: only the
+holder of the debit_scheduler lease ticks, the rest stand by and take over
+when its lease lapses. The cron job can keep running as a catch-up sweep:
+both claim mandates with leases, so nothing is debited twice.
+
+Run: python -m backend.jobs.scheduler
+"""
+
+import sys
+import os
+import heapq
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from backend.extensions import db
+from backend.models.mandate import Mandate
+from backend.jobs.mandate_debits import process_mandates
+from backend.services.job_lease_service import JobLeaseHolder
+from backend.app import create_app
+
+NOTICE_PERIOD = timedelta(hours=24)
+# Only mandates due this far ahead are kept in memory; reloads pull in the next ones.
+HORIZON = timedelta(hours=24)
+TICK = timedelta(seconds=1)
+MAX_PER_TICK = 100
+REFRESH_INTERVAL = timedelta(seconds=30)
+# Re-read a little before the last watermark: a transaction can commit after a later poll started.
+REFRESH_OVERLAP = timedelta(minutes=5)
+RELOAD_INTERVAL = timedelta(hours=1)
+# Leader lease: a standby takes over within this long of the leader dying.
+SCHEDULER_JOB_NAME = "debit_scheduler"
+SCHEDULER_LEASE = timedelta(seconds=30)
+
+
+def due_time(status: str, next_debit_at: Optional[datetime], notice_sent_at: Optional[datetime],
+             lease_until: Optional[datetime], now: datetime) -> Optional[datetime]:
+    """When the scheduler should next fire a mandate, or None if it has nothing due."""
+    if status != "active" or next_debit_at is None:
+        return None
+    due = next_debit_at
+    if notice_sent_at is not None:
+        due = max(due, notice_sent_at + NOTICE_PERIOD)
+    if lease_until is not None and lease_until > now:
+        due = max(due, lease_until)
+    return due
+
+
+class DebitScheduler:
+    """
+    In-memory timers for due mandates, kept in a heap with lazy deletion.
+
+    ``_due`` holds each mandate's current due time; heap entries that no
+    longer match it are stale and dropped when they reach the top, so
+    re-timing a mandate is O(log n) and never scans the heap.
+    """
+
+    def __init__(self, fire: Callable[[List[int], datetime], int] = process_mandates,
+                 max_per_tick: int = MAX_PER_TICK, clock: Callable[[], datetime] = datetime.utcnow):
+        self._fire = fire
+        self.max_per_tick = max_per_tick
+        self._clock = clock
+        self._heap: List[Tuple[datetime, int]] = []
+        self._due: Dict[int, datetime] = {}
+        self._watermark: Optional[datetime] = None
+        self._next_refresh: Optional[datetime] = None
+        self._next_reload: Optional[datetime] = None
+
+    def __len__(self):
+        return len(self._due)
+
+    def schedule(self, mandate_id: int, due_at: Optional[datetime]) -> None:
+        """Set (or clear, with None) the due time of one mandate."""
+        if due_at is None:
+            self._due.pop(mandate_id, None)
+            return
+        if self._due.get(mandate_id) == due_at:
+            return
+        self._due[mandate_id] = due_at
+        heapq.heappush(self._heap, (due_at, mandate_id))
+
+    def next_due(self) -> Optional[datetime]:
+        while self._heap and self._due.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: datetime, limit: int) -> List[int]:
+        """Take up to ``limit`` mandates due at ``now``, earliest first."""
+        ids = []
+        while len(ids) < limit:
+            due = self.next_due()
+            if due is None or due > now:
+                break
+            _, mandate_id = heapq.heappop(self._heap)
+            del self._due[mandate_id]
+            ids.append(mandate_id)
+        return ids
+
+    def _apply(self, rows: Iterable[tuple], now: datetime) -> int:
+        count = 0
+        for mandate_id, status, next_debit_at, notice_sent_at, lease_until in rows:
+            due = due_time(status, next_debit_at, notice_sent_at, lease_until, now)
+            self.schedule(mandate_id, due if due is not None and next_debit_at <= now + HORIZON else None)
+            count += 1
+        return count
+
+    def _query(self):
+        return db.session.query(
+            Mandate.id, Mandate.status, Mandate.next_debit_at,
+            Mandate.pre_debit_notification_sent_at, Mandate.lease_until,
+        )
+
+    def load(self, now: Optional[datetime] = None) -> int:
+        """Rebuild every timer from the mandates table; returns the number scheduled."""
+        now = now or self._clock()
+        rows = self._query().filter(
+            Mandate.status == "active", Mandate.next_debit_at <= now + HORIZON
+        ).yield_per(1000)
+        self._heap, self._due = [], {}
+        self._apply(rows, now)
+        db.session.rollback()
+        heapq.heapify(self._heap)
+        self._watermark = now
+        self._next_refresh = now + REFRESH_INTERVAL
+        self._next_reload = now + RELOAD_INTERVAL
+        print(f"[SCHEDULER] Loaded {len(self)} mandates due before {now + HORIZON}")
+        return len(self)
+
+    def refresh(self, now: Optional[datetime] = None) -> int:
+        """Re-time the mandates changed since the last poll; returns how many rows were read."""
+        now = now or self._clock()
+        if self._watermark is None:
+            return self.load(now)
+        rows = self._query().filter(Mandate.updated_at >= self._watermark - REFRESH_OVERLAP).all()
+        db.session.rollback()
+        self._watermark = now
+        self._next_refresh = now + REFRESH_INTERVAL
+        return self._apply(rows, now)
+
+    def _reschedule(self, mandate_ids: List[int], now: datetime) -> None:
+        # Fired mandates that were waiting (notice under 24h, leased elsewhere) are not
+        # necessarily updated, so read them back rather than waiting for a refresh.
+        rows = self._query().filter(Mandate.id.in_(mandate_ids)).all()
+        db.session.rollback()
+        self._apply(rows, now)
+
+    def tick(self, now: Optional[datetime] = None) -> int:
+        """Refresh if it is time, then fire up to max_per_tick due mandates; returns how many were fired."""
+        now = now or self._clock()
+        if self._next_reload is None or now >= self._next_reload:
+            self.load(now)
+        elif now >= self._next_refresh:
+            self.refresh(now)
+        mandate_ids = self.pop_due(now, self.max_per_tick)
+        if not mandate_ids:
+            return 0
+        processed = self._fire(mandate_ids, now)
+        print(f"[SCHEDULER] Fired {len(mandate_ids)} due mandates, {processed} processed")
+        self._reschedule(mandate_ids, now)
+        return len(mandate_ids)
+
+    def seconds_until_next(self, now: Optional[datetime] = None) -> float:
+        """How long to sleep before the next tick has work (due mandate, refresh or reload)."""
+        now = now or self._clock()
+        wake = [self._next_refresh, self._next_reload]
+        due = self.next_due()
+        if due is not None:
+            wake.append(max(due, now + TICK) if due <= now else due)
+        return max(0.0, (min(w for w in wake if w is not None) - now).total_seconds())
+
+    def run(self, stop: Optional[threading.Event] = None, lease: Optional[JobLeaseHolder] = None) -> None:
+        """
+        Tick until ``stop`` is set; must run in an app context.
+
+        With a ``lease``, only ticks while this process leads: a standby
+        retries every third of the lease TTL and reloads from the table when
+        it takes over, so the timers never go stale across a failover.
+        """
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            if lease is not None and not lease.hold():
+                self._next_reload = None
+                stop.wait((lease.ttl / 3).total_seconds())
+                continue
+            self.tick()
+            wait = self.seconds_until_next()
+            if lease is not None:
+                wait = min(wait, (lease.ttl / 3).total_seconds())
+            stop.wait(wait)
+        if lease is not None:
+            lease.release()
+
+
+def run_scheduler(stop: Optional[threading.Event] = None, max_per_tick: int = MAX_PER_TICK) -> None:
+    app = create_app()
+
+    with app.app_context():
+        print(f"\n[SCHEDULER START] Firing up to {max_per_tick} mandates per {TICK.total_seconds():g}s tick")
+        DebitScheduler(max_per_tick=max_per_tick).run(stop, JobLeaseHolder(SCHEDULER_JOB_NAME, SCHEDULER_LEASE))
+        print("\n[SCHEDULER END] Stopped")
+
+
+if __name__ == "__main__":
+    import argparse
+    import signal
+
+    parser = argparse.ArgumentParser(description="Run the mandate debit scheduler daemon")
+    parser.add_argument("--max-per-tick", type=int, default=MAX_PER_TICK)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("UPI AutoPay Mandate Debit Scheduler")
+    print("=" * 60)
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+
+    try:
+        run_scheduler(stop, args.max_per_tick)
+    except Exception as e:
+        print(f"\n[CRITICAL ERROR] Scheduler failed: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,280 @@
+"""
+Fleet-wide sweep job: invest every due user's pending roundups.
+
+This job:
+1. Walks users with a positive pending balance in user_id order, one chunk
+   at a time (keyset on user_balances.user_id). Each chunk is claimed with a
+   lease (FOR UPDATE SKIP LOCKED on PostgreSQL), so several replicas can run
+   the job at once and each sweeps a disjoint set of users
+2. Drops users whose investing is paused or whose last sweep is more recent
+   than their sweep_frequency allows
+3. Reserves the chunk's pending roundups with one UPDATE ... RETURNING and
+   totals the rows it got per user
+4. Inserts one InvestmentOrder per user in a single multi-row INSERT, links
+   the reserved roundups to them, decrements the users' pending balances
+   and adds claimed order_outbox entries, and commits all of it before any
+   provider is called
+5. Dispatches the chunk's outbox entries as one omnibus order per scheme,
+   splitting the allotted units back to the per-user orders: executed
+   orders invest their roundups (holdings, ledger) with set-based writes,
+   failed ones hand them back to pending, accepted ones are left to the
+   reconciler
+6. Writes sweep_executed events for the executed orders
+
+A crash after step 4 leaves nothing to redo: the outbox worker sends the
+chunk once its lease expires, so no order is placed without its roundups
+being reserved, nor its roundups swept again.
+
+Schedule: Nightly
+Cron: 0 1 * * * cd /path/to/Arcon && python -m backend.jobs.sweep
+"""
+
+import sys
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from sqlalchemy import bindparam, case, insert, update
+
+from backend.extensions import db
+from backend.models.cap_setting import CapSetting
+from backend.models.event import EventLog
+from backend.models.investment import InvestmentOrder
+from backend.models.roundup import Roundup
+from backend.models.user import User
+from backend.models.user_balance import UserBalance
+from backend.services.order_outbox_service import dispatch_claimed, enqueue_orders
+from backend.services.sql_helpers import claim_batch, release_claims
+
+DEFAULT_CHUNK_SIZE = 1000
+# Roundup ids per UPDATE ... WHERE id IN (...), well under SQLite's bound-parameter limit.
+ID_BATCH_SIZE = 5000
+SWEEP_INTERVALS = {"daily": timedelta(days=1), "weekly": timedelta(days=7)}
+# A nightly run that starts a few minutes earlier than yesterday's must not skip a day.
+SWEEP_INTERVAL_SLACK = timedelta(hours=1)
+# How long a worker owns a claimed chunk of users; a crashed worker's chunk is free again after this.
+SWEEP_LEASE = timedelta(minutes=15)
+
+
+def _claim_chunk(after_user_id: int, chunk_size: int, now: datetime):
+    return claim_batch(
+        UserBalance,
+        UserBalance.user_id,
+        [UserBalance.user_id > after_user_id, UserBalance.pending_paise > 0],
+        UserBalance.user_id,
+        chunk_size,
+        SWEEP_LEASE,
+        now,
+    )
+
+
+def _due_users(user_ids: List[int], now: datetime) -> List[int]:
+    """Subset of ``user_ids`` that is not paused and whose sweep interval has elapsed."""
+    paused = {
+        uid for (uid,) in
+        db.session.query(CapSetting.user_id)
+        .filter(CapSetting.user_id.in_(user_ids), CapSetting.investing_paused.is_(True))
+    }
+    frequency = dict(db.session.query(User.id, User.sweep_frequency).filter(User.id.in_(user_ids)))
+    last_sweep = dict(
+        db.session.query(EventLog.user_id, db.func.max(EventLog.created_at))
+        .filter(EventLog.user_id.in_(user_ids), EventLog.event_type == "sweep_executed")
+        .group_by(EventLog.user_id)
+    )
+    due = []
+    for uid in user_ids:
+        if uid in paused:
+            continue
+        interval = SWEEP_INTERVALS.get((frequency.get(uid) or "daily").lower(), SWEEP_INTERVALS["daily"])
+        last = last_sweep.get(uid)
+        if last is None or now - last >= interval - SWEEP_INTERVAL_SLACK:
+            due.append(uid)
+    return due
+
+
+def _reserve_pending(user_ids: List[int]) -> Dict[int, List[tuple]]:
+    """
+    Flip the users' pending roundups to reserved; returns user_id -> [(roundup id, paise)].
+
+    One UPDATE ... RETURNING, so the order amounts are built from exactly the
+    rows this sweep took: a roundup that a concurrent execute request reserved
+    first is neither invested twice nor taken off the balance twice.
+    """
+    reserved: Dict[int, List[tuple]] = defaultdict(list)
+    for rid, uid, amount in db.session.execute(
+        update(Roundup)
+        .where(Roundup.user_id.in_(user_ids), Roundup.status == "pending")
+        .values(status="reserved")
+        .returning(Roundup.id, Roundup.user_id, Roundup.amount_paise),
+        execution_options={"synchronize_session": False},
+    ):
+        reserved[uid].append((rid, amount))
+    return reserved
+
+
+def _release_reserved(roundup_ids: List[int]) -> None:
+    """Hand reserved roundups that no order was placed for back to pending."""
+    for start in range(0, len(roundup_ids), ID_BATCH_SIZE):
+        db.session.execute(
+            update(Roundup)
+            .where(Roundup.id.in_(roundup_ids[start:start + ID_BATCH_SIZE]), Roundup.status == "reserved")
+            .values(status="pending"),
+            execution_options={"synchronize_session": False},
+        )
+
+
+def _link_reserved(roundup_ids_by_user: Dict[int, List[int]], order_by_user: Dict[int, int]) -> int:
+    """Link reserved roundups to their user's order, in batches of ids; returns the rows changed."""
+    changed = 0
+    batch: List[int] = []
+    batch_orders: Dict[int, int] = {}
+
+    def flush():
+        nonlocal changed
+        if not batch:
+            return
+        changed += db.session.execute(
+            update(Roundup)
+            .where(Roundup.id.in_(batch), Roundup.status == "reserved")
+            .values(investment_id=case(batch_orders, value=Roundup.user_id)),
+            execution_options={"synchronize_session": False},
+        ).rowcount
+        batch.clear()
+        batch_orders.clear()
+
+    for uid, ids in roundup_ids_by_user.items():
+        if len(batch) + len(ids) > ID_BATCH_SIZE:
+            flush()
+        batch.extend(ids)
+        batch_orders[uid] = order_by_user[uid]
+    flush()
+    return changed
+
+
+def sweep_chunk(user_ids: List[int], now: datetime) -> Dict[str, int]:
+    """
+    Sweep one chunk of candidate users.
+
+    The orders, their reserved roundups, the balance decrements and the
+    outbox entries commit first; the providers are called only afterwards,
+    from the outbox, so no transaction is held across the network call.
+    """
+    stats = {"users": 0, "executed": 0, "failed": 0, "amount_paise": 0, "roundups": 0}
+    due = _due_users(user_ids, now)
+    if not due:
+        return stats
+
+    reserved = _reserve_pending(due)
+    roundup_ids = {uid: [rid for rid, _ in rows] for uid, rows in reserved.items()}
+    totals = {uid: sum(amount for _, amount in rows) for uid, rows in reserved.items()}
+
+    orders = [
+        {"user_id": uid, "product_type": "mf", "amount_paise": totals[uid], "status": "pending", "created_at": now}
+        for uid in due if totals.get(uid, 0) > 0
+    ]
+    empty_ids = [rid for uid, total in totals.items() if total <= 0 for rid in roundup_ids[uid]]
+    if empty_ids:
+        _release_reserved(empty_ids)
+    if not orders:
+        return stats
+    order_ids = db.session.scalars(
+        insert(InvestmentOrder).returning(InvestmentOrder.id, sort_by_parameter_order=True), orders
+    ).all()
+    order_by_user = {o["user_id"]: oid for o, oid in zip(orders, order_ids)}
+    _link_reserved({uid: roundup_ids[uid] for uid in order_by_user}, order_by_user)
+    db.session.execute(
+        update(UserBalance.__table__)
+        .where(UserBalance.__table__.c.user_id == bindparam("uid"))
+        .values(
+            pending_paise=UserBalance.__table__.c.pending_paise - bindparam("paise"),
+            pending_count=UserBalance.__table__.c.pending_count - bindparam("count"),
+            version=UserBalance.__table__.c.version + 1,
+            updated_at=now,
+        ),
+        [{"uid": o["user_id"], "paise": o["amount_paise"], "count": len(roundup_ids[o["user_id"]])} for o in orders],
+    )
+    token = enqueue_orders(order_ids, claim=True)
+    db.session.commit()
+
+    try:
+        dispatch_claimed(token)
+    except Exception as e:
+        # Committed and still claimed: the outbox worker sends them once the lease expires.
+        db.session.rollback()
+        print(f"[SWEEP] Dispatch of {len(order_ids)} orders failed, left to the outbox worker: {e}")
+
+    status_of = dict(db.session.query(InvestmentOrder.id, InvestmentOrder.status).filter(InvestmentOrder.id.in_(order_ids)))
+    executed = [o for o in orders if status_of.get(order_by_user[o["user_id"]]) == "executed"]
+    stats["users"] = len(orders)
+    stats["executed"] = len(executed)
+    stats["failed"] = sum(1 for status in status_of.values() if status == "failed")
+    stats["roundups"] = sum(len(roundup_ids[o["user_id"]]) for o in executed)
+    stats["amount_paise"] = sum(o["amount_paise"] for o in executed)
+    if executed:
+        db.session.execute(insert(EventLog), [
+            {
+                "user_id": o["user_id"], "event_type": "sweep_executed",
+                "message": f"Executed sweep order {order_by_user[o['user_id']]}",
+                "amount_paise": o["amount_paise"], "created_at": now,
+            }
+            for o in executed
+        ])
+    db.session.commit()
+    return stats
+
+
+def run_sweep(chunk_size: int = DEFAULT_CHUNK_SIZE, now: datetime = None) -> Dict[str, int]:
+    """
+    Sweep all due users not claimed by another worker. Must be called inside an app context.
+
+    Returns:
+        dict: totals of users, executed, failed, amount_paise, roundups, chunks
+    """
+    now = now or datetime.utcnow()
+    totals = {"users": 0, "executed": 0, "failed": 0, "amount_paise": 0, "roundups": 0, "chunks": 0}
+    after = 0
+    while True:
+        token, user_ids = _claim_chunk(after, chunk_size, now)
+        if not user_ids:
+            break
+        after = user_ids[-1]
+        stats = sweep_chunk(user_ids, now)
+        release_claims(UserBalance, UserBalance.user_id, user_ids, token)
+        db.session.commit()
+        for key, value in stats.items():
+            totals[key] += value
+        totals["chunks"] += 1
+        print(f"[CHUNK] users<= {after}: {stats['executed']} executed, {stats['failed']} failed, ₹{stats['amount_paise'] / 100:.2f}")
+    return totals
+
+
+if __name__ == "__main__":
+    import argparse
+    from backend.app import create_app
+
+    parser = argparse.ArgumentParser(description="Sweep pending roundups for all due users")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Fleet Sweep Job")
+    print("=" * 60)
+
+    try:
+        started = datetime.utcnow()
+        with create_app().app_context():
+            result = run_sweep(max(1, args.chunk_size))
+        elapsed = (datetime.utcnow() - started).total_seconds()
+        print(
+            f"\n[SWEEP END] {result['executed']} orders executed, {result['failed']} failed, "
+            f"{result['roundups']} roundups, ₹{result['amount_paise'] / 100:.2f} in {elapsed:.1f}s"
+        )
+    except Exception as e:
+        print(f"\n[CRITICAL ERROR] Job failed: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,62 @@
+"""
+Database migration to add the per-product holdings projection.
+
+Adds table holdings: one row per (user, product) with the executed order
+total, the redeemed total and the net units held, maintained in the same
+transaction as every order execution and redemption. Redeem checks and
+decrements the row with one conditional UPDATE instead of summing orders
+and redemptions.
+
+The table is also created by db.create_all() on app start; run the backfill
+below once on existing data (or python -m backend.jobs.check_user_balances).
+"""
+
+# Manual SQL for SQLite/PostgreSQL:
+
+CREATE_HOLDINGS_SQL = """
+CREATE TABLE IF NOT EXISTS holdings (
+    user_id INTEGER NOT NULL REFERENCES users (id),
+    product_type VARCHAR(20) NOT NULL,
+    invested_paise BIGINT NOT NULL DEFAULT 0,
+    redeemed_paise BIGINT NOT NULL DEFAULT 0,
+    units_micro BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP,
+    PRIMARY KEY (user_id, product_type)
+);
+"""
+
+BACKFILL_HOLDINGS_SQL = """
+INSERT INTO holdings (user_id, product_type, invested_paise, redeemed_paise, units_micro, updated_at)
+SELECT o.user_id, o.product_type, o.invested, COALESCE(r.redeemed, 0),
+       CASE WHEN o.units > COALESCE(r.units, 0) THEN o.units - COALESCE(r.units, 0) ELSE 0 END,
+       CURRENT_TIMESTAMP
+FROM (
+    SELECT user_id, product_type, SUM(amount_paise) AS invested, COALESCE(SUM(units_micro), 0) AS units
+    FROM investment_orders WHERE status = 'executed' GROUP BY user_id, product_type
+) o
+LEFT JOIN (
+    SELECT user_id, product_type, SUM(amount_paise) AS redeemed, COALESCE(SUM(units_micro), 0) AS units
+    FROM redemptions WHERE status = 'executed' GROUP BY user_id, product_type
+) r ON r.user_id = o.user_id AND r.product_type = o.product_type;
+"""
+
+# If using Flask-Migrate, this would be in a migration file:
+# migrations/versions/xxx_add_holdings.py
+
+def upgrade():
+    """Create holdings and backfill it from executed orders and redemptions."""
+    op.create_table(
+        'holdings',
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), primary_key=True),
+        sa.Column('product_type', sa.String(20), primary_key=True),
+        sa.Column('invested_paise', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('redeemed_paise', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('units_micro', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+    )
+    op.execute(BACKFILL_HOLDINGS_SQL)
+
+
+def downgrade():
+    """Drop holdings."""
+    op.drop_table('holdings')
@@ -0,0 +1,46 @@
+"""
+Database migration to add composite indexes for the hot per-user queries.
+
+Every frequent query filters on user_id plus a status or time column (or,
+for the debit job, on mandate status plus next_debit_at). Without these the
+planner falls back to the single-column user_id FK scan or a full table
+scan followed by a sort. Time-ordered indexes end in id so keyset
+pagination on (time, id) is a pure index range scan.
+
+The indexes are declared in the models' __table_args__, so db.create_all()
+creates them on fresh databases; run this on existing ones.
+"""
+
+# Manual SQL for SQLite/PostgreSQL:
+
+INDEXES = [
+    ("ix_roundups_user_status_created", "roundups", ["user_id", "status", "created_at", "id"]),
+    ("ix_roundups_user_created", "roundups", ["user_id", "created_at", "id"]),
+    ("ix_transactions_user_timestamp", "transactions", ["user_id", "timestamp", "id"]),
+    ("ix_investment_orders_user_status_product", "investment_orders", ["user_id", "status", "product_type"]),
+    ("ix_investment_orders_user_created", "investment_orders", ["user_id", "created_at", "id"]),
+    ("ix_ledger_entries_user_timestamp", "ledger_entries", ["user_id", "timestamp", "id"]),
+    ("ix_event_logs_user_type_created", "event_logs", ["user_id", "event_type", "created_at"]),
+    ("ix_mandates_status_next_debit", "mandates", ["status", "next_debit_at"]),
+    ("ix_redemptions_user_created", "redemptions", ["user_id", "created_at", "id"]),
+]
+
+CREATE_HOT_QUERY_INDEXES_SQL = "\n".join(
+    f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(cols)});"
+    for name, table, cols in INDEXES
+)
+
+# If using Flask-Migrate, this would be in a migration file:
+# migrations/versions/xxx_add_hot_query_indexes.py
+# On a live PostgreSQL database prefer CREATE INDEX CONCURRENTLY outside a transaction.
+
+def upgrade():
+    """Create the composite indexes."""
+    for name, table, cols in INDEXES:
+        op.create_index(name, table, cols)
+
+
+def downgrade():
+    """Drop the composite indexes."""
+    for name, table, _ in INDEXES:
+        op.drop_index(name, table_name=table)
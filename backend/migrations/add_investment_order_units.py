@@ -0,0 +1,26 @@
+"""
+Database migration to record allotted units on investment orders.
+
+Adds column:
+- units_micro: units allotted to the order x 1e6 (BIGINT, nullable). Filled
+  when an omnibus order is split back to its per-user orders; NULL for
+  orders placed one by one, where the provider reports no units.
+"""
+
+# Manual SQL for SQLite/PostgreSQL:
+
+ADD_UNITS_MICRO_SQL = """
+ALTER TABLE investment_orders ADD COLUMN units_micro BIGINT;
+"""
+
+# If using Flask-Migrate, this would be in a migration file:
+# migrations/versions/xxx_add_investment_order_units.py
+
+def upgrade():
+    """Add units_micro to investment_orders."""
+    op.add_column('investment_orders', sa.Column('units_micro', sa.BigInteger(), nullable=True))
+
+
+def downgrade():
+    """Remove units_micro from investment_orders."""
+    op.drop_column('investment_orders', 'units_micro')
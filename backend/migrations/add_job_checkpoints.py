@@ -0,0 +1,41 @@
+"""
+Database migration to add job checkpoints.
+
+Adds table job_checkpoints: one row per chunked job with its current run's
+start time, status and the last key committed. The mandate debit job updates
+it in the same commit as each batch, and an interrupted run resumes after
+last_key instead of rescanning from the start.
+"""
+
+# Manual SQL for SQLite/PostgreSQL:
+
+CREATE_JOB_CHECKPOINTS_SQL = """
+CREATE TABLE IF NOT EXISTS job_checkpoints (
+    job_name VARCHAR(64) PRIMARY KEY,
+    status VARCHAR(20) NOT NULL DEFAULT 'running',
+    run_started_at TIMESTAMP NOT NULL,
+    last_key BIGINT NOT NULL DEFAULT 0,
+    processed INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP
+);
+"""
+
+# If using Flask-Migrate, this would be in a migration file:
+# migrations/versions/xxx_add_job_checkpoints.py
+
+def upgrade():
+    """Create job_checkpoints."""
+    op.create_table(
+        'job_checkpoints',
+        sa.Column('job_name', sa.String(64), primary_key=True),
+        sa.Column('status', sa.String(20), nullable=False, server_default='running'),
+        sa.Column('run_started_at', sa.DateTime(), nullable=False),
+        sa.Column('last_key', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('processed', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+    )
+
+
+def downgrade():
+    """Drop job_checkpoints."""
+    op.drop_table('job_checkpoints')
@@ -0,0 +1,42 @@
+"""
+Database migration to add job_leases for leader election across replicas.
+
+Creates table:
+- job_leases: one row per job (or job partition) with the owner token of
+  the worker that leads it, when that lease expires, and its last heartbeat.
+
+On PostgreSQL leadership is decided by a session advisory lock and the row
+only records the holder; elsewhere the conditional UPDATE on this row is
+the lease itself.
+"""
+
+# Manual SQL for SQLite/PostgreSQL:
+
+CREATE_JOB_LEASES_SQL = """
+CREATE TABLE job_leases (
+    name VARCHAR(64) PRIMARY KEY,
+    owner VARCHAR(32),
+    lease_until TIMESTAMP,
+    acquired_at TIMESTAMP,
+    heartbeat_at TIMESTAMP
+);
+"""
+
+# If using Flask-Migrate, this would be in a migration file:
+# migrations/versions/xxx_add_job_leases.py
+
+def upgrade():
+    """Create job_leases."""
+    op.create_table(
+        'job_leases',
+        sa.Column('name', sa.String(64), primary_key=True),
+        sa.Column('owner', sa.String(32), nullable=True),
+        sa.Column('lease_until', sa.DateTime(), nullable=True),
+        sa.Column('acquired_at', sa.DateTime(), nullable=True),
+        sa.Column('heartbeat_at', sa.DateTime(), nullable=True),
+    )
+
+
+def downgrade():
+    """Drop job_leases."""
+    op.drop_table('job_leases')
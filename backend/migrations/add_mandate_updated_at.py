@@ -0,0 +1,32 @@
+"""
+Database migration to add a change timestamp to mandates.
+
+Adds column:
+- updated_at: set on insert and bumped by every UPDATE of the row (status
+  changes, reschedules, notices, debits, leases). The debit scheduler daemon
+  polls it to refresh its in-memory timers incrementally instead of
+  rescanning every mandate. Existing rows are backfilled from created_at.
+"""
+
+# Manual SQL for SQLite/PostgreSQL:
+
+ADD_UPDATED_AT_SQL = """
+ALTER TABLE mandates ADD COLUMN updated_at TIMESTAMP;
+UPDATE mandates SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP);
+CREATE INDEX ix_mandates_updated_at ON mandates (updated_at);
+"""
+
+# If using Flask-Migrate, this would be in a migration file:
+# migrations/versions/xxx_add_mandate_updated_at.py
+
+def upgrade():
+    """Add updated_at to mandates, backfilled from created_at."""
+    op.add_column('mandates', sa.Column('updated_at', sa.DateTime(), nullable=True))
+    op.execute("UPDATE mandates SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP)")
+    op.create_index('ix_mandates_updated_at', 'mandates', ['updated_at'])
+
+
+def downgrade():
+    """Remove updated_at from mandates."""
+    op.drop_index('ix_mandates_updated_at', table_name='mandates')
+    op.drop_column('mandates', 'updated_at')
@@ -0,0 +1,58 @@
+"""
+Database migration to add the investment order outbox.
+
+Adds table order_outbox: one row per InvestmentOrder, written in the same
+commit as the order, holding its dispatch state (queued|sent|done), retry
+bookkeeping and the claim token/lease used by outbox workers.
+
+Roundups gain a "reserved" status (no schema change): they are moved onto
+the order when it is created and become "invested" or "pending" again once
+the provider outcome is known.
+"""
+
+# Manual SQL for SQLite/PostgreSQL:
+
+CREATE_ORDER_OUTBOX_SQL = """
+CREATE TABLE IF NOT EXISTS order_outbox (
+    id INTEGER PRIMARY KEY,
+    order_id INTEGER NOT NULL UNIQUE REFERENCES investment_orders (id),
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at TIMESTAMP,
+    claim_token VARCHAR(32),
+    locked_until TIMESTAMP,
+    last_error VARCHAR(255),
+    created_at TIMESTAMP,
+    updated_at TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS ix_order_outbox_status_next_attempt ON order_outbox (status, next_attempt_at);
+CREATE INDEX IF NOT EXISTS ix_order_outbox_claim_token ON order_outbox (claim_token);
+"""
+
+# If using Flask-Migrate, this would be in a migration file:
+# migrations/versions/xxx_add_order_outbox.py
+
+def upgrade():
+    """Create order_outbox."""
+    op.create_table(
+        'order_outbox',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('order_id', sa.Integer(), sa.ForeignKey('investment_orders.id'), nullable=False, unique=True),
+        sa.Column('status', sa.String(20), nullable=False, server_default='queued'),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('next_attempt_at', sa.DateTime(), nullable=True),
+        sa.Column('claim_token', sa.String(32), nullable=True),
+        sa.Column('locked_until', sa.DateTime(), nullable=True),
+        sa.Column('last_error', sa.String(255), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+    )
+    op.create_index('ix_order_outbox_status_next_attempt', 'order_outbox', ['status', 'next_attempt_at'])
+    op.create_index('ix_order_outbox_claim_token', 'order_outbox', ['claim_token'])
+
+
+def downgrade():
+    """Drop order_outbox."""
+    op.drop_index('ix_order_outbox_claim_token', table_name='order_outbox')
+    op.drop_index('ix_order_outbox_status_next_attempt', table_name='order_outbox')
+    op.drop_table('order_outbox')
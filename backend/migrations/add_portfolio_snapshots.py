@@ -0,0 +1,48 @@
+"""
+Database migration to add portfolio snapshots.
+
+Adds table portfolio_snapshots: one row per (price day, user) with the
+invested amount, current value and PnL computed by the batch revaluation job
+(python -m backend.jobs.revalue_portfolios). AUM reports sum a single as_of
+day; per-user history reads use (user_id, as_of).
+"""
+
+# Manual SQL for SQLite/PostgreSQL:
+
+CREATE_PORTFOLIO_SNAPSHOTS_SQL = """
+CREATE TABLE IF NOT EXISTS portfolio_snapshots (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users (id),
+    as_of DATE NOT NULL,
+    invested_paise BIGINT NOT NULL DEFAULT 0,
+    value_paise BIGINT NOT NULL DEFAULT 0,
+    pnl_paise BIGINT NOT NULL DEFAULT 0,
+    created_at TIMESTAMP,
+    CONSTRAINT uq_portfolio_snapshots_as_of_user UNIQUE (as_of, user_id)
+);
+CREATE INDEX IF NOT EXISTS ix_portfolio_snapshots_user_as_of ON portfolio_snapshots (user_id, as_of);
+"""
+
+# If using Flask-Migrate, this would be in a migration file:
+# migrations/versions/xxx_add_portfolio_snapshots.py
+
+def upgrade():
+    """Create portfolio_snapshots."""
+    op.create_table(
+        'portfolio_snapshots',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('as_of', sa.Date(), nullable=False),
+        sa.Column('invested_paise', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('value_paise', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('pnl_paise', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.UniqueConstraint('as_of', 'user_id', name='uq_portfolio_snapshots_as_of_user'),
+    )
+    op.create_index('ix_portfolio_snapshots_user_as_of', 'portfolio_snapshots', ['user_id', 'as_of'])
+
+
+def downgrade():
+    """Drop portfolio_snapshots."""
+    op.drop_index('ix_portfolio_snapshots_user_as_of', table_name='portfolio_snapshots')
+    op.drop_table('portfolio_snapshots')
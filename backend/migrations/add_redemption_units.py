@@ -0,0 +1,25 @@
+"""
+Database migration to record units on redemptions.
+
+Adds column:
+- units_micro: units sold x 1e6 (BIGINT, nullable), at the latest stored
+  price when the redemption was made; NULL when no price was loaded yet.
+"""
+
+# Manual SQL for SQLite/PostgreSQL:
+
+ADD_UNITS_MICRO_SQL = """
+ALTER TABLE redemptions ADD COLUMN units_micro BIGINT;
+"""
+
+# If using Flask-Migrate, this would be in a migration file:
+# migrations/versions/xxx_add_redemption_units.py
+
+def upgrade():
+    """Add units_micro to redemptions."""
+    op.add_column('redemptions', sa.Column('units_micro', sa.BigInteger(), nullable=True))
+
+
+def downgrade():
+    """Remove units_micro from redemptions."""
+    op.drop_column('redemptions', 'units_micro')
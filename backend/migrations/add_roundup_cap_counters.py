@@ -0,0 +1,46 @@
+"""
+Database migration to add per-user roundup cap counters.
+
+Adds table roundup_cap_counters: one row per (user, UTC day) and per
+(user, UTC month) holding the running total of roundups created in that
+period, so daily/monthly cap checks no longer SUM the roundups table.
+
+The table is also created by db.create_all() on app start. Existing users
+need no backfill: a missing counter row is seeded from a SUM over that one
+period the first time it is needed.
+"""
+
+# Manual SQL for SQLite/PostgreSQL:
+
+CREATE_ROUNDUP_CAP_COUNTERS_SQL = """
+CREATE TABLE IF NOT EXISTS roundup_cap_counters (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users (id),
+    period_type VARCHAR(10) NOT NULL,
+    period_start DATE NOT NULL,
+    amount_paise INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP,
+    CONSTRAINT uq_roundup_cap_counter_period UNIQUE (user_id, period_type, period_start)
+);
+"""
+
+# If using Flask-Migrate, this would be in a migration file:
+# migrations/versions/xxx_add_roundup_cap_counters.py
+
+def upgrade():
+    """Create roundup_cap_counters."""
+    op.create_table(
+        'roundup_cap_counters',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('period_type', sa.String(10), nullable=False),
+        sa.Column('period_start', sa.Date(), nullable=False),
+        sa.Column('amount_paise', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.UniqueConstraint('user_id', 'period_type', 'period_start', name='uq_roundup_cap_counter_period'),
+    )
+
+
+def downgrade():
+    """Drop roundup_cap_counters."""
+    op.drop_table('roundup_cap_counters')
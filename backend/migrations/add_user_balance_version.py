@@ -0,0 +1,27 @@
+"""
+Database migration to add a portfolio version stamp to user_balances.
+
+Adds column:
+- version: bumped in the same transaction as every change to the user's
+  pending roundups or holdings. GET /api/portfolio returns it as the ETag and
+  answers 304 when If-None-Match still matches, without reading holdings.
+  Users without a row are at version 0; rows created later start at 1.
+"""
+
+# Manual SQL for SQLite/PostgreSQL:
+
+ADD_VERSION_SQL = """
+ALTER TABLE user_balances ADD COLUMN version INTEGER NOT NULL DEFAULT 1;
+"""
+
+# If using Flask-Migrate, this would be in a migration file:
+# migrations/versions/xxx_add_user_balance_version.py
+
+def upgrade():
+    """Add version to user_balances (existing rows start at 1, distinct from the no-row version 0)."""
+    op.add_column('user_balances', sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade():
+    """Remove version from user_balances."""
+    op.drop_column('user_balances', 'version')
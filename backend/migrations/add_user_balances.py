@@ -0,0 +1,49 @@
+"""
+Database migration to add the per-user pending roundup balance.
+
+Adds table user_balances: one row per user holding the total and count of
+pending roundups, maintained in the same transaction as every roundup
+create/invest/recompute so readers do a primary-key lookup instead of
+summing the roundups table.
+
+The table is also created by db.create_all() on app start; run the backfill
+below once on existing data (or python -m backend.jobs.check_user_balances).
+"""
+
+# Manual SQL for SQLite/PostgreSQL:
+
+CREATE_USER_BALANCES_SQL = """
+CREATE TABLE IF NOT EXISTS user_balances (
+    user_id INTEGER PRIMARY KEY REFERENCES users (id),
+    pending_paise INTEGER NOT NULL DEFAULT 0,
+    pending_count INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP
+);
+"""
+
+BACKFILL_USER_BALANCES_SQL = """
+INSERT INTO user_balances (user_id, pending_paise, pending_count, updated_at)
+SELECT user_id, SUM(amount_paise), COUNT(id), CURRENT_TIMESTAMP
+FROM roundups
+WHERE status = 'pending'
+GROUP BY user_id;
+"""
+
+# If using Flask-Migrate, this would be in a migration file:
+# migrations/versions/xxx_add_user_balances.py
+
+def upgrade():
+    """Create user_balances and backfill it from pending roundups."""
+    op.create_table(
+        'user_balances',
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), primary_key=True),
+        sa.Column('pending_paise', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('pending_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+    )
+    op.execute(BACKFILL_USER_BALANCES_SQL)
+
+
+def downgrade():
+    """Drop user_balances."""
+    op.drop_table('user_balances')
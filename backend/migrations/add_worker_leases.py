@@ -0,0 +1,36 @@
+"""
+Database migration to add worker lease columns for sweep and debit jobs.
+
+Adds to user_balances and mandates:
+- lease_owner: random token of the worker that claimed the row
+- lease_until: when the claim expires and the row may be claimed again
+
+Workers claim batches with a conditional UPDATE on these columns (on
+PostgreSQL the candidate SELECT also uses FOR UPDATE SKIP LOCKED), so
+several replicas process disjoint users/mandates in parallel.
+"""
+
+# Manual SQL for SQLite/PostgreSQL:
+
+ADD_LEASE_COLUMNS_SQL = """
+ALTER TABLE user_balances ADD COLUMN lease_owner VARCHAR(32);
+ALTER TABLE user_balances ADD COLUMN lease_until TIMESTAMP;
+ALTER TABLE mandates ADD COLUMN lease_owner VARCHAR(32);
+ALTER TABLE mandates ADD COLUMN lease_until TIMESTAMP;
+"""
+
+# If using Flask-Migrate, this would be in a migration file:
+# migrations/versions/xxx_add_worker_leases.py
+
+def upgrade():
+    """Add lease columns."""
+    for table in ('user_balances', 'mandates'):
+        op.add_column(table, sa.Column('lease_owner', sa.String(32), nullable=True))
+        op.add_column(table, sa.Column('lease_until', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    """Remove lease columns."""
+    for table in ('user_balances', 'mandates'):
+        op.drop_column(table, 'lease_until')
+        op.drop_column(table, 'lease_owner')
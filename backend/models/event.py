@@ -4,6 +4,9 @@ from ..extensions import db
 
 class EventLog(db.Model):
     __tablename__ = "event_logs"
+    __table_args__ = (
+        db.Index("ix_event_logs_user_type_created", "user_id", "event_type", "created_at"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
@@ -0,0 +1,30 @@
+from datetime import datetime
+from ..extensions import db
+
+
+class Holding(db.Model):
+    """Per-(user, product) projection of executed orders minus redemptions, kept in step with both tables."""
+
+    __tablename__ = "holdings"
+
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), primary_key=True)
+    product_type = db.Column(db.String(20), primary_key=True)
+    invested_paise = db.Column(db.BigInteger, nullable=False, default=0)
+    redeemed_paise = db.Column(db.BigInteger, nullable=False, default=0)
+    units_micro = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @property
+    def available_paise(self) -> int:
+        return self.invested_paise - self.redeemed_paise
+
+    def to_dict(self):
+        return {
+            "user_id": self.user_id,
+            "product_type": self.product_type,
+            "invested_paise": self.invested_paise,
+            "redeemed_paise": self.redeemed_paise,
+            "available_paise": self.available_paise,
+            "units_micro": self.units_micro,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+        }
@@ -4,6 +4,10 @@ from ..extensions import db
 
 class InvestmentOrder(db.Model):
     __tablename__ = "investment_orders"
+    __table_args__ = (
+        db.Index("ix_investment_orders_user_status_product", "user_id", "status", "product_type"),
+        db.Index("ix_investment_orders_user_created", "user_id", "created_at", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
@@ -12,6 +16,7 @@ class InvestmentOrder(db.Model):
     status = db.Column(db.String(20), default="pending")
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     external_order_id = db.Column(db.String(255))
+    units_micro = db.Column(db.BigInteger)  # units allotted x 1e6, when known
 
     user = db.relationship("User", backref=db.backref("investment_orders", lazy=True))
     roundups = db.relationship("Roundup", backref="investment_order", lazy=True)
@@ -24,4 +29,5 @@ class InvestmentOrder(db.Model):
             "status": self.status,
             "created_at": self.created_at.isoformat(),
             "external_order_id": self.external_order_id,
+            "units_micro": self.units_micro,
         }
@@ -0,0 +1,25 @@
+from datetime import datetime
+from ..extensions import db
+
+
+class JobCheckpoint(db.Model):
+    """Progress of the latest run of a chunked job: the last key committed, so an interrupted run can resume."""
+
+    __tablename__ = "job_checkpoints"
+
+    job_name = db.Column(db.String(64), primary_key=True)
+    status = db.Column(db.String(20), nullable=False, default="running")  # running|completed
+    run_started_at = db.Column(db.DateTime, nullable=False)
+    last_key = db.Column(db.BigInteger, nullable=False, default=0)
+    processed = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            "job_name": self.job_name,
+            "status": self.status,
+            "run_started_at": self.run_started_at.isoformat() if self.run_started_at else None,
+            "last_key": self.last_key,
+            "processed": self.processed,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+        }
@@ -0,0 +1,23 @@
+from datetime import datetime
+from ..extensions import db
+
+
+class JobLease(db.Model):
+    """Which worker currently leads a job (or job partition), and until when; see job_lease_service."""
+
+    __tablename__ = "job_leases"
+
+    name = db.Column(db.String(64), primary_key=True)
+    owner = db.Column(db.String(32))
+    lease_until = db.Column(db.DateTime)
+    acquired_at = db.Column(db.DateTime)
+    heartbeat_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "owner": self.owner,
+            "lease_until": self.lease_until.isoformat() if self.lease_until else None,
+            "acquired_at": self.acquired_at.isoformat() if self.acquired_at else None,
+            "heartbeat_at": self.heartbeat_at.isoformat() if self.heartbeat_at else None,
+        }
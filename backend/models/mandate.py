@@ -4,6 +4,10 @@ from ..extensions import db
 
 class Mandate(db.Model):
     __tablename__ = "mandates"
+    __table_args__ = (
+        db.Index("ix_mandates_status_next_debit", "status", "next_debit_at"),
+        db.Index("ix_mandates_updated_at", "updated_at"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
@@ -28,7 +32,13 @@ class Mandate(db.Model):
     pre_debit_notification_sent_at = db.Column(db.DateTime)
     auth_link = db.Column(db.Text)  # UPI authorization link from payment aggregator
 
+    # Debit worker lease (see sql_helpers.claim_batch)
+    lease_owner = db.Column(db.String(32))
+    lease_until = db.Column(db.DateTime)
+
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Bumped on every UPDATE (ORM or Core); the debit scheduler polls it for changes.
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     def to_dict(self):
         return {
@@ -0,0 +1,34 @@
+from datetime import datetime
+from ..extensions import db
+
+
+class OrderOutbox(db.Model):
+    """Investment order waiting to be sent to its provider, written in the same commit as the order."""
+
+    __tablename__ = "order_outbox"
+    __table_args__ = (
+        db.Index("ix_order_outbox_status_next_attempt", "status", "next_attempt_at"),
+        db.Index("ix_order_outbox_claim_token", "claim_token"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    order_id = db.Column(db.Integer, db.ForeignKey("investment_orders.id"), unique=True, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default="queued")  # queued|sent|done
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow)
+    claim_token = db.Column(db.String(32))
+    locked_until = db.Column(db.DateTime)
+    last_error = db.Column(db.String(255))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "order_id": self.order_id,
+            "status": self.status,
+            "attempts": self.attempts,
+            "next_attempt_at": self.next_attempt_at.isoformat() if self.next_attempt_at else None,
+            "last_error": self.last_error,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+        }
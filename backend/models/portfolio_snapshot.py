@@ -0,0 +1,30 @@
+from datetime import datetime
+from ..extensions import db
+
+
+class PortfolioSnapshot(db.Model):
+    """A user's portfolio value as of one price day, written in bulk by the revaluation job."""
+
+    __tablename__ = "portfolio_snapshots"
+    __table_args__ = (
+        db.UniqueConstraint("as_of", "user_id", name="uq_portfolio_snapshots_as_of_user"),
+        db.Index("ix_portfolio_snapshots_user_as_of", "user_id", "as_of"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    as_of = db.Column(db.Date, nullable=False)
+    invested_paise = db.Column(db.BigInteger, nullable=False, default=0)
+    value_paise = db.Column(db.BigInteger, nullable=False, default=0)
+    pnl_paise = db.Column(db.BigInteger, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            "user_id": self.user_id,
+            "as_of": self.as_of.isoformat(),
+            "invested_paise": self.invested_paise,
+            "value_paise": self.value_paise,
+            "pnl_paise": self.pnl_paise,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+        }
@@ -4,6 +4,9 @@ from ..extensions import db
 
 class Redemption(db.Model):
     __tablename__ = "redemptions"
+    __table_args__ = (
+        db.Index("ix_redemptions_user_created", "user_id", "created_at", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
@@ -12,6 +15,7 @@ class Redemption(db.Model):
     status = db.Column(db.String(20), default="executed")
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     external_order_id = db.Column(db.String(255))
+    units_micro = db.Column(db.BigInteger)
 
     user = db.relationship("User", backref=db.backref("redemptions", lazy=True))
 
@@ -23,4 +27,5 @@ class Redemption(db.Model):
             "status": self.status,
             "created_at": self.created_at.isoformat(),
             "external_order_id": self.external_order_id,
+            "units_micro": self.units_micro,
         }
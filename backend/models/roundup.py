@@ -4,6 +4,10 @@ from ..extensions import db
 
 class Roundup(db.Model):
     __tablename__ = "roundups"
+    __table_args__ = (
+        db.Index("ix_roundups_user_status_created", "user_id", "status", "created_at", "id"),
+        db.Index("ix_roundups_user_created", "user_id", "created_at", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
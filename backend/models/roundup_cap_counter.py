@@ -0,0 +1,26 @@
+from datetime import datetime
+from ..extensions import db
+
+
+class RoundupCapCounter(db.Model):
+    """Running total of roundups created per user per UTC day/month, used for O(1) cap checks."""
+
+    __tablename__ = "roundup_cap_counters"
+    __table_args__ = (
+        db.UniqueConstraint("user_id", "period_type", "period_start", name="uq_roundup_cap_counter_period"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    period_type = db.Column(db.String(10), nullable=False)  # day|month
+    period_start = db.Column(db.Date, nullable=False)
+    amount_paise = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            "period_type": self.period_type,
+            "period_start": self.period_start.isoformat(),
+            "amount_paise": self.amount_paise,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+        }
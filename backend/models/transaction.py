@@ -4,6 +4,9 @@ from ..extensions import db
 
 class Transaction(db.Model):
     __tablename__ = "transactions"
+    __table_args__ = (
+        db.Index("ix_transactions_user_timestamp", "user_id", "timestamp", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
@@ -0,0 +1,28 @@
+from datetime import datetime
+from ..extensions import db
+
+
+class UserBalance(db.Model):
+    """Per-user projection of pending roundups, kept in step with the roundups table."""
+
+    __tablename__ = "user_balances"
+
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), primary_key=True)
+    pending_paise = db.Column(db.Integer, nullable=False, default=0)
+    pending_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Bumped on every change to the user's pending balance or holdings; the portfolio ETag.
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    # Sweep worker lease (see sql_helpers.claim_batch)
+    lease_owner = db.Column(db.String(32))
+    lease_until = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {
+            "user_id": self.user_id,
+            "pending_paise": self.pending_paise,
+            "pending_count": self.pending_count,
+            "version": self.version,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+        }
@@ -1,10 +1,34 @@
-from typing import Dict
+from typing import Dict, List
 
 
 class GoldProvider:
     def place_order(self, user_id: int, amount_paise: int, product_type: str = "gold") -> Dict[str, str]:
         """
         Place a digital gold investment order.
-        Return keys: external_order_id (str), status ("pending"|"executed"|"failed").
+        Return keys: external_order_id (str), status ("pending"|"executed"|"failed"),
+        optionally units_micro (int) when executed.
+        """
+        raise NotImplementedError
+
+    def place_orders(self, orders: List[Dict]) -> List[Dict]:
+        """
+        Place omnibus gold orders in one call, one entry per scheme.
+        Input keys: reference (str), scheme_code (str), product_type (str), amount_paise (int).
+        Return one dict per input, same order: reference, external_order_id, status,
+        units_micro (int, grams x 1e6; present when executed).
+        """
+        raise NotImplementedError
+
+    def get_order_statuses(self, external_order_ids: List[str]) -> Dict[str, Dict]:
+        """
+        Look up many orders in one call.
+        Return external_order_id -> {status, units_micro (when executed)}; unknown ids may be omitted.
+        """
+        raise NotImplementedError
+
+    def get_prices(self, scheme_codes: List[str]) -> Dict[str, int]:
+        """
+        Latest published price per scheme in one call.
+        Return scheme_code -> rate in paise per gram (int); unknown codes may be omitted.
         """
         raise NotImplementedError
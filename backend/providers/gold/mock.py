@@ -1,9 +1,29 @@
 import time
-from typing import Dict
+from typing import Dict, List
 from .base import GoldProvider
 
+# Fixed price (paise per gram) so allotments are deterministic offline.
+MOCK_GOLD_PRICE_PAISE = 720_000
+
 
 class MockGoldProvider(GoldProvider):
     def place_order(self, user_id: int, amount_paise: int, product_type: str = "gold") -> Dict[str, str]:
         ext_id = f"MOCK-GOLD-{product_type}-{int(time.time())}-{user_id}"
-        return {"external_order_id": ext_id, "status": "executed"}
+        return {"external_order_id": ext_id, "status": "executed", "units_micro": amount_paise * 1_000_000 // MOCK_GOLD_PRICE_PAISE}
+
+    def place_orders(self, orders: List[Dict]) -> List[Dict]:
+        return [
+            {
+                "reference": o["reference"],
+                "external_order_id": f"MOCK-GOLD-OMNI-{o['scheme_code']}-{int(time.time())}-{o['reference']}",
+                "status": "executed",
+                "units_micro": o["amount_paise"] * 1_000_000 // MOCK_GOLD_PRICE_PAISE,
+            }
+            for o in orders
+        ]
+
+    def get_order_statuses(self, external_order_ids: List[str]) -> Dict[str, Dict]:
+        return {ext_id: {"status": "executed"} for ext_id in external_order_ids}
+
+    def get_prices(self, scheme_codes: List[str]) -> Dict[str, int]:
+        return {code: MOCK_GOLD_PRICE_PAISE for code in scheme_codes}
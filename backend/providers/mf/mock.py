@@ -1,9 +1,35 @@
 import time
-from typing import Dict
+from typing import Dict, List
 from .base import MFProvider
 
+# Product type -> scheme, mirrored from omnibus_service.SCHEME_CODES for single orders.
+MOCK_SCHEMES = {"mf": "MOCK-LIQUID-G", "mf_debt": "MOCK-DEBT-G", "mf_equity": "MOCK-EQUITY-G"}
+
+# Fixed NAVs (paise per unit) so allotments are deterministic offline.
+MOCK_NAV_PAISE = {"MOCK-LIQUID-G": 1_000_000, "MOCK-DEBT-G": 3_500_000, "MOCK-EQUITY-G": 12_345_600}
+DEFAULT_NAV_PAISE = 1_000_000
+
 
 class MockMFProvider(MFProvider):
     def place_order(self, user_id: int, amount_paise: int, product_type: str = "mf") -> Dict[str, str]:
         ext_id = f"MOCK-MF-{product_type}-{int(time.time())}-{user_id}"
-        return {"external_order_id": ext_id, "status": "executed"}
+        nav = MOCK_NAV_PAISE.get(MOCK_SCHEMES.get(product_type, "MOCK-LIQUID-G"), DEFAULT_NAV_PAISE)
+        return {"external_order_id": ext_id, "status": "executed", "units_micro": amount_paise * 1_000_000 // nav}
+
+    def place_orders(self, orders: List[Dict]) -> List[Dict]:
+        results = []
+        for o in orders:
+            nav = MOCK_NAV_PAISE.get(o["scheme_code"], DEFAULT_NAV_PAISE)
+            results.append({
+                "reference": o["reference"],
+                "external_order_id": f"MOCK-MF-OMNI-{o['scheme_code']}-{int(time.time())}-{o['reference']}",
+                "status": "executed",
+                "units_micro": o["amount_paise"] * 1_000_000 // nav,
+            })
+        return results
+
+    def get_order_statuses(self, external_order_ids: List[str]) -> Dict[str, Dict]:
+        return {ext_id: {"status": "executed"} for ext_id in external_order_ids}
+
+    def get_prices(self, scheme_codes: List[str]) -> Dict[str, int]:
+        return {code: MOCK_NAV_PAISE.get(code, DEFAULT_NAV_PAISE) for code in scheme_codes}
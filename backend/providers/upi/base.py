@@ -3,6 +3,9 @@ from datetime import date
 
 
 class UPIProvider:
+    # Provider API requests made by one execute_debit call (for rate limiting).
+    API_CALLS_PER_DEBIT = 1
+
     def create_mandate(
         self,
         *,
@@ -26,3 +29,12 @@ class UPIProvider:
 
     def confirm_mandate(self, external_mandate_id: str, otp: str) -> Dict[str, str]:
         raise NotImplementedError
+
+    def execute_debit(self, external_mandate_id: str, amount_paise: int, description: str = None,
+                      idempotency_key: str = None) -> Dict[str, str]:
+        """
+        Debit an active mandate.
+        Calls repeated with the same idempotency_key must return the first debit instead of charging again.
+        Return keys: payment_id, status ("authorized"|"captured"|"paid"|"issued" on success, else "failed"), error.
+        """
+        raise NotImplementedError
@@ -1,9 +1,17 @@
 import time
+from collections import OrderedDict
 from typing import Dict
 from .base import UPIProvider
 
+# Idempotency keys the mock remembers; the oldest are forgotten first.
+MAX_REMEMBERED_DEBITS = 10_000
+
 
 class MockUPIProvider(UPIProvider):
+    def __init__(self):
+        # idempotency_key -> first response, as a real gateway would replay it
+        self._debits: Dict[str, Dict[str, str]] = OrderedDict()
+
     def create_mandate(
         self,
         *,
@@ -36,3 +44,14 @@ class MockUPIProvider(UPIProvider):
     def confirm_mandate(self, external_mandate_id: str, otp: str) -> Dict[str, str]:
         # Mock: instantly activate irrespective of OTP value
         return {"external_mandate_id": external_mandate_id, "status": "active"}
+
+    def execute_debit(self, external_mandate_id: str, amount_paise: int, description: str = None,
+                      idempotency_key: str = None) -> Dict[str, str]:
+        if idempotency_key in self._debits:
+            return self._debits[idempotency_key]
+        result = {"payment_id": f"MOCK-PAY-{external_mandate_id}-{int(time.time())}", "status": "captured", "amount_paise": amount_paise}
+        if idempotency_key:
+            self._debits[idempotency_key] = result
+            if len(self._debits) > MAX_REMEMBERED_DEBITS:
+                self._debits.popitem(last=False)
+        return result
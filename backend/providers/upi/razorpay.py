@@ -11,6 +11,9 @@ class RazorpayUPIProvider(UPIProvider):
     
     Razorpay Documentation: https://razorpay.com/docs/payments/upi-autopay/
     """
+
+    # execute_debit = subscription.fetch + invoice.all (by receipt) + invoice.create
+    API_CALLS_PER_DEBIT = 3
     
     def __init__(self, key_id: str = None, key_secret: str = None):
         """Initialize Razorpay client with credentials from environment or parameters."""
@@ -156,7 +159,8 @@ class RazorpayUPIProvider(UPIProvider):
                 "auth_link": None
             }
     
-    def execute_debit(self, external_mandate_id: str, amount_paise: int, description: str = None) -> Dict[str, str]:
+    def execute_debit(self, external_mandate_id: str, amount_paise: int, description: str = None,
+                      idempotency_key: str = None) -> Dict[str, str]:
         """
         Execute a debit against an active mandate.
         
@@ -164,6 +168,8 @@ class RazorpayUPIProvider(UPIProvider):
             external_mandate_id: Razorpay subscription ID
             amount_paise: Amount to debit (must be <= max_amount)
             description: Optional description for the charge
+            idempotency_key: Sent as the invoice receipt; an invoice already
+                created with it is returned instead of charging again
         
         Returns:
             Dict with:
@@ -186,6 +192,17 @@ class RazorpayUPIProvider(UPIProvider):
             # Create payment against subscription
             # Note: Razorpay handles automatic charging based on billing cycle
             # For on-demand charging, we create an invoice
+            if idempotency_key:
+                existing = self.client.invoice.all({"receipt": idempotency_key}).get("items", [])
+                if existing:
+                    invoice = existing[0]
+                    return {
+                        "payment_id": invoice["id"],
+                        "status": invoice["status"],
+                        "amount_paise": invoice.get("amount", amount_paise),
+                        "invoice_id": invoice["id"]
+                    }
+            
             invoice_data = {
                 "type": "link",
                 "amount": amount_paise,
@@ -196,6 +213,8 @@ class RazorpayUPIProvider(UPIProvider):
                 },
                 "subscription_id": external_mandate_id
             }
+            if idempotency_key:
+                invoice_data["receipt"] = idempotency_key
             
             invoice = self.client.invoice.create(invoice_data)
             
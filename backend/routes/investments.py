@@ -6,9 +6,13 @@ from ..models.investment import InvestmentOrder
 from ..models.user import User
 from ..services.investment_service import execute_pending_roundups, execute_pending_roundups_allocated
 from ..services.allocations_service import get_allocation_for_tier
+from ..services.omnibus_service import scheme_for
+from ..services.price_store import get_price_store
+from ..services.holdings_service import get_available_paise, redeem_from_holding
 from ..models.cap_setting import CapSetting
 from ..models.redemption import Redemption
 from ..models.ledger import LedgerEntry
+from .pagination import InvalidCursor, keyset_page, paged_headers
 
 investments_bp = Blueprint("investments", __name__, url_prefix="/api/investments")
 
@@ -65,28 +69,27 @@ def list_investments():
     summary: List investment orders
     security:
       - BearerAuth: []
+    parameters:
+      - in: query
+        name: limit
+        type: integer
+        required: false
+        default: 100
+      - in: query
+        name: cursor
+        type: string
+        required: false
+        description: Opaque cursor from the X-Next-Cursor header of the previous page
     responses:
       200:
-        description: List of investment orders
+        description: List of investment orders; X-Next-Cursor header when more remain
     """
     user_id = int(get_jwt_identity())
     try:
-        limit = int(request.args.get("limit", 100))
-    except ValueError:
-        limit = 100
-    try:
-        offset = int(request.args.get("offset", 0))
-    except ValueError:
-        offset = 0
-    items = (
-        InvestmentOrder.query
-        .filter_by(user_id=user_id)
-        .order_by(InvestmentOrder.created_at.desc())
-        .offset(offset)
-        .limit(limit)
-        .all()
-    )
-    return jsonify([o.to_dict() for o in items])
+        items, next_cursor = keyset_page(InvestmentOrder.query.filter_by(user_id=user_id), InvestmentOrder.created_at, InvestmentOrder.id)
+    except InvalidCursor as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify([o.to_dict() for o in items]), 200, paged_headers(next_cursor)
 
 
 @investments_bp.post("/execute/allocated")
@@ -158,13 +161,15 @@ def redeem():
         return jsonify({"error": "amount_paise must be > 0"}), 400
     product_type = (data.get("product_type") or "mf").strip()
 
-    invested = db.session.query(db.func.coalesce(db.func.sum(InvestmentOrder.amount_paise), 0)).filter_by(user_id=user_id, status="executed", product_type=product_type).scalar()
-    redeemed = db.session.query(db.func.coalesce(db.func.sum(Redemption.amount_paise), 0)).filter_by(user_id=user_id, status="executed", product_type=product_type).scalar()
-    available = int(invested) - int(redeemed)
-    if amount > available:
-        return jsonify({"error": "insufficient_invested_balance", "available_paise": available}), 400
+    # Units sold at the latest stored price; unknown when no price has been loaded yet.
+    price = get_price_store().latest_prices([scheme_for(product_type)]).get(scheme_for(product_type))
+    units = amount * 1_000_000 // price if price else None
+    # Check and decrement in one conditional UPDATE, so concurrent redeems cannot both pass.
+    if not redeem_from_holding(user_id, product_type, amount, units):
+        db.session.rollback()
+        return jsonify({"error": "insufficient_invested_balance", "available_paise": get_available_paise(user_id, product_type)}), 400
 
-    r = Redemption(user_id=user_id, product_type=product_type, amount_paise=amount, status="executed")
+    r = Redemption(user_id=user_id, product_type=product_type, amount_paise=amount, status="executed", units_micro=units)
     db.session.add(r)
     db.session.flush()
     entry = LedgerEntry(user_id=user_id, type="credit", category="redemption", amount_paise=amount, reference_type="Redemption", reference_id=r.id)
@@ -182,28 +187,27 @@ def list_redemptions():
     summary: List redemptions
     security:
       - BearerAuth: []
+    parameters:
+      - in: query
+        name: limit
+        type: integer
+        required: false
+        default: 100
+      - in: query
+        name: cursor
+        type: string
+        required: false
+        description: Opaque cursor from the X-Next-Cursor header of the previous page
     responses:
       200:
-        description: List of redemptions
+        description: List of redemptions; X-Next-Cursor header when more remain
     """
     user_id = int(get_jwt_identity())
     try:
-        limit = int(request.args.get("limit", 100))
-    except ValueError:
-        limit = 100
-    try:
-        offset = int(request.args.get("offset", 0))
-    except ValueError:
-        offset = 0
-    items = (
-        Redemption.query
-        .filter_by(user_id=user_id)
-        .order_by(Redemption.created_at.desc())
-        .offset(offset)
-        .limit(limit)
-        .all()
-    )
-    return jsonify([e.to_dict() for e in items])
+        items, next_cursor = keyset_page(Redemption.query.filter_by(user_id=user_id), Redemption.created_at, Redemption.id)
+    except InvalidCursor as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify([e.to_dict() for e in items]), 200, paged_headers(next_cursor)
 
 @investments_bp.get("/monthly-summary")
 @jwt_required()
@@ -1,6 +1,7 @@
 from flask import Blueprint, jsonify, request, Response
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from ..models.ledger import LedgerEntry
+from .pagination import InvalidCursor, keyset_page, paged_headers
 import csv
 import io
 
@@ -27,28 +28,21 @@ def list_ledger():
         type: integer
         required: false
         default: 0
+      - in: query
+        name: cursor
+        type: string
+        required: false
+        description: Opaque cursor from the X-Next-Cursor header of the previous page
     responses:
       200:
-        description: Recent ledger entries
+        description: Recent ledger entries; X-Next-Cursor header when more remain
     """
     user_id = int(get_jwt_identity())
     try:
-        limit = int(request.args.get("limit", 100))
-    except ValueError:
-        limit = 100
-    try:
-        offset = int(request.args.get("offset", 0))
-    except ValueError:
-        offset = 0
-    items = (
-        LedgerEntry.query
-        .filter_by(user_id=user_id)
-        .order_by(LedgerEntry.timestamp.desc())
-        .offset(offset)
-        .limit(limit)
-        .all()
-    )
-    return jsonify([e.to_dict() for e in items])
+        items, next_cursor = keyset_page(LedgerEntry.query.filter_by(user_id=user_id), LedgerEntry.timestamp, LedgerEntry.id)
+    except InvalidCursor as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify([e.to_dict() for e in items]), 200, paged_headers(next_cursor)
 
 
 @ledger_bp.get("/export")
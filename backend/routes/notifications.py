@@ -2,8 +2,8 @@ from datetime import datetime, timedelta
 from flask import Blueprint, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from ..extensions import db
-from ..models.roundup import Roundup
 from ..models.event import EventLog
+from ..services.balance_service import get_pending_balance
 
 notifications_bp = Blueprint("notifications", __name__, url_prefix="/api/notifications")
 
@@ -47,7 +47,7 @@ def schedule_pre_debit_notice():
         description: Scheduled notice
     """
     user_id = int(get_jwt_identity())
-    total = sum(r.amount_paise for r in Roundup.query.filter_by(user_id=user_id, status="pending").all())
+    total, _ = get_pending_balance(user_id)
     scheduled_for = (datetime.utcnow() + timedelta(hours=24)).isoformat()
     msg = f"Pre-debit notice scheduled for {scheduled_for} (amount_paise={total})"
     evt = EventLog(user_id=user_id, event_type="pre_debit_scheduled", message=msg, amount_paise=total)
@@ -71,7 +71,7 @@ def send_pre_debit_notice():
         description: Sent notice event
     """
     user_id = int(get_jwt_identity())
-    total = sum(r.amount_paise for r in Roundup.query.filter_by(user_id=user_id, status="pending").all())
+    total, _ = get_pending_balance(user_id)
     msg = f"Pre-debit notice sent (amount_paise={total})"
     evt = EventLog(user_id=user_id, event_type="pre_debit_sent", message=msg, amount_paise=total)
     db.session.add(evt)
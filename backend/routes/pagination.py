@@ -0,0 +1,82 @@
+"""
+Keyset (cursor) pagination shared by the list endpoints.
+
+Pages are ordered newest first on ``(time column, id)``. The cursor is an
+opaque token encoding the last row of the previous page, so fetching any
+page is one index range scan of ``limit + 1`` rows no matter how deep it is.
+Bodies stay plain JSON arrays; the cursor for the following page is sent in
+the ``X-Next-Cursor`` header and omitted on the last page.
+
+Requests without ``cursor`` but with ``offset`` still work for older clients,
+but the page size cap applies to them as well.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from flask import current_app, request
+from sqlalchemy import tuple_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(ts: datetime, row_id: int) -> str:
+    raw = json.dumps([ts.isoformat(), row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        ts, row_id = json.loads(raw)
+        return datetime.fromisoformat(ts), int(row_id)
+    except (ValueError, TypeError):
+        raise InvalidCursor("invalid cursor")
+
+
+def _int_arg(name: str, default: int) -> int:
+    try:
+        return int(request.args.get(name, default))
+    except ValueError:
+        return default
+
+
+def page_size(default: int = 100) -> int:
+    """``limit`` query arg, clamped to 1..MAX_PAGE_SIZE."""
+    return max(1, min(_int_arg("limit", default), current_app.config["MAX_PAGE_SIZE"]))
+
+
+def keyset_page(query, ts_col, id_col, default_limit: int = 100) -> Tuple[List, Optional[str]]:
+    """
+    Fetch one page of ``query`` (already filtered to the user) newest first.
+
+    Reads ``limit``, ``cursor`` and the legacy ``offset`` from the request.
+    Returns the rows and the cursor for the next page (``None`` on the last).
+    Raises ``InvalidCursor`` for a malformed cursor.
+    """
+    limit = page_size(default_limit)
+    query = query.order_by(ts_col.desc(), id_col.desc())
+    token = request.args.get("cursor")
+    if token:
+        ts, row_id = decode_cursor(token)
+        query = query.filter(tuple_(ts_col, id_col) < tuple_(ts, row_id))
+    else:
+        offset = max(0, _int_arg("offset", 0))
+        if offset:
+            query = query.offset(offset)
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, ts_col.key), getattr(last, id_col.key))
+
+
+def paged_headers(next_cursor: Optional[str]) -> dict:
+    return {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
@@ -1,8 +1,8 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, make_response, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from ..models.roundup import Roundup
-from ..models.investment import InvestmentOrder
+from ..models.holding import Holding
 from ..services.valuation_service import compute_positions_value
+from ..services.balance_service import get_portfolio_version
 
 portfolio_bp = Blueprint("portfolio", __name__, url_prefix="/api/portfolio")
 
@@ -14,24 +14,40 @@ def get_portfolio():
     ---
     tags: [Portfolio]
     summary: Get portfolio summary (pending and invested totals)
+    description: Returns an ETag that changes whenever the user's pending roundups or holdings do; send it back in If-None-Match to get 304 when nothing changed.
     security:
       - BearerAuth: []
+    parameters:
+      - in: header
+        name: If-None-Match
+        type: string
+        required: false
     responses:
       200:
         description: Portfolio totals and position sums (paise)
+      304:
+        description: Not modified since the ETag in If-None-Match
     """
     user_id = int(get_jwt_identity())
-    pending_total = sum(r.amount_paise for r in Roundup.query.filter_by(user_id=user_id, status="pending").all())
-    orders = InvestmentOrder.query.filter_by(user_id=user_id, status="executed").all()
-    invested_total = sum(o.amount_paise for o in orders)
-    positions = {}
-    for o in orders:
-        positions[o.product_type] = positions.get(o.product_type, 0) + o.amount_paise
-    return jsonify({
-        "pending_roundups_paise": pending_total,
-        "invested_total_paise": invested_total,
-        "positions_paise": positions,
-    })
+    version, pending_total = get_portfolio_version(user_id)
+    etag = f"p{user_id}-{version}"
+    if request.if_none_match.contains(etag):
+        resp = make_response("", 304)
+    else:
+        # holdings is already one row per product: executed orders summed at write time
+        positions = {
+            product_type: int(invested)
+            for product_type, invested in
+            Holding.query.with_entities(Holding.product_type, Holding.invested_paise).filter(Holding.user_id == user_id)
+        }
+        resp = jsonify({
+            "pending_roundups_paise": pending_total,
+            "invested_total_paise": sum(positions.values()),
+            "positions_paise": positions,
+        })
+    resp.set_etag(etag)
+    resp.headers["Cache-Control"] = "private, no-cache"
+    return resp
 
 
 @portfolio_bp.get("/value")
@@ -40,12 +56,13 @@ def get_portfolio_value():
     """
     ---
     tags: [Portfolio]
-    summary: Get current portfolio valuation (stub)
+    summary: Get current portfolio valuation
+    description: Held units x latest stored NAV / gold rate; positions without units or prices are valued at cost.
     security:
       - BearerAuth: []
     responses:
       200:
-        description: Current value and PnL (paise)
+        description: Current value, prices, units and PnL (paise)
     """
     user_id = int(get_jwt_identity())
     data = compute_positions_value(user_id)
@@ -1,6 +1,8 @@
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from ..models.roundup import Roundup
+from ..services.balance_service import get_pending_balance
+from .pagination import InvalidCursor, keyset_page, paged_headers
 
 roundups_bp = Blueprint("roundups", __name__, url_prefix="/api/roundups")
 
@@ -25,25 +27,25 @@ def list_roundups():
         type: integer
         required: false
         default: 100
+      - in: query
+        name: cursor
+        type: string
+        required: false
+        description: Opaque cursor from the X-Next-Cursor header of the previous page
     responses:
       200:
-        description: List of roundups
+        description: List of roundups, newest first; X-Next-Cursor header when more remain
     """
     user_id = int(get_jwt_identity())
     status = request.args.get("status")
-    try:
-        limit = int(request.args.get("limit", 100))
-    except ValueError:
-        limit = 100
-    try:
-        offset = int(request.args.get("offset", 0))
-    except ValueError:
-        offset = 0
     q = Roundup.query.filter_by(user_id=user_id)
     if status in {"pending", "invested"}:
         q = q.filter_by(status=status)
-    items = q.order_by(Roundup.created_at.desc()).offset(offset).limit(limit).all()
-    return jsonify([r.to_dict() for r in items])
+    try:
+        items, next_cursor = keyset_page(q, Roundup.created_at, Roundup.id)
+    except InvalidCursor as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify([r.to_dict() for r in items]), 200, paged_headers(next_cursor)
 
 
 @roundups_bp.get("/pending")
@@ -60,6 +62,6 @@ def pending_roundups():
         description: Total pending roundups in paise and list of items
     """
     user_id = int(get_jwt_identity())
+    total, _ = get_pending_balance(user_id)
     items = Roundup.query.filter_by(user_id=user_id, status="pending").all()
-    total = sum(r.amount_paise for r in items)
     return jsonify({"total_paise": total, "items": [r.to_dict() for r in items]})
@@ -1,19 +1,25 @@
-from decimal import Decimal, ROUND_HALF_UP
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy.exc import IntegrityError
 from ..extensions import db
 from ..models.user import User
 from ..models.transaction import Transaction
 from ..services.roundup_service import create_roundup_for_transaction
+from ..services.dedupe_filter import get_recent_external_ids
+from ..models.event import EventLog
+from ..services.ingest_service import (
+    STATEMENT_FORMATS,
+    import_statement,
+    ingest_transactions,
+    iter_statement_rows,
+    iter_text_lines,
+    to_paise,
+)
+from .pagination import InvalidCursor, keyset_page, paged_headers
 
 transactions_bp = Blueprint("transactions", __name__, url_prefix="/api/transactions")
 
 
-def to_paise(value):
-    d = Decimal(str(value)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
-    return int(d * 100)
-
-
 @transactions_bp.post("")
 @jwt_required()
 def create_transaction():
@@ -38,9 +44,14 @@ def create_transaction():
               format: float
             merchant:
               type: string
+            external_transaction_id:
+              type: string
+              description: Bank/feed id; repeat deliveries return the stored transaction
     responses:
       200:
         description: Created transaction and optional roundup
+      409:
+        description: external_transaction_id belongs to another user
     """
     user_id = int(get_jwt_identity())
     user = User.query.get(user_id)
@@ -50,13 +61,151 @@ def create_transaction():
         return jsonify({"error": "amount required"}), 400
     merchant = data.get("merchant")
     amount_paise = to_paise(amount)
-    tx = Transaction(user_id=user.id, amount_paise=amount_paise, merchant=merchant)
+    ext_id = data.get("external_transaction_id")
+    ext_id = str(ext_id).strip() if ext_id not in (None, "") else None
+    if ext_id is not None and not 0 < len(ext_id) <= 255:
+        return jsonify({"error": "external_transaction_id must be 1-255 characters"}), 400
+    if ext_id and get_recent_external_ids().might_contain(ext_id):
+        existing = Transaction.query.filter_by(external_transaction_id=ext_id).first()
+        if existing:
+            return _duplicate_response(existing, user_id)
+    tx = Transaction(user_id=user.id, amount_paise=amount_paise, merchant=merchant, external_transaction_id=ext_id)
     db.session.add(tx)
-    db.session.commit()
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        existing = Transaction.query.filter_by(external_transaction_id=ext_id).first() if ext_id else None
+        if not existing:
+            raise
+        return _duplicate_response(existing, user_id)
+    if ext_id:
+        get_recent_external_ids().add_many([ext_id])
     r = create_roundup_for_transaction(user, tx)
     return jsonify({"transaction": tx.to_dict(), "roundup": r.to_dict() if r else None})
 
 
+def _duplicate_response(existing: Transaction, user_id: int):
+    if existing.user_id != user_id:
+        return jsonify({"error": "external_transaction_id already used"}), 409
+    r = existing.roundups[0] if existing.roundups else None
+    return jsonify({"transaction": existing.to_dict(), "roundup": r.to_dict() if r else None, "duplicate": True})
+
+
+@transactions_bp.post("/batch")
+@jwt_required()
+def create_transactions_batch():
+    """
+    ---
+    tags: [Transactions]
+    summary: Create many transactions and their roundups in one DB transaction
+    description: Accepts a JSON array (or an object with a `transactions` array). Invalid items are reported per index and skipped.
+    security:
+      - BearerAuth: []
+    consumes:
+      - application/json
+    parameters:
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: array
+          items:
+            type: object
+            required: [amount]
+            properties:
+              amount:
+                type: number
+                format: float
+              merchant:
+                type: string
+              description:
+                type: string
+              external_transaction_id:
+                type: string
+              timestamp:
+                type: string
+                format: date-time
+    responses:
+      200:
+        description: Per-item results and batch totals
+      400:
+        description: Body is not an array or exceeds the batch limit
+    """
+    user_id = int(get_jwt_identity())
+    user = User.query.get(user_id)
+    data = request.get_json(silent=True)
+    items = data.get("transactions") if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "transactions array required"}), 400
+    max_batch = current_app.config.get("INGEST_MAX_BATCH_SIZE", 5000)
+    if len(items) > max_batch:
+        return jsonify({"error": f"batch too large (max {max_batch})"}), 400
+    return jsonify(ingest_transactions(user, items))
+
+
+@transactions_bp.post("/import")
+@jwt_required()
+def import_transactions():
+    """
+    ---
+    tags: [Transactions]
+    summary: Stream-import a bank statement (NDJSON or CSV)
+    description: The request body is read line by line and written in fixed-size chunks, each committed on its own. CSV needs a header row with an `amount` column.
+    security:
+      - BearerAuth: []
+    consumes:
+      - application/x-ndjson
+      - text/csv
+    parameters:
+      - in: query
+        name: format
+        type: string
+        enum: [ndjson, csv]
+        required: false
+        description: Defaults from the Content-Type header (text/csv means csv, anything else ndjson)
+      - in: query
+        name: chunk_size
+        type: integer
+        required: false
+    responses:
+      200:
+        description: Import totals
+      400:
+        description: Unsupported format
+    """
+    user_id = int(get_jwt_identity())
+    user = User.query.get(user_id)
+    fmt = (request.args.get("format") or "").lower()
+    if not fmt:
+        fmt = "csv" if (request.mimetype or "").endswith("csv") else "ndjson"
+    if fmt not in STATEMENT_FORMATS:
+        return jsonify({"error": "format must be one of ndjson, csv"}), 400
+    default_chunk = current_app.config.get("IMPORT_CHUNK_SIZE", 1000)
+    try:
+        chunk_size = int(request.args.get("chunk_size", default_chunk))
+    except ValueError:
+        chunk_size = default_chunk
+    chunk_size = max(1, min(chunk_size, current_app.config.get("INGEST_MAX_BATCH_SIZE", 5000)))
+
+    def log_progress(totals):
+        current_app.logger.info(
+            "statement import user=%s chunk=%s rows=%s created=%s failed=%s",
+            user_id, totals["chunks"], totals["rows"], totals["created"], totals["failed"],
+        )
+
+    rows = iter_statement_rows(iter_text_lines(request.stream), fmt)
+    totals = import_statement(user, rows, chunk_size=chunk_size, progress=log_progress)
+    db.session.add(EventLog(
+        user_id=user_id,
+        event_type="statement_imported",
+        message=f"Imported {totals['created']} of {totals['rows']} statement rows ({fmt})",
+        amount_paise=totals["roundup_total_paise"],
+    ))
+    db.session.commit()
+    return jsonify(totals)
+
+
 @transactions_bp.get("")
 @jwt_required()
 def list_transactions():
@@ -77,25 +226,18 @@ def list_transactions():
         type: integer
         required: false
         default: 0
+      - in: query
+        name: cursor
+        type: string
+        required: false
+        description: Opaque cursor from the X-Next-Cursor header of the previous page
     responses:
       200:
-        description: List of transactions (latest 100)
+        description: List of transactions, newest first; X-Next-Cursor header when more remain
     """
     user_id = int(get_jwt_identity())
     try:
-        limit = int(request.args.get("limit", 100))
-    except ValueError:
-        limit = 100
-    try:
-        offset = int(request.args.get("offset", 0))
-    except ValueError:
-        offset = 0
-    items = (
-        Transaction.query
-        .filter_by(user_id=user_id)
-        .order_by(Transaction.timestamp.desc())
-        .offset(offset)
-        .limit(limit)
-        .all()
-    )
-    return jsonify([t.to_dict() for t in items])
+        items, next_cursor = keyset_page(Transaction.query.filter_by(user_id=user_id), Transaction.timestamp, Transaction.id)
+    except InvalidCursor as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify([t.to_dict() for t in items]), 200, paged_headers(next_cursor)
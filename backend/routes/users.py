@@ -1,8 +1,9 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from ..extensions import db
 from ..models.user import User
 from ..models.event import EventLog
+from ..jobs.recompute_roundups import request_recompute, schedule_recompute
 
 users_bp = Blueprint("users", __name__, url_prefix="/api/user")
 
@@ -63,11 +64,13 @@ def update_settings():
     user_id = int(get_jwt_identity())
     user = User.query.get(user_id)
     data = request.get_json() or {}
+    base_changed = False
     if "rounding_base" in data:
         try:
             rb = int(data["rounding_base"])
             if rb < 1 or rb > 1000:
                 return jsonify({"error": "rounding_base must be between 1 and 1000 rupees"}), 400
+            base_changed = rb != user.rounding_base
             user.rounding_base = rb
         except (ValueError, TypeError):
             return jsonify({"error": "rounding_base must be integer"}), 400
@@ -81,7 +84,17 @@ def update_settings():
         if data["sweep_frequency"] not in {"daily", "weekly"}:
             return jsonify({"error": "sweep_frequency must be one of daily, weekly"}), 400
         user.sweep_frequency = data["sweep_frequency"]
+    if base_changed:
+        request_recompute(user_id)
     db.session.commit()
+    if base_changed:
+        # Pending roundups still use the old base; rewrite them off the request path.
+        schedule_recompute(
+            current_app._get_current_object(),
+            user_id,
+            chunk_size=current_app.config["ROUNDUP_RECOMPUTE_CHUNK_SIZE"],
+            inline=current_app.config["ROUNDUP_RECOMPUTE_INLINE"],
+        )
     return jsonify({
         "rounding_base": user.rounding_base,
         "risk_tier": user.risk_tier,
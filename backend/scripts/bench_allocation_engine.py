@@ -0,0 +1,60 @@
+"""
+Benchmark: per-user vs vectorized product allocation.
+
+Generates N users (default 1M) with random pending totals, risk tiers and a
+share of custom allocations, splits them with the NumPy largest-remainder
+engine, checks every total is preserved, and times the per-user Python path
+on a sample for comparison.
+
+Usage:
+    python -m backend.scripts.bench_allocation_engine
+    python -m backend.scripts.bench_allocation_engine --users 200000 --custom-share 0.05
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from backend.services.allocation_engine import PRODUCTS, TIERS, allocate_batch, allocate_one
+from backend.services.allocations_service import RISK_ALLOCATIONS
+
+
+def make_dataset(n_users: int, custom_share: float, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    totals = rng.integers(0, 500_000, size=n_users)
+    tiers = [TIERS[i] for i in rng.integers(0, len(TIERS), size=n_users)]
+    custom = {}
+    for i in np.flatnonzero(rng.random(n_users) < custom_share):
+        cut = np.sort(rng.integers(0, 101, size=len(PRODUCTS) - 1))
+        custom[int(i)] = dict(zip(PRODUCTS, np.diff(np.concatenate(([0], cut, [100]))).tolist()))
+    return totals, tiers, custom
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--custom-share", type=float, default=0.02)
+    parser.add_argument("--scalar-sample", type=int, default=20_000)
+    args = parser.parse_args()
+
+    totals, tiers, custom = make_dataset(args.users, args.custom_share)
+    print(f"{args.users} users, {len(custom)} with custom allocations")
+
+    t0 = time.perf_counter()
+    alloc = allocate_batch(totals, tiers, custom)
+    vec = time.perf_counter() - t0
+    assert (alloc.sum(axis=1) == totals).all(), "vectorized allocation lost paise"
+
+    n = min(args.scalar_sample, args.users)
+    t0 = time.perf_counter()
+    for i in range(n):
+        allocate_one(int(totals[i]), custom.get(i) or RISK_ALLOCATIONS[tiers[i]])
+    scalar = (time.perf_counter() - t0) * args.users / n
+
+    print(f"per-user : {scalar:.2f}s (extrapolated from {n} users)")
+    print(f"numpy    : {vec:.2f}s -> {args.users / vec:,.0f} users/s, {scalar / vec:.0f}x faster")
+
+
+if __name__ == "__main__":
+    main()
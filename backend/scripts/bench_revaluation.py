@@ -0,0 +1,97 @@
+"""
+Benchmark: batch portfolio revaluation throughput.
+
+Seeds a throwaway SQLite database with N users, each holding executed orders
+in several products (plus some redemptions), stores one price per
+instrument, runs the revaluation job and prints users/second plus the
+projected time for 1M users. Also times compute_positions_value on a sample
+of users for comparison.
+
+Usage:
+    python -m backend.scripts.bench_revaluation
+    python -m backend.scripts.bench_revaluation --users 500000 --chunk-size 20000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from datetime import date, datetime
+
+import numpy as np
+from sqlalchemy import insert
+
+PRODUCTS = ["mf_debt", "mf_equity", "gold"]
+
+
+def seed(db, n_users: int, seed: int = 42):
+    from backend.models.investment import InvestmentOrder
+    from backend.models.redemption import Redemption
+    from backend.models.user import User
+
+    rng = np.random.default_rng(seed)
+    now = datetime.utcnow()
+    db.session.execute(insert(User), [
+        {"id": i, "email": f"bench{i}@example.com", "password_hash": "x"} for i in range(1, n_users + 1)
+    ])
+    amounts = rng.integers(100, 500_000, size=(n_users, len(PRODUCTS)))
+    units = amounts * 1_000_000 // np.array([3_500_000, 12_345_600, 720_000])
+    orders = [
+        {"user_id": uid, "product_type": p, "amount_paise": int(amounts[uid - 1, j]),
+         "units_micro": int(units[uid - 1, j]), "status": "executed", "created_at": now}
+        for uid in range(1, n_users + 1) for j, p in enumerate(PRODUCTS)
+    ]
+    for start in range(0, len(orders), 50_000):
+        db.session.execute(insert(InvestmentOrder), orders[start:start + 50_000])
+    redeemers = np.flatnonzero(rng.random(n_users) < 0.1) + 1
+    db.session.execute(insert(Redemption), [
+        {"user_id": int(uid), "product_type": "mf_equity", "amount_paise": 100, "units_micro": 8, "status": "executed", "created_at": now}
+        for uid in redeemers
+    ])
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    parser.add_argument("--scalar-sample", type=int, default=2_000)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(root, 'bench_revaluation.db')}"
+    from backend.app import create_app
+    from backend.extensions import db
+    from backend.jobs.revalue_portfolios import revalue_portfolios
+    from backend.services.price_store import get_price_store
+    from backend.services.valuation_service import compute_positions_value
+
+    app = create_app()
+    app.config["PRICE_STORE_DIR"] = os.path.join(root, "prices")
+    with app.app_context():
+        db.create_all()
+        t0 = time.perf_counter()
+        seed(db, args.users)
+        print(f"seeded {args.users} users x {len(PRODUCTS)} products in {time.perf_counter() - t0:.1f}s")
+        store = get_price_store()
+        for code, price in {"MOCK-DEBT-G": 3_600_000, "MOCK-EQUITY-G": 13_000_000, "GOLD-24K": 735_000}.items():
+            store.write(code, {date.today(): price})
+
+        n = min(args.scalar_sample, args.users)
+        t0 = time.perf_counter()
+        for uid in range(1, n + 1):
+            compute_positions_value(uid)
+        scalar = (time.perf_counter() - t0) / n
+
+        t0 = time.perf_counter()
+        result = revalue_portfolios(chunk_size=args.chunk_size)
+        elapsed = time.perf_counter() - t0
+
+    rate = result["users"] / elapsed if elapsed else float("inf")
+    print(f"per-user : ~{scalar * 1_000_000 / 60:.1f} min per 1M users (sampled {n})")
+    print(f"batch    : {result['users']} users in {elapsed:.2f}s -> {rate:,.0f} users/s, "
+          f"~{1_000_000 / rate / 60:.1f} min per 1M users")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark: scalar vs vectorized roundup computation.
+
+Generates synthetic UPI transactions (default 1M) spread over many users with
+mixed rounding bases and caps, runs both the per-transaction Python path and
+the NumPy engine, checks they agree, and prints timings.
+
+Usage:
+    python -m backend.scripts.bench_roundup_engine
+    python -m backend.scripts.bench_roundup_engine --transactions 200000 --users 5000
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from backend.services.roundup_engine import UNCAPPED, calculate_roundups, clip_to_caps
+from backend.services.roundup_service import calculate_roundup_paise
+
+
+def make_dataset(n_tx: int, n_users: int, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    user_index = rng.integers(0, n_users, size=n_tx)
+    # Mostly small UPI payments (Rs 5 - Rs 2,000), paise precision
+    amounts = rng.integers(500, 200_000, size=n_tx)
+    user_bases = rng.choice([1, 5, 10, 50, 100], size=n_users)
+    remaining = rng.integers(1_000, 50_000, size=n_users)
+    remaining[rng.random(n_users) < 0.5] = UNCAPPED
+    return amounts, user_index, user_bases, remaining
+
+
+def scalar_path(amounts, user_index, user_bases, remaining):
+    amounts = amounts.tolist()
+    user_index = user_index.tolist()
+    bases = user_bases.tolist()
+    left = remaining.tolist()
+    out = [0] * len(amounts)
+    for i, (amount, u) in enumerate(zip(amounts, user_index)):
+        allowed = min(calculate_roundup_paise(amount, bases[u]), left[u])
+        left[u] -= allowed
+        out[i] = allowed
+    return out
+
+
+def vector_path(amounts, user_index, user_bases, remaining):
+    raw = calculate_roundups(amounts, user_bases[user_index])
+    return clip_to_caps(raw, user_index, remaining)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scalar vs vectorized roundup benchmark")
+    parser.add_argument("--transactions", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    data = make_dataset(args.transactions, args.users)
+    print(f"Dataset: {args.transactions:,} transactions across {args.users:,} users")
+
+    t0 = time.perf_counter()
+    expected = scalar_path(*data)
+    scalar_s = time.perf_counter() - t0
+
+    vector_s = float("inf")
+    for _ in range(args.repeat):
+        t0 = time.perf_counter()
+        got = vector_path(*data)
+        vector_s = min(vector_s, time.perf_counter() - t0)
+
+    assert got.tolist() == expected, "vectorized result differs from scalar path"
+    print(f"Scalar:     {scalar_s:8.3f}s  ({args.transactions / scalar_s:,.0f} tx/s)")
+    print(f"Vectorized: {vector_s:8.3f}s  ({args.transactions / vector_s:,.0f} tx/s)")
+    print(f"Speedup:    {scalar_s / vector_s:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
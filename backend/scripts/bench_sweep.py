@@ -0,0 +1,79 @@
+"""
+Benchmark: fleet sweep throughput.
+
+Seeds a throwaway SQLite database with N users, each holding a few pending
+roundups and a user_balances row, runs the sweep job over all of them and
+prints users/second plus the projected time for 1M users.
+
+Usage:
+    python -m backend.scripts.bench_sweep
+    python -m backend.scripts.bench_sweep --users 50000 --roundups-per-user 5 --chunk-size 2000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+
+def seed(db, n_users: int, per_user: int):
+    from backend.models.roundup import Roundup
+    from backend.models.transaction import Transaction
+    from backend.models.user import User
+    from backend.models.user_balance import UserBalance
+
+    now = datetime.utcnow() - timedelta(days=2)
+    db.session.execute(insert(User), [
+        {"id": i, "email": f"bench{i}@example.com", "password_hash": "x", "sweep_frequency": "daily"}
+        for i in range(1, n_users + 1)
+    ])
+    tx_rows, roundup_rows = [], []
+    tx_id = 0
+    for uid in range(1, n_users + 1):
+        for _ in range(per_user):
+            tx_id += 1
+            tx_rows.append({"id": tx_id, "user_id": uid, "amount_paise": 24_700, "timestamp": now})
+            roundup_rows.append({"user_id": uid, "transaction_id": tx_id, "amount_paise": 300, "status": "pending", "created_at": now})
+    db.session.execute(insert(Transaction), tx_rows)
+    db.session.execute(insert(Roundup), roundup_rows)
+    db.session.execute(insert(UserBalance), [
+        {"user_id": uid, "pending_paise": 300 * per_user, "pending_count": per_user, "updated_at": now}
+        for uid in range(1, n_users + 1)
+    ])
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20_000)
+    parser.add_argument("--roundups-per-user", type=int, default=5)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench_sweep.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    from backend.app import create_app
+    from backend.extensions import db
+    from backend.jobs.sweep import run_sweep
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        t0 = time.perf_counter()
+        seed(db, args.users, args.roundups_per_user)
+        print(f"seeded {args.users} users x {args.roundups_per_user} roundups in {time.perf_counter() - t0:.1f}s")
+
+        t0 = time.perf_counter()
+        result = run_sweep(args.chunk_size)
+        elapsed = time.perf_counter() - t0
+
+    rate = result["executed"] / elapsed if elapsed else float("inf")
+    print(f"swept {result['executed']} users ({result['roundups']} roundups) in {elapsed:.2f}s "
+          f"-> {rate:,.0f} users/s, ~{1_000_000 / rate / 60:.1f} min per 1M users")
+
+
+if __name__ == "__main__":
+    main()
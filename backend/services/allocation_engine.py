@@ -0,0 +1,90 @@
+"""
+Vectorized allocation of users' totals across products.
+
+Splits integer paise totals by percentage weights for a whole batch at once
+with largest-remainder rounding: each product gets the floor of its exact
+share, and the paise left over go to the products with the largest
+fractional parts (earlier products first on ties). Per-user totals are
+therefore preserved exactly and no product is ever off by more than one
+paisa from its exact share.
+"""
+
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .allocations_service import RISK_ALLOCATIONS
+
+ArrayLike = Union[Sequence[int], np.ndarray]
+
+# Column order of allocation matrices.
+PRODUCTS: List[str] = list(RISK_ALLOCATIONS["medium"])
+TIERS: List[str] = list(RISK_ALLOCATIONS)
+
+
+def tier_weights(products: Sequence[str] = PRODUCTS) -> np.ndarray:
+    """Percent matrix with one row per tier in ``TIERS`` and one column per product."""
+    return np.array([[RISK_ALLOCATIONS[t].get(p, 0) for p in products] for t in TIERS], dtype=np.int64)
+
+
+def largest_remainder(totals: ArrayLike, weights: ArrayLike) -> np.ndarray:
+    """
+    Split each total in proportion to its row of weights.
+
+    Args:
+        totals: Amount per user (paise), shape (n,)
+        weights: Non-negative integer weights, shape (n, k) or (k,) for all
+            users; rows need not sum to 100. A row of zeros allocates nothing.
+
+    Returns:
+        np.ndarray: int64 allocation of shape (n, k); each row sums to its
+        total (or is all zeros for an all-zero weight row)
+    """
+    totals = np.asarray(totals, dtype=np.int64)
+    weights = np.asarray(weights, dtype=np.int64)
+    if weights.ndim == 1:
+        weights = np.broadcast_to(weights, (totals.size, weights.size))
+    weight_sum = weights.sum(axis=1)
+    safe_sum = np.where(weight_sum > 0, weight_sum, 1)
+
+    exact = totals[:, None] * weights
+    floor, remainder = np.divmod(exact, safe_sum[:, None])
+    leftover = np.where(weight_sum > 0, totals - floor.sum(axis=1), 0)
+
+    # Rank columns by remainder (descending, stable so earlier products win ties).
+    order = np.argsort(-remainder, axis=1, kind="stable")
+    rank = np.argsort(order, axis=1)
+    return floor + (rank < leftover[:, None])
+
+
+def allocate_batch(
+    totals: ArrayLike,
+    tiers: Sequence[str],
+    custom: Optional[Mapping[int, Mapping[str, int]]] = None,
+    products: Sequence[str] = PRODUCTS,
+) -> np.ndarray:
+    """
+    Per-product paise for many users from their risk tiers.
+
+    ``custom`` maps a row index to that user's own ``{product: percent}``,
+    overriding the tier split. Unknown tiers fall back to "medium".
+    Returns an (n, len(products)) int64 array.
+    """
+    tier_index = {t: i for i, t in enumerate(TIERS)}
+    default = tier_index["medium"]
+    rows = np.fromiter((tier_index.get(t or "medium", default) for t in tiers), dtype=np.int64, count=len(tiers))
+    weights = tier_weights(products)[rows]
+    if custom:
+        weights = weights.copy()
+        for i, split in custom.items():
+            weights[i] = [split.get(p, 0) for p in products]
+    return largest_remainder(totals, weights)
+
+
+def allocate_one(total: int, allocation_percent: Dict[str, int]) -> List[Tuple[str, int]]:
+    """Largest-remainder split of one total; ``(product, paise)`` for each product with a positive percent."""
+    products = [p for p, pct in allocation_percent.items() if pct > 0]
+    if not products:
+        return []
+    amounts = largest_remainder([total], [allocation_percent[p] for p in products])[0]
+    return list(zip(products, amounts.tolist()))
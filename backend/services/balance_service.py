@@ -0,0 +1,160 @@
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import update
+
+from ..extensions import db
+from ..models.roundup import Roundup
+from ..models.user_balance import UserBalance
+from .sql_helpers import insert_ignore
+
+
+def _pending_totals(user_id: int) -> Tuple[int, int]:
+    paise, count = (
+        db.session.query(db.func.coalesce(db.func.sum(Roundup.amount_paise), 0), db.func.count(Roundup.id))
+        .filter(Roundup.user_id == user_id, Roundup.status == "pending")
+        .one()
+    )
+    return int(paise), int(count)
+
+
+def adjust_pending_balance(user_id: int, delta_paise: int, delta_count: int) -> None:
+    """
+    Apply a change in pending roundups to the user's balance row (no commit).
+
+    Call it in the same DB transaction as the roundup change and after that
+    change has been flushed. The UPDATE is relative, so concurrent writers
+    never lose each other's deltas. A missing row is seeded from the roundups
+    table, which at that point already includes this change.
+    """
+    if not delta_paise and not delta_count:
+        return
+    stmt = (
+        update(UserBalance)
+        .where(UserBalance.user_id == user_id)
+        .values(
+            pending_paise=UserBalance.pending_paise + delta_paise,
+            pending_count=UserBalance.pending_count + delta_count,
+            version=UserBalance.version + 1,
+            updated_at=datetime.utcnow(),
+        )
+    )
+    if db.session.execute(stmt).rowcount == 1:
+        return
+    paise, count = _pending_totals(user_id)
+    seeded = db.session.execute(
+        insert_ignore(UserBalance, ["user_id"]).values(
+            user_id=user_id, pending_paise=paise, pending_count=count, version=1, updated_at=datetime.utcnow(),
+        )
+    ).rowcount
+    if not seeded:
+        # Another writer seeded the row first without seeing our uncommitted rows.
+        db.session.execute(stmt)
+
+
+def bump_portfolio_versions(user_ids: Iterable[int]) -> None:
+    """
+    Mark the users' portfolios as changed (no commit), for writes that do not
+    go through adjust_pending_balance (order fills, redemptions).
+
+    A missing balance row is seeded at version 1, since readers treat no row
+    as version 0.
+    """
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+    existing = {
+        uid for (uid,) in db.session.query(UserBalance.user_id).filter(UserBalance.user_id.in_(user_ids))
+    }
+    now = datetime.utcnow()
+    for uid in user_ids - existing:
+        paise, count = _pending_totals(uid)
+        if db.session.execute(
+            insert_ignore(UserBalance, ["user_id"]).values(
+                user_id=uid, pending_paise=paise, pending_count=count, version=1, updated_at=now,
+            )
+        ).rowcount:
+            continue
+        existing.add(uid)
+    if existing:
+        db.session.execute(
+            update(UserBalance)
+            .where(UserBalance.user_id.in_(existing))
+            .values(version=UserBalance.version + 1, updated_at=now),
+            execution_options={"synchronize_session": False},
+        )
+
+
+def get_portfolio_version(user_id: int) -> Tuple[int, int]:
+    """(version, pending_paise) from the user's balance row; (0, 0) when there is none."""
+    row = (
+        db.session.query(UserBalance.version, UserBalance.pending_paise)
+        .filter(UserBalance.user_id == user_id)
+        .first()
+    )
+    return (int(row[0]), int(row[1])) if row else (0, 0)
+
+
+def get_pending_balance(user_id: int) -> Tuple[int, int]:
+    """Pending roundup total (paise) and count for a user, from its balance row."""
+    row = (
+        db.session.query(UserBalance.pending_paise, UserBalance.pending_count)
+        .filter(UserBalance.user_id == user_id)
+        .first()
+    )
+    if row is None:
+        # No roundup has been created for this user since the table was backfilled.
+        return 0, 0
+    return int(row[0]), int(row[1])
+
+
+def get_pending_balances(user_ids: Iterable[int]) -> Dict[int, int]:
+    """Pending roundup total (paise) for many users in one query; users without a row map to 0."""
+    user_ids = set(user_ids)
+    totals = dict.fromkeys(user_ids, 0)
+    if user_ids:
+        totals.update(
+            (uid, int(paise)) for uid, paise in
+            db.session.query(UserBalance.user_id, UserBalance.pending_paise).filter(UserBalance.user_id.in_(user_ids))
+        )
+    return totals
+
+
+def rebuild_pending_balances(user_id: Optional[int] = None) -> Dict[int, Tuple[int, int]]:
+    """
+    Recompute balance rows from the roundups table and fix any that drifted.
+
+    Checks one user, or every user with a balance row or a pending roundup.
+    Commits the fixes and returns ``user_id -> (old, new)`` pending_paise for
+    each corrected row.
+    """
+    actual_q = (
+        db.session.query(Roundup.user_id, db.func.sum(Roundup.amount_paise), db.func.count(Roundup.id))
+        .filter(Roundup.status == "pending")
+        .group_by(Roundup.user_id)
+    )
+    stored_q = db.session.query(UserBalance.user_id, UserBalance.pending_paise, UserBalance.pending_count)
+    if user_id is not None:
+        actual_q = actual_q.filter(Roundup.user_id == user_id)
+        stored_q = stored_q.filter(UserBalance.user_id == user_id)
+    actual = {uid: (int(paise), int(count)) for uid, paise, count in actual_q}
+    stored = {uid: (int(paise), int(count)) for uid, paise, count in stored_q}
+
+    fixed = {}
+    now = datetime.utcnow()
+    for uid in set(actual) | set(stored):
+        want = actual.get(uid, (0, 0))
+        have = stored.get(uid)
+        if have == want:
+            continue
+        if have is None:
+            db.session.add(UserBalance(user_id=uid, pending_paise=want[0], pending_count=want[1], version=1, updated_at=now))
+        else:
+            db.session.execute(
+                update(UserBalance)
+                .where(UserBalance.user_id == uid)
+                .values(pending_paise=want[0], pending_count=want[1], version=UserBalance.version + 1, updated_at=now)
+            )
+        fixed[uid] = ((have or (0, 0))[0], want[0])
+    db.session.commit()
+    return fixed
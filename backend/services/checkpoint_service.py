@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+from typing import Optional
+
+from ..extensions import db
+from ..models.job_checkpoint import JobCheckpoint
+
+
+def start_or_resume(job_name: str, resume_window: timedelta, now: Optional[datetime] = None) -> JobCheckpoint:
+    """
+    Checkpoint for this run of ``job_name`` (committed).
+
+    If the previous run is still marked running and started within
+    ``resume_window``, it was interrupted: its checkpoint is returned as is,
+    so the caller continues after ``last_key`` with the same
+    ``run_started_at``. Otherwise a fresh run starts from key 0.
+    """
+    now = now or datetime.utcnow()
+    checkpoint = db.session.get(JobCheckpoint, job_name)
+    if checkpoint is not None and checkpoint.status == "running" and checkpoint.run_started_at > now - resume_window:
+        return checkpoint
+    if checkpoint is None:
+        checkpoint = JobCheckpoint(job_name=job_name)
+        db.session.add(checkpoint)
+    checkpoint.status = "running"
+    checkpoint.run_started_at = now
+    checkpoint.last_key = 0
+    checkpoint.processed = 0
+    db.session.commit()
+    return checkpoint
+
+
+def request_run(job_name: str, now: Optional[datetime] = None) -> JobCheckpoint:
+    """
+    Mark ``job_name`` as needing a full run from key 0 (no commit).
+
+    Commit it with the change that makes the run necessary: the request then
+    survives a restart, and a worker finds it as a running checkpoint.
+    """
+    checkpoint = db.session.get(JobCheckpoint, job_name)
+    if checkpoint is None:
+        checkpoint = JobCheckpoint(job_name=job_name)
+        db.session.add(checkpoint)
+    checkpoint.status = "running"
+    checkpoint.run_started_at = now or datetime.utcnow()
+    checkpoint.last_key = 0
+    checkpoint.processed = 0
+    return checkpoint
+
+
+def advance(checkpoint: JobCheckpoint, last_key: int, processed: int) -> None:
+    """Record a chunk as done (no commit): commit it together with the chunk's own writes."""
+    checkpoint.last_key = max(checkpoint.last_key, last_key)
+    checkpoint.processed += processed
+
+
+def finish(checkpoint: JobCheckpoint) -> None:
+    """Mark the run completed and commit; the next run starts fresh."""
+    checkpoint.status = "completed"
+    db.session.commit()
@@ -0,0 +1,81 @@
+import hashlib
+import math
+import threading
+from typing import Iterable, Optional
+
+from flask import current_app
+
+
+class BloomFilter:
+    """
+    Fixed-size bloom filter over string keys.
+
+    ``key in bf`` never returns a false negative; false positives happen at
+    roughly ``error_rate`` once ``capacity`` keys have been added.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        capacity = max(1, int(capacity))
+        self.capacity = capacity
+        self.num_bits = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+        self.count = 0
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, key: str) -> None:
+        for pos in self._positions(key):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class RecentIdFilter:
+    """
+    Thread-safe "recently seen" set built from two rotating bloom filters.
+
+    New keys go into the current generation; once it holds ``capacity`` keys
+    it becomes the previous generation and a fresh one starts, so memory is
+    bounded and old ids age out after about two generations.
+    """
+
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 0.001):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._lock = threading.Lock()
+        self._current = BloomFilter(capacity, error_rate)
+        self._previous: Optional[BloomFilter] = None
+
+    def add_many(self, keys: Iterable[str]) -> None:
+        with self._lock:
+            for key in keys:
+                if self._current.count >= self.capacity:
+                    self._previous = self._current
+                    self._current = BloomFilter(self.capacity, self.error_rate)
+                self._current.add(key)
+
+    def might_contain(self, key: str) -> bool:
+        with self._lock:
+            return key in self._current or (self._previous is not None and key in self._previous)
+
+
+_recent_external_ids: Optional[RecentIdFilter] = None
+
+
+def get_recent_external_ids() -> RecentIdFilter:
+    global _recent_external_ids
+    if _recent_external_ids is not None:
+        return _recent_external_ids
+    _recent_external_ids = RecentIdFilter(
+        capacity=current_app.config.get("DEDUPE_FILTER_CAPACITY", 1_000_000),
+        error_rate=current_app.config.get("DEDUPE_FILTER_ERROR_RATE", 0.001),
+    )
+    return _recent_external_ids
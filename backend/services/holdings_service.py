@@ -0,0 +1,194 @@
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import bindparam, update
+
+from ..extensions import db
+from ..models.holding import Holding
+from ..models.investment import InvestmentOrder
+from ..models.redemption import Redemption
+from .balance_service import bump_portfolio_versions
+from .sql_helpers import insert_ignore
+
+HoldingKey = Tuple[int, str]
+
+
+def _holding_totals(keys: Iterable[HoldingKey]) -> Dict[HoldingKey, Tuple[int, int, int]]:
+    """(invested, redeemed, units_micro) per key from the orders and redemptions tables."""
+    keys = set(keys)
+    user_ids = {uid for uid, _ in keys}
+    totals = {key: [0, 0, 0] for key in keys}
+    for uid, product_type, paise, units in (
+        db.session.query(
+            InvestmentOrder.user_id, InvestmentOrder.product_type,
+            db.func.sum(InvestmentOrder.amount_paise), db.func.coalesce(db.func.sum(InvestmentOrder.units_micro), 0),
+        )
+        .filter(InvestmentOrder.user_id.in_(user_ids), InvestmentOrder.status == "executed")
+        .group_by(InvestmentOrder.user_id, InvestmentOrder.product_type)
+    ):
+        if (uid, product_type) in totals:
+            totals[(uid, product_type)][0] = int(paise)
+            totals[(uid, product_type)][2] += int(units)
+    for uid, product_type, paise, units in (
+        db.session.query(
+            Redemption.user_id, Redemption.product_type,
+            db.func.sum(Redemption.amount_paise), db.func.coalesce(db.func.sum(Redemption.units_micro), 0),
+        )
+        .filter(Redemption.user_id.in_(user_ids), Redemption.status == "executed")
+        .group_by(Redemption.user_id, Redemption.product_type)
+    ):
+        if (uid, product_type) in totals:
+            totals[(uid, product_type)][1] = int(paise)
+            totals[(uid, product_type)][2] = max(0, totals[(uid, product_type)][2] - int(units))
+    return {key: tuple(v) for key, v in totals.items()}
+
+
+def _seed_missing(keys: Iterable[HoldingKey]) -> set:
+    """Insert rows for keys that have none, from the source tables; returns the keys this call seeded."""
+    keys = set(keys)
+    if not keys:
+        return set()
+    existing = set(
+        db.session.query(Holding.user_id, Holding.product_type)
+        .filter(Holding.user_id.in_({uid for uid, _ in keys}))
+    )
+    seeded = set()
+    now = datetime.utcnow()
+    for key, (invested, redeemed, units) in _holding_totals(keys - existing).items():
+        inserted = db.session.execute(
+            insert_ignore(Holding, ["user_id", "product_type"]).values(
+                user_id=key[0], product_type=key[1], invested_paise=invested,
+                redeemed_paise=redeemed, units_micro=units, updated_at=now,
+            )
+        ).rowcount
+        if inserted:
+            seeded.add(key)
+    return seeded
+
+
+def add_to_holdings(fills: Iterable[dict]) -> None:
+    """
+    Add executed orders to their holdings (no commit).
+
+    Each fill has user_id, product_type, amount_paise and units_micro (may be
+    None). Call it in the same DB transaction that marks the orders executed,
+    after that change has been flushed: a missing row is seeded from the
+    orders table, which then already includes these orders. Existing rows get
+    a relative UPDATE, so concurrent writers never lose each other's fills.
+    """
+    deltas: Dict[HoldingKey, list] = {}
+    for f in fills:
+        d = deltas.setdefault((f["user_id"], f["product_type"]), [0, 0])
+        d[0] += f["amount_paise"]
+        d[1] += f.get("units_micro") or 0
+    if not deltas:
+        return
+    bump_portfolio_versions(uid for uid, _ in deltas)
+    seeded = _seed_missing(deltas)
+    params = [
+        {"uid": uid, "product": product, "paise": paise, "units": units}
+        for (uid, product), (paise, units) in deltas.items() if (uid, product) not in seeded
+    ]
+    if not params:
+        return
+    table = Holding.__table__
+    db.session.execute(
+        update(table)
+        .where(table.c.user_id == bindparam("uid"), table.c.product_type == bindparam("product"))
+        .values(
+            invested_paise=table.c.invested_paise + bindparam("paise"),
+            units_micro=table.c.units_micro + bindparam("units"),
+            updated_at=datetime.utcnow(),
+        ),
+        params,
+    )
+
+
+def redeem_from_holding(user_id: int, product_type: str, amount_paise: int, units_micro: Optional[int] = None) -> bool:
+    """
+    Take ``amount_paise`` off a holding if that much is still available (no commit).
+
+    A single conditional UPDATE: the availability check and the decrement
+    happen on one row atomically, so of two concurrent redemptions that each
+    fit but not together, exactly one succeeds. Call it before adding the
+    Redemption row. Returns False when the holding cannot cover the amount.
+    """
+    stmt = (
+        update(Holding)
+        .where(
+            Holding.user_id == user_id,
+            Holding.product_type == product_type,
+            Holding.invested_paise - Holding.redeemed_paise >= amount_paise,
+        )
+        .values(
+            redeemed_paise=Holding.redeemed_paise + amount_paise,
+            units_micro=db.case(
+                (Holding.units_micro > (units_micro or 0), Holding.units_micro - (units_micro or 0)), else_=0
+            ),
+            updated_at=datetime.utcnow(),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if db.session.execute(stmt).rowcount == 1 or (
+        _seed_missing([(user_id, product_type)]) and db.session.execute(stmt).rowcount == 1
+    ):
+        bump_portfolio_versions([user_id])
+        return True
+    return False
+
+
+def get_available_paise(user_id: int, product_type: str) -> int:
+    """Invested minus redeemed paise for one product, from its holding row."""
+    row = (
+        db.session.query(Holding.invested_paise - Holding.redeemed_paise)
+        .filter(Holding.user_id == user_id, Holding.product_type == product_type)
+        .first()
+    )
+    if row is None:
+        # No order has been executed for this product since the table was backfilled.
+        invested, redeemed, _ = _holding_totals([(user_id, product_type)])[(user_id, product_type)]
+        return invested - redeemed
+    return int(row[0])
+
+
+def rebuild_holdings(user_id: Optional[int] = None) -> Dict[HoldingKey, Tuple[int, int]]:
+    """
+    Recompute holding rows from orders and redemptions and fix any that drifted.
+
+    Checks one user, or every user with a holding or an executed order.
+    Commits the fixes and returns ``(user_id, product_type) -> (old, new)``
+    available paise for each corrected row.
+    """
+    stored_q = db.session.query(
+        Holding.user_id, Holding.product_type, Holding.invested_paise, Holding.redeemed_paise, Holding.units_micro
+    )
+    keys_q = db.session.query(InvestmentOrder.user_id, InvestmentOrder.product_type).filter(
+        InvestmentOrder.status == "executed"
+    ).distinct()
+    if user_id is not None:
+        stored_q = stored_q.filter(Holding.user_id == user_id)
+        keys_q = keys_q.filter(InvestmentOrder.user_id == user_id)
+    stored = {(uid, p): (int(i), int(r), int(u)) for uid, p, i, r, u in stored_q}
+    keys = set(stored) | {(uid, p) for uid, p in keys_q}
+
+    fixed = {}
+    now = datetime.utcnow()
+    actual = _holding_totals(keys) if keys else {}
+    for key in keys:
+        want = actual[key]
+        have = stored.get(key)
+        if have == want:
+            continue
+        if have is None:
+            db.session.add(Holding(user_id=key[0], product_type=key[1], invested_paise=want[0],
+                                   redeemed_paise=want[1], units_micro=want[2], updated_at=now))
+        else:
+            db.session.execute(
+                update(Holding)
+                .where(Holding.user_id == key[0], Holding.product_type == key[1])
+                .values(invested_paise=want[0], redeemed_paise=want[1], units_micro=want[2], updated_at=now)
+            )
+        fixed[key] = ((have[0] - have[1]) if have else 0, want[0] - want[1])
+    bump_portfolio_versions(uid for uid, _ in fixed)
+    db.session.commit()
+    return fixed
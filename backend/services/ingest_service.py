@@ -0,0 +1,270 @@
+import codecs
+import csv
+import json
+from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP, InvalidOperation
+from itertools import islice
+from typing import Callable, Dict, IO, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import insert
+
+from ..extensions import db
+from ..models.transaction import Transaction
+from ..models.roundup import Roundup
+from ..models.cap_setting import CapSetting
+from .roundup_service import claim_cap_allowance
+from .balance_service import adjust_pending_balance
+from .roundup_engine import calculate_roundups
+from .dedupe_filter import get_recent_external_ids
+from .sql_helpers import insert_ignore
+
+
+def to_paise(value) -> int:
+    d = Decimal(str(value)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+    return int(d * 100)
+
+
+def _parse_item(item) -> Tuple[Optional[Dict], Optional[str]]:
+    """Normalize one inbound transaction dict into a row for bulk insert."""
+    if not isinstance(item, dict):
+        return None, "item must be an object"
+    amount = item.get("amount")
+    if amount is None or amount == "":
+        return None, "amount required"
+    try:
+        amount_paise = to_paise(amount)
+    except (InvalidOperation, ValueError, TypeError):
+        return None, "amount must be a number"
+    if amount_paise <= 0:
+        return None, "amount must be > 0"
+    row = {
+        "amount_paise": amount_paise,
+        "merchant": item.get("merchant"),
+        "description": item.get("description"),
+    }
+    ext_id = item.get("external_transaction_id")
+    if ext_id not in (None, ""):
+        ext_id = str(ext_id).strip()
+        if not ext_id or len(ext_id) > 255:
+            return None, "external_transaction_id must be 1-255 characters"
+        row["external_transaction_id"] = ext_id
+    ts = item.get("timestamp")
+    if ts:
+        try:
+            row["timestamp"] = datetime.fromisoformat(str(ts))
+        except ValueError:
+            return None, "timestamp must be ISO 8601"
+    return row, None
+
+
+def existing_transactions_by_external_id(external_ids: Iterable[str]) -> Dict[str, Tuple[int, int]]:
+    """Map external_transaction_id -> (transaction id, user id) for ids already stored."""
+    external_ids = list(external_ids)
+    if not external_ids:
+        return {}
+    rows = (
+        db.session.query(Transaction.external_transaction_id, Transaction.id, Transaction.user_id)
+        .filter(Transaction.external_transaction_id.in_(external_ids))
+        .all()
+    )
+    return {ext_id: (tx_id, uid) for ext_id, tx_id, uid in rows}
+
+
+def ingest_transactions(user, items: List[Dict], commit: bool = True) -> Dict:
+    """
+    Insert a batch of transactions for one user and generate their roundups.
+
+    Roundups are computed in a single pass and granted against the cap
+    counters with one claim for the whole batch, then transactions and
+    roundups are written with bulk INSERTs inside one DB transaction.
+    Invalid items are reported and skipped; they never abort the rest of
+    the batch.
+
+    Items carrying ``external_transaction_id`` are idempotent: ids the
+    in-process bloom filter has seen before are confirmed with one lookup and
+    skipped, the rest go through ``INSERT ... ON CONFLICT DO NOTHING``, and
+    only rows that were actually inserted get a roundup. Redelivered items
+    come back with status ``duplicate`` and the stored transaction id.
+
+    Returns a dict with per-item ``results`` (same order as ``items``) and
+    batch totals.
+    """
+    now = datetime.utcnow()
+    results: List[Dict] = [None] * len(items)
+    keyed: Dict[str, Tuple[int, Dict]] = {}
+    repeats: List[Tuple[int, str]] = []
+    plain: List[Tuple[int, Dict]] = []
+    for i, item in enumerate(items):
+        row, error = _parse_item(item)
+        if error:
+            results[i] = {"index": i, "status": "error", "error": error}
+            continue
+        row["user_id"] = user.id
+        row.setdefault("timestamp", now)
+        ext_id = row.get("external_transaction_id")
+        if ext_id is None:
+            plain.append((i, row))
+        elif ext_id in keyed:
+            repeats.append((i, ext_id))
+        else:
+            keyed[ext_id] = (i, row)
+
+    summary = {"results": results, "created": 0, "duplicates": 0, "roundups_created": 0, "roundup_total_paise": 0}
+    if not keyed and not plain:
+        return summary
+
+    seen_filter = get_recent_external_ids()
+    known: Dict[str, Tuple[int, int]] = {}
+    maybe_seen = [ext_id for ext_id in keyed if seen_filter.might_contain(ext_id)]
+    if maybe_seen:
+        known.update(existing_transactions_by_external_id(maybe_seen))
+
+    inserted: List[Tuple[int, int, Dict]] = []
+    to_insert = [row for ext_id, (_, row) in keyed.items() if ext_id not in known]
+    if to_insert:
+        stmt = insert_ignore(Transaction, ["external_transaction_id"]).returning(
+            Transaction.id, Transaction.external_transaction_id
+        )
+        new_ids = {ext_id: tx_id for tx_id, ext_id in db.session.execute(stmt, to_insert)}
+        lost = [row["external_transaction_id"] for row in to_insert if row["external_transaction_id"] not in new_ids]
+        if lost:
+            # Inserted concurrently by another worker, or stored before this process started.
+            known.update(existing_transactions_by_external_id(lost))
+        for ext_id, tx_id in new_ids.items():
+            pos, row = keyed[ext_id]
+            inserted.append((pos, tx_id, row))
+    if plain:
+        plain_ids = db.session.scalars(
+            insert(Transaction).returning(Transaction.id, sort_by_parameter_order=True),
+            [row for _, row in plain],
+        ).all()
+        inserted.extend((pos, tx_id, row) for (pos, row), tx_id in zip(plain, plain_ids))
+    inserted.sort(key=lambda entry: entry[0])
+
+    cap = CapSetting.query.filter_by(user_id=user.id).first()
+    granted = [0] * len(inserted)
+    if inserted and not (cap and cap.investing_paused):
+        raw = calculate_roundups([row["amount_paise"] for _, _, row in inserted], user.rounding_base).tolist()
+        granted = claim_cap_allowance(user.id, cap, raw, now)
+
+    roundup_rows: List[Dict] = []
+    for (pos, tx_id, row), allowed in zip(inserted, granted):
+        if allowed > 0:
+            roundup_rows.append({
+                "user_id": user.id,
+                "transaction_id": tx_id,
+                "amount_paise": allowed,
+                "status": "pending",
+                "created_at": now,
+            })
+        results[pos] = {"index": pos, "status": "created", "transaction_id": tx_id, "roundup_paise": allowed}
+
+    if roundup_rows:
+        db.session.execute(insert(Roundup), roundup_rows)
+        adjust_pending_balance(user.id, sum(r["amount_paise"] for r in roundup_rows), len(roundup_rows))
+    if commit:
+        db.session.commit()
+
+    ids_by_external = {row["external_transaction_id"]: tx_id for _, tx_id, row in inserted if row.get("external_transaction_id")}
+    for ext_id, (tx_id, owner_id) in known.items():
+        if owner_id == user.id:
+            ids_by_external[ext_id] = tx_id
+    skipped = [(pos, ext_id) for ext_id, (pos, _) in keyed.items() if results[pos] is None] + repeats
+    for pos, ext_id in skipped:
+        if ext_id in ids_by_external:
+            results[pos] = {"index": pos, "status": "duplicate", "transaction_id": ids_by_external[ext_id]}
+        else:
+            # The id belongs to another user's transaction.
+            results[pos] = {"index": pos, "status": "error", "error": "external_transaction_id already used"}
+    seen_filter.add_many(keyed.keys())
+
+    summary["created"] = len(inserted)
+    summary["duplicates"] = sum(1 for r in results if r and r["status"] == "duplicate")
+    summary["roundups_created"] = len(roundup_rows)
+    summary["roundup_total_paise"] = sum(r["amount_paise"] for r in roundup_rows)
+    return summary
+
+
+STATEMENT_FORMATS = {"ndjson", "csv"}
+
+# Per-import cap on how many row errors are echoed back; the rest are only counted.
+MAX_REPORTED_ERRORS = 100
+
+
+def iter_text_lines(stream: IO[bytes]) -> Iterator[str]:
+    """Decode a binary stream line by line without reading it all into memory."""
+    return codecs.iterdecode(iter(stream.readline, b""), "utf-8-sig")
+
+
+def iter_statement_rows(lines: Iterable[str], fmt: str) -> Iterator[Dict]:
+    """
+    Yield one transaction dict per statement row.
+
+    ``ndjson`` expects one JSON object per line; ``csv`` expects a header row
+    with at least an ``amount`` column (``merchant``, ``description`` and
+    ``timestamp`` are optional). Blank lines are skipped. Rows that cannot be
+    decoded are yielded as-is so the ingest step reports them per row.
+    """
+    if fmt == "csv":
+        for row in csv.DictReader(lines):
+            yield {k.strip().lower(): (v.strip() if isinstance(v, str) else v) for k, v in row.items() if k}
+        return
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield line
+
+
+def chunked(rows: Iterable, size: int) -> Iterator[List]:
+    it = iter(rows)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def import_statement(
+    user,
+    rows: Iterable[Dict],
+    chunk_size: int = 1000,
+    progress: Optional[Callable[[Dict], None]] = None,
+) -> Dict:
+    """
+    Stream statement rows into ``Transaction``/``Roundup`` in fixed-size chunks.
+
+    Each chunk goes through ``ingest_transactions`` and is committed on its own,
+    so memory stays bounded by ``chunk_size`` regardless of file size and a
+    failure only loses the chunk in flight. ``progress`` is called after every
+    chunk with the running totals.
+    """
+    totals = {
+        "rows": 0,
+        "created": 0,
+        "failed": 0,
+        "duplicates": 0,
+        "roundups_created": 0,
+        "roundup_total_paise": 0,
+        "chunks": 0,
+        "errors": [],
+    }
+    for chunk in chunked(rows, chunk_size):
+        result = ingest_transactions(user, chunk)
+        for item in result["results"]:
+            if item["status"] == "error":
+                totals["failed"] += 1
+                if len(totals["errors"]) < MAX_REPORTED_ERRORS:
+                    totals["errors"].append({"row": totals["rows"] + item["index"] + 1, "error": item["error"]})
+        totals["rows"] += len(chunk)
+        totals["created"] += result["created"]
+        totals["duplicates"] += result["duplicates"]
+        totals["roundups_created"] += result["roundups_created"]
+        totals["roundup_total_paise"] += result["roundup_total_paise"]
+        totals["chunks"] += 1
+        if progress:
+            progress(totals)
+    return totals
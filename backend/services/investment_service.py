@@ -1,56 +1,82 @@
 from ..extensions import db
 from ..models.roundup import Roundup
 from ..models.investment import InvestmentOrder
-from ..models.ledger import LedgerEntry
-from ..providers import get_mf_provider, get_gold_provider
-from typing import Dict, List
+from .allocation_engine import allocate_one
+from .omnibus_service import provider_for
+from .order_outbox_service import apply_order_status, dispatch_claimed, enqueue_order, reserve_roundups
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from flask import current_app
+from typing import Dict, List, Optional
 import logging
+import threading
+import time
+
+_provider_pool: Optional[ThreadPoolExecutor] = None
+_provider_pool_lock = threading.Lock()
+
 
 def _get_provider(product_type: str):
-    if product_type == "mf":
-        return get_mf_provider()
-    elif product_type == "gold":
-        return get_gold_provider()
-    return None
+    return provider_for(product_type)
+
+
+def _get_provider_pool() -> ThreadPoolExecutor:
+    global _provider_pool
+    if _provider_pool is not None:
+        return _provider_pool
+    with _provider_pool_lock:
+        if _provider_pool is None:
+            _provider_pool = ThreadPoolExecutor(
+                max_workers=current_app.config.get("PROVIDER_MAX_WORKERS", 8),
+                thread_name_prefix="provider",
+            )
+    return _provider_pool
+
+
+def _place_orders_concurrently(calls: List[tuple]) -> List[tuple]:
+    """
+    Run ``provider.place_order(user_id, amount, product_type)`` for each call at once.
+
+    Only the network calls run on the pool; callers apply every DB change on
+    their own thread afterwards. Returns ``(response, error)`` per call, in
+    order. A call still running at the deadline yields a ``TimeoutError``.
+    """
+    pool = _get_provider_pool()
+    futures = [pool.submit(provider.place_order, user_id, amount, product_type) for provider, user_id, amount, product_type in calls]
+    deadline = time.monotonic() + current_app.config.get("PROVIDER_TIMEOUT_SECONDS", 10)
+    results = []
+    for future in futures:
+        try:
+            results.append((future.result(timeout=max(0.0, deadline - time.monotonic())), None))
+        except FutureTimeout:
+            future.cancel()
+            results.append((None, TimeoutError("provider call timed out")))
+        except Exception as e:
+            results.append((None, e))
+    return results
 
 def execute_pending_roundups(user_id: int, product_type: str = "mf"):
     pending = Roundup.query.filter_by(user_id=user_id, status="pending").all()
     amount = sum(r.amount_paise for r in pending)
     if amount <= 0:
         return None
-    
-    # Create order as pending initially
+
+    # Order, roundup reservation and outbox entry commit together; the provider
+    # is only called once that commit is done.
     order = InvestmentOrder(user_id=user_id, product_type=product_type, amount_paise=amount, status="pending")
     db.session.add(order)
     db.session.flush()
-
-    # Call provider
-    provider = _get_provider(product_type)
-    print(f"DEBUG: execute_pending_roundups pt={product_type} provider={provider}")
-    if provider:
-        try:
-            resp = provider.place_order(user_id, amount, product_type)
-            print(f"DEBUG: provider response {resp}")
-            order.external_order_id = resp.get("external_order_id")
-            if resp.get("status"):
-                order.status = str(resp.get("status")).lower()
-        except Exception as e:
-            order.status = "failed"
-            logging.error(f"Investment failed for user {user_id}: {e}")
-    else:
-        # If no provider (development fallback), mark executed
-        order.status = "executed"
-
-    # Only update roundups/ledger if executed or pending (provider dependent)
-    # For now, if status is executed, we consider it done.
-    if order.status == "executed":
-        for r in pending:
-            r.status = "invested"
-            r.investment_id = order.id
-        entry = LedgerEntry(user_id=user_id, type="debit", category="investment", amount_paise=amount, reference_type="InvestmentOrder", reference_id=order.id)
-        db.session.add(entry)
-    
+    reserve_roundups(order, pending)
+    token = enqueue_order(order, claim=True)
     db.session.commit()
+
+    # Dispatch right away so the caller still sees the outcome; if this
+    # process dies here the outbox worker sends it once the lease expires.
+    try:
+        dispatch_claimed(token)
+    except Exception as e:
+        db.session.rollback()
+        logging.error(f"Eager dispatch of order {order.id} failed, left to the outbox worker: {e}")
+    db.session.refresh(order)
     return order
 
 
@@ -60,59 +86,71 @@ def execute_pending_roundups_allocated(user_id: int, allocation_percent: Dict[st
     if total_amount <= 0:
         return []
 
-    # Compute allocations with integer paise rounding, assign remainder to the first key
-    keys = [k for k, p in allocation_percent.items() if p > 0]
-    if not keys:
+    # Largest-remainder split: exact total, each product within one paisa of its share
+    allocated = allocate_one(total_amount, allocation_percent)
+    if not allocated:
         return []
-    allocated = {}
-    allocated_sum = 0
-    for k in keys:
-        amt = (total_amount * allocation_percent[k]) // 100
-        allocated[k] = amt
-        allocated_sum += amt
-    remainder = total_amount - allocated_sum
-    if remainder:
-        first_key = keys[0]
-        allocated[first_key] += remainder
-
-    orders: List[InvestmentOrder] = []
-    first_order_id = None
-    
-    # Process each allocation
-    for product_type, amt in allocated.items():
-        if amt <= 0:
+
+    # Nothing is written until every provider call has returned, so no write
+    # transaction is held open across the network calls.
+    orders = [
+        InvestmentOrder(user_id=user_id, product_type=product_type, amount_paise=amt, status="pending")
+        for product_type, amt in allocated if amt > 0
+    ]
+    # Providers are resolved here (they read app config); only their calls run in parallel.
+    providers = [_get_provider(o.product_type) for o in orders]
+    placed = [o for o, provider in zip(orders, providers) if provider]
+    responses = _place_orders_concurrently([
+        (provider, user_id, o.amount_paise, o.product_type) for o, provider in zip(orders, providers) if provider
+    ])
+    timed_out = set()
+    for o, (resp, error) in zip(placed, responses):
+        if isinstance(error, TimeoutError):
+            # The provider may still execute it: keep the order pending and hand it to the outbox.
+            timed_out.add(id(o))
+        elif error is not None:
+            o.status = "failed"
+            logging.error(f"Investment failed for user {user_id}: {error}")
+        else:
+            o.external_order_id = resp.get("external_order_id")
+            o.units_micro = resp.get("units_micro")
+            if resp.get("status"):
+                o.status = str(resp.get("status")).lower()
+    for o, provider in zip(orders, providers):
+        if not provider:
+            o.status = "executed"
+
+    db.session.add_all(orders)
+    db.session.flush()
+    for o, roundups in zip(orders, _roundups_per_order(pending, orders)):
+        if o.status == "failed":
+            # Its roundups stay pending for the next investment.
             continue
-            
-        o = InvestmentOrder(user_id=user_id, product_type=product_type, amount_paise=amt, status="pending")
-        db.session.add(o)
-        db.session.flush()
-
-        provider = _get_provider(product_type)
-        if provider:
-            try:
-                resp = provider.place_order(user_id, amt, product_type)
-                o.external_order_id = resp.get("external_order_id")
-                if resp.get("status"):
-                    o.status = str(resp.get("status")).lower()
-            except Exception as e:
-                o.status = "failed"
-                logging.error(f"Investment failed for user {user_id}: {e}")
+        status, o.status = o.status, "pending"
+        reserve_roundups(o, roundups)
+        if id(o) in timed_out:
+            logging.error(f"Investment order {o.id} for user {user_id} timed out; left to the outbox")
+            # Claimed but not dispatched: the outbox worker resends it only once the lease
+            # expires, by when the call still in flight has had time to land.
+            enqueue_order(o, claim=True)
         else:
-             o.status = "executed"
-
-        if first_order_id is None and o.status == "executed":
-            first_order_id = o.id
-        orders.append(o)
-
-    # Update roundups if at least one order succeeded - simplified logic
-    # Ideally detailed mapping but for now we link to the first successful one
-    if first_order_id is not None:
-        for r in pending:
-            r.status = "invested"
-            r.investment_id = first_order_id
-        entry = LedgerEntry(user_id=user_id, type="debit", category="investment", amount_paise=total_amount, reference_type="InvestmentOrder", reference_id=first_order_id)
-        db.session.add(entry)
-    
+            # Executed orders settle now; accepted ones keep their roundups reserved for the reconciler.
+            apply_order_status(o, status)
     db.session.commit()
 
     return orders
+
+
+def _roundups_per_order(roundups: List[Roundup], orders: List[InvestmentOrder]) -> List[List[Roundup]]:
+    """
+    Assign whole roundups to the orders in turn, each taking roundups until
+    its amount is covered, so a failed order hands back only its own share.
+    """
+    shares: List[List[Roundup]] = [[] for _ in orders]
+    i, covered = 0, 0
+    for r in sorted(roundups, key=lambda r: r.id):
+        while i < len(orders) - 1 and covered >= orders[i].amount_paise:
+            i, covered = i + 1, 0
+        shares[i].append(r)
+        covered += r.amount_paise
+    return shares
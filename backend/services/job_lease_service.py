@@ -0,0 +1,152 @@
+"""
+Leader leases for scheduled jobs, so every replica can run a job while only one does the work.
+
+A lease is named after a job (``mandate_debits``) or a job partition
+(``debit_scheduler:3``). On PostgreSQL the holder takes a session-level
+advisory lock on a dedicated connection: the database releases it the moment
+that connection dies, so a crashed pod never blocks the next leader. On other
+databases (SQLite) leadership is the ``job_leases`` row itself: a conditional
+UPDATE takes it when it is free or expired, and the holder heartbeats it
+forward before ``ttl`` runs out. The row is written on both, so operators can
+see who leads what.
+"""
+
+import hashlib
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import or_, text, update
+
+from ..extensions import db
+from ..models.job_lease import JobLease
+from .sql_helpers import dialect_name, insert_ignore
+
+
+def advisory_key(name: str) -> int:
+    """Stable signed 64-bit key for pg_try_advisory_lock."""
+    return int.from_bytes(hashlib.blake2b(name.encode(), digest_size=8).digest(), "big", signed=True)
+
+
+class JobLeaseHolder:
+    """
+    One worker's claim on a named lease.
+
+    Call ``hold()`` at least every ``ttl / 3`` (e.g. once per batch or tick):
+    it acquires the lease when free, heartbeats it when held, and returns
+    whether this worker leads. Lease writes commit the session, so call it
+    between units of work. Usable as a context manager that releases on exit.
+    """
+
+    def __init__(self, name: str, ttl: timedelta, owner: Optional[str] = None):
+        self.name = name
+        self.ttl = ttl
+        self.owner = owner or uuid.uuid4().hex
+        self.held = False
+        self._lock_conn = None
+        self._last_heartbeat: Optional[datetime] = None
+
+    def __enter__(self):
+        self.hold()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+    def hold(self, now: Optional[datetime] = None) -> bool:
+        now = now or datetime.utcnow()
+        if not self.held:
+            return self.acquire(now)
+        if now - self._last_heartbeat >= self.ttl / 3:
+            return self.renew(now)
+        return True
+
+    def acquire(self, now: Optional[datetime] = None) -> bool:
+        """Take the lease if no live holder has it; commits."""
+        now = now or datetime.utcnow()
+        if dialect_name() == "postgresql":
+            if not self._try_advisory_lock():
+                return False
+            free = JobLease.name == self.name
+        else:
+            free = or_(JobLease.owner.is_(None), JobLease.lease_until < now, JobLease.owner == self.owner)
+        db.session.execute(insert_ignore(JobLease, ["name"]).values(name=self.name))
+        taken = db.session.execute(
+            update(JobLease)
+            .where(JobLease.name == self.name, free)
+            .values(owner=self.owner, lease_until=now + self.ttl, acquired_at=now, heartbeat_at=now),
+            execution_options={"synchronize_session": False},
+        ).rowcount == 1
+        db.session.commit()
+        if not taken:
+            self._unlock()
+            return False
+        self.held = True
+        self._last_heartbeat = now
+        print(f"[LEASE] {self.owner} now leads {self.name}")
+        return True
+
+    def renew(self, now: Optional[datetime] = None) -> bool:
+        """Heartbeat the lease forward; False (and no longer held) if it was lost. Commits."""
+        now = now or datetime.utcnow()
+        if self._lock_conn is not None:
+            try:
+                self._lock_conn.execute(text("SELECT 1"))
+                self._lock_conn.commit()
+            except Exception:
+                # The advisory lock went with the connection; someone else may lead by now.
+                self._lock_conn.invalidate()
+                self._lock_conn = None
+                self.held = False
+                return False
+        renewed = db.session.execute(
+            update(JobLease)
+            .where(JobLease.name == self.name, JobLease.owner == self.owner)
+            .values(lease_until=now + self.ttl, heartbeat_at=now),
+            execution_options={"synchronize_session": False},
+        ).rowcount == 1
+        db.session.commit()
+        if not renewed:
+            print(f"[LEASE] {self.owner} lost {self.name}")
+            self._unlock()
+            self.held = False
+            return False
+        self._last_heartbeat = now
+        return True
+
+    def release(self) -> None:
+        """Give the lease up so a standby can take it right away; commits."""
+        if self.held:
+            db.session.execute(
+                update(JobLease)
+                .where(JobLease.name == self.name, JobLease.owner == self.owner)
+                .values(owner=None, lease_until=None),
+                execution_options={"synchronize_session": False},
+            )
+            db.session.commit()
+            self.held = False
+        self._unlock()
+
+    def _try_advisory_lock(self) -> bool:
+        if self._lock_conn is None:
+            self._lock_conn = db.engine.connect()
+        locked = self._lock_conn.execute(
+            text("SELECT pg_try_advisory_lock(:key)"), {"key": advisory_key(self.name)}
+        ).scalar()
+        self._lock_conn.commit()
+        if not locked:
+            self._unlock()
+        return bool(locked)
+
+    def _unlock(self) -> None:
+        if self._lock_conn is None:
+            return
+        try:
+            self._lock_conn.execute(text("SELECT pg_advisory_unlock_all()"))
+            self._lock_conn.commit()
+        except Exception:
+            # Never hand a connection that may still hold the lock back to the pool.
+            self._lock_conn.invalidate()
+        finally:
+            self._lock_conn.close()
+            self._lock_conn = None
@@ -0,0 +1,70 @@
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import insert, update
+
+from ..extensions import db
+from ..models.event import EventLog
+from ..models.mandate import Mandate
+from ..models.user import User
+
+
+def pre_debit_message(amount_paise: int) -> str:
+    return f"Auto-debit scheduled: ₹{amount_paise / 100:.2f} will be debited in 24 hours for your roundup investment"
+
+
+def dispatch_notifications(messages: List[dict]) -> int:
+    """
+    Hand user notifications to the delivery channels in batches.
+
+    Each message has user_id, event_type and message. Returns how many were
+    dispatched. Sized by NOTIFY_DISPATCH_BATCH so a provider's bulk API gets
+    one call per batch rather than one per user.
+    """
+    size = max(1, current_app.config.get("NOTIFY_DISPATCH_BATCH", 500))
+    for start in range(0, len(messages), size):
+        batch = messages[start:start + size]
+        # TODO: Integrate with SMS provider (Twilio, MSG91, etc.) bulk send
+        # TODO: Send email via SendGrid/AWS SES
+        # TODO: Send push notification via Firebase multicast
+        print(f"[NOTIFY] Dispatched {len(batch)} notifications ({batch[0]['event_type']} ...)")
+    return len(messages)
+
+
+def send_pre_debit_notifications(notices: Iterable[Tuple[Mandate, int]], now: Optional[datetime] = None) -> List[dict]:
+    """
+    Record 24-hour advance notice for a set of mandate debits (RBI compliance), no commit.
+
+    One multi-row INSERT writes every ``pre_debit_sent`` event and one UPDATE
+    stamps ``pre_debit_notification_sent_at`` on the mandates. Mandates whose
+    user no longer exists are skipped. Returns the messages, one per notified
+    mandate: pass them to dispatch_notifications once the caller has
+    committed, so no user is told about a debit the database never recorded.
+    """
+    notices = list(notices)
+    if not notices:
+        return []
+    now = now or datetime.utcnow()
+    known = {
+        uid for (uid,) in db.session.query(User.id).filter(User.id.in_({m.user_id for m, _ in notices}))
+    }
+    notices = [(m, amount) for m, amount in notices if m.user_id in known]
+    if not notices:
+        return []
+
+    rows = [
+        {
+            "user_id": m.user_id,
+            "event_type": "pre_debit_sent",
+            "message": pre_debit_message(amount),
+            "amount_paise": amount,
+            "created_at": now,
+        }
+        for m, amount in notices
+    ]
+    db.session.execute(insert(EventLog), rows)
+    db.session.execute(
+        update(Mandate).where(Mandate.id.in_([m.id for m, _ in notices])).values(pre_debit_notification_sent_at=now)
+    )
+    return rows
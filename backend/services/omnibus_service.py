@@ -0,0 +1,125 @@
+"""
+Omnibus order aggregation.
+
+Instead of one provider call per user per product, all orders collected in a
+batch window (one sweep chunk) are summed per scheme into a single omnibus
+order, sent to the provider's bulk ``place_orders`` API, and the executed
+units are split back to the individual orders pro rata by amount.
+"""
+
+import logging
+import uuid
+from collections import defaultdict
+from typing import Dict, List
+
+from ..providers import get_gold_provider, get_mf_provider
+
+# Scheme each product type is bought through.
+SCHEME_CODES: Dict[str, str] = {
+    "mf": "MOCK-LIQUID-G",
+    "mf_debt": "MOCK-DEBT-G",
+    "mf_equity": "MOCK-EQUITY-G",
+    "gold": "GOLD-24K",
+}
+
+
+def scheme_for(product_type: str) -> str:
+    return SCHEME_CODES.get(product_type, SCHEME_CODES["mf"])
+
+
+def provider_for(product_type: str):
+    if product_type == "gold":
+        return get_gold_provider()
+    if product_type == "mf" or product_type.startswith("mf_"):
+        return get_mf_provider()
+    return None
+
+
+def split_units(total_units: int, amounts: List[int]) -> List[int]:
+    """
+    Split ``total_units`` across orders in proportion to ``amounts``.
+
+    Largest-remainder rounding on integers: every share is the floor of its
+    exact share, and the leftover units go to the largest fractional parts
+    (earliest order first on ties), so the shares always sum to the total.
+    """
+    total_amount = sum(amounts)
+    if total_amount <= 0:
+        return [0] * len(amounts)
+    shares = []
+    remainders = []
+    for i, amount in enumerate(amounts):
+        share, rem = divmod(total_units * amount, total_amount)
+        shares.append(share)
+        remainders.append((-rem, i))
+    for _, i in sorted(remainders)[:total_units - sum(shares)]:
+        shares[i] += 1
+    return shares
+
+
+def _place_one_by_one(provider, orders: List[Dict]) -> None:
+    for order in orders:
+        try:
+            resp = provider.place_order(order["user_id"], order["amount_paise"], order["product_type"])
+            order["external_order_id"] = resp.get("external_order_id")
+            order["units_micro"] = resp.get("units_micro")
+            if resp.get("status"):
+                order["status"] = str(resp.get("status")).lower()
+        except Exception as e:
+            order["status"] = "failed"
+            order["error"] = str(e)
+            logging.error(f"Investment failed for user {order['user_id']}: {e}")
+
+
+def place_omnibus_orders(orders: List[Dict]) -> None:
+    """
+    Place per-user orders as one omnibus order per scheme.
+
+    Each order dict needs user_id, product_type and amount_paise; status,
+    external_order_id and units_micro are filled in place, plus ``error``
+    when the provider call itself raised (as opposed to rejecting the order). Orders with no
+    provider are marked executed (development fallback, as for single
+    orders). Providers without ``place_orders`` are called per order.
+    """
+    groups = defaultdict(list)
+    for order in orders:
+        provider = provider_for(order["product_type"])
+        if provider is None:
+            order["status"] = "executed"
+            continue
+        groups[(provider, scheme_for(order["product_type"]), order["product_type"])].append(order)
+
+    by_provider = defaultdict(list)
+    for (provider, scheme, product_type), members in groups.items():
+        by_provider[provider].append({
+            "reference": uuid.uuid4().hex,
+            "scheme_code": scheme,
+            "product_type": product_type,
+            "amount_paise": sum(o["amount_paise"] for o in members),
+            "members": members,
+        })
+
+    for provider, omnibus in by_provider.items():
+        try:
+            results = provider.place_orders([{k: v for k, v in o.items() if k != "members"} for o in omnibus])
+        except NotImplementedError:
+            for o in omnibus:
+                _place_one_by_one(provider, o["members"])
+            continue
+        except Exception as e:
+            logging.error(f"Omnibus placement failed for {len(omnibus)} schemes: {e}")
+            results = [{"reference": o["reference"], "status": "failed", "error": str(e)} for o in omnibus]
+
+        by_reference = {r.get("reference"): r for r in results}
+        for o in omnibus:
+            resp = by_reference.get(o["reference"], {"status": "failed"})
+            status = str(resp.get("status") or "failed").lower()
+            units = resp.get("units_micro")
+            shares = split_units(int(units), [m["amount_paise"] for m in o["members"]]) if units is not None else None
+            for i, member in enumerate(o["members"]):
+                member["status"] = status
+                member["external_order_id"] = resp.get("external_order_id")
+                if resp.get("error"):
+                    member["error"] = resp["error"]
+                if shares is not None:
+                    member["units_micro"] = shares[i]
@@ -0,0 +1,294 @@
+"""
+Transactional outbox for investment orders.
+
+An order, the reservation of its roundups and its outbox entry are written
+in one commit; the provider is called only after that commit, so no DB
+transaction (or pooled connection) is held across the network call. Entries
+are claimed with a token plus a lease before dispatch, so the request that
+created an order, the outbox worker and a crashed worker's successor never
+send the same order twice within the lease.
+
+Order lifecycle: pending (roundups ``reserved``) -> executed (roundups
+``invested``, ledger debit) or failed (roundups back to ``pending``).
+Orders the provider accepted but has not filled stay ``pending`` and are
+polled in bulk by ``reconcile_pending_orders``.
+"""
+
+import logging
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import insert, update
+
+from ..extensions import db
+from ..models.investment import InvestmentOrder
+from ..models.ledger import LedgerEntry
+from ..models.order_outbox import OrderOutbox
+from ..models.roundup import Roundup
+from .balance_service import adjust_pending_balance
+from .holdings_service import add_to_holdings
+from .omnibus_service import place_omnibus_orders, provider_for, split_units
+
+OUTBOX_LEASE = timedelta(minutes=5)
+MAX_DISPATCH_ATTEMPTS = 5
+# Orders younger than this are left to the outbox before the reconciler polls them.
+RECONCILE_MIN_AGE = timedelta(minutes=1)
+
+
+def _retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=min(3600, 30 * 2 ** (attempts - 1)))
+
+
+def reserve_roundups(order: InvestmentOrder, roundups: List[Roundup]) -> None:
+    """Move pending roundups onto ``order`` as reserved and take them off the pending balance."""
+    for r in roundups:
+        r.status = "reserved"
+        r.investment_id = order.id
+    db.session.flush()
+    adjust_pending_balance(order.user_id, -sum(r.amount_paise for r in roundups), -len(roundups))
+
+
+def enqueue_order(order: InvestmentOrder, claim: bool = False) -> Optional[str]:
+    """
+    Add ``order`` to the outbox (no commit).
+
+    With ``claim`` the entry is created already claimed by the caller, who
+    dispatches it right after committing; the returned token is passed to
+    ``dispatch_claimed``. If the caller dies first, the lease expires and the
+    outbox worker picks the entry up.
+    """
+    return enqueue_orders([order.id], claim)
+
+
+def enqueue_orders(order_ids: List[int], claim: bool = False) -> Optional[str]:
+    """``enqueue_order`` for many orders in one multi-row INSERT; all share one claim token."""
+    now = datetime.utcnow()
+    token = uuid.uuid4().hex if claim else None
+    db.session.execute(insert(OrderOutbox), [
+        {
+            "order_id": oid,
+            "status": "queued",
+            "next_attempt_at": now,
+            "claim_token": token,
+            "locked_until": now + OUTBOX_LEASE if claim else None,
+        }
+        for oid in order_ids
+    ])
+    return token
+
+
+def claim_due_entries(limit: int, now: Optional[datetime] = None) -> Optional[str]:
+    """Claim up to ``limit`` due entries for this worker and commit; returns the claim token."""
+    now = now or datetime.utcnow()
+    ids = [
+        eid for (eid,) in
+        db.session.query(OrderOutbox.id)
+        .filter(
+            OrderOutbox.status == "queued",
+            OrderOutbox.next_attempt_at <= now,
+            db.or_(OrderOutbox.locked_until.is_(None), OrderOutbox.locked_until < now),
+        )
+        .order_by(OrderOutbox.next_attempt_at, OrderOutbox.id)
+        .limit(limit)
+    ]
+    if not ids:
+        return None
+    token = uuid.uuid4().hex
+    # Re-check claimability in the UPDATE so a concurrent worker's claim wins cleanly.
+    claimed = db.session.execute(
+        update(OrderOutbox)
+        .where(
+            OrderOutbox.id.in_(ids),
+            OrderOutbox.status == "queued",
+            db.or_(OrderOutbox.locked_until.is_(None), OrderOutbox.locked_until < now),
+        )
+        .values(claim_token=token, locked_until=now + OUTBOX_LEASE),
+        execution_options={"synchronize_session": False},
+    ).rowcount
+    db.session.commit()
+    return token if claimed else None
+
+
+def _settle(orders: List[InvestmentOrder], now: datetime) -> None:
+    db.session.flush()
+    add_to_holdings([
+        {"user_id": o.user_id, "product_type": o.product_type, "amount_paise": o.amount_paise,
+         "units_micro": o.units_micro}
+        for o in orders
+    ])
+    db.session.execute(
+        update(Roundup)
+        .where(Roundup.investment_id.in_([o.id for o in orders]), Roundup.status == "reserved")
+        .values(status="invested"),
+        execution_options={"synchronize_session": False},
+    )
+    db.session.execute(insert(LedgerEntry), [
+        {
+            "user_id": o.user_id, "type": "debit", "category": "investment", "amount_paise": o.amount_paise,
+            "reference_type": "InvestmentOrder", "reference_id": o.id, "timestamp": now,
+        }
+        for o in orders
+    ])
+
+
+def _release(orders: List[InvestmentOrder]) -> None:
+    user_of = {o.id: o.user_id for o in orders}
+    reserved = (
+        db.session.query(Roundup.investment_id, db.func.sum(Roundup.amount_paise), db.func.count(Roundup.id))
+        .filter(Roundup.investment_id.in_(user_of), Roundup.status == "reserved")
+        .group_by(Roundup.investment_id)
+        .all()
+    )
+    if not reserved:
+        return
+    db.session.execute(
+        update(Roundup)
+        .where(Roundup.investment_id.in_(user_of), Roundup.status == "reserved")
+        .values(status="pending", investment_id=None),
+        execution_options={"synchronize_session": False},
+    )
+    deltas = defaultdict(lambda: [0, 0])
+    for order_id, paise, count in reserved:
+        deltas[user_of[order_id]][0] += int(paise)
+        deltas[user_of[order_id]][1] += int(count)
+    for user_id, (paise, count) in deltas.items():
+        adjust_pending_balance(user_id, paise, count)
+
+
+def apply_order_status(order: InvestmentOrder, status: str, external_order_id: Optional[str] = None,
+                       units_micro: Optional[int] = None, now: Optional[datetime] = None) -> None:
+    """Move a pending order to ``status`` and its reserved roundups along with it (no commit)."""
+    apply_order_statuses([(order, status, external_order_id, units_micro)], now)
+
+
+def apply_order_statuses(outcomes: List[tuple], now: Optional[datetime] = None) -> None:
+    """
+    ``apply_order_status`` for many ``(order, status, external_order_id, units_micro)``
+    outcomes, with set-based writes: one holdings update, roundup UPDATE and
+    ledger INSERT for all executed orders, one release for all failed ones.
+    """
+    now = now or datetime.utcnow()
+    settled, released = [], []
+    for order, status, external_order_id, units_micro in outcomes:
+        if external_order_id:
+            order.external_order_id = external_order_id
+        if units_micro is not None:
+            order.units_micro = units_micro
+        if order.status != "pending" or status == "pending":
+            continue
+        order.status = status
+        if status == "executed":
+            settled.append(order)
+        elif status == "failed":
+            released.append(order)
+    if settled:
+        _settle(settled, now)
+    if released:
+        _release(released)
+
+
+def dispatch_claimed(token: str) -> int:
+    """
+    Send every entry claimed under ``token`` to the providers in one batch and commit the results.
+
+    Provider errors (as opposed to rejections) put the entry back in the
+    queue with exponential backoff; after MAX_DISPATCH_ATTEMPTS the order fails.
+    """
+    entries = OrderOutbox.query.filter_by(claim_token=token, status="queued").all()
+    if not entries:
+        return 0
+    orders = {o.id: o for o in InvestmentOrder.query.filter(InvestmentOrder.id.in_([e.order_id for e in entries]))}
+    requests = [
+        {"entry": e, "user_id": orders[e.order_id].user_id, "product_type": orders[e.order_id].product_type,
+         "amount_paise": orders[e.order_id].amount_paise}
+        for e in entries
+    ]
+    # Nothing is written between the claim commit and here: the provider call runs outside any transaction.
+    db.session.commit()
+    place_omnibus_orders(requests)
+
+    now = datetime.utcnow()
+    outcomes = []
+    for req in requests:
+        entry, order = req["entry"], orders[req["entry"].order_id]
+        entry.attempts += 1
+        entry.claim_token = None
+        entry.locked_until = None
+        if req.get("error") and entry.attempts < MAX_DISPATCH_ATTEMPTS:
+            entry.last_error = req["error"][:255]
+            entry.next_attempt_at = now + _retry_delay(entry.attempts)
+            continue
+        if req.get("error"):
+            entry.last_error = req["error"][:255]
+        entry.status = "sent" if req["status"] == "pending" else "done"
+        outcomes.append((order, req["status"], req.get("external_order_id"), req.get("units_micro")))
+    apply_order_statuses(outcomes, now)
+    db.session.commit()
+    return len(requests)
+
+
+def reconcile_pending_orders(batch_size: int = 500, now: Optional[datetime] = None) -> Dict[str, int]:
+    """
+    Poll providers for orders still pending after placement and apply the outcomes.
+
+    Walks pending orders that have an external id in id order, one bulk
+    status lookup per provider per batch, committing each batch. Members of
+    an omnibus order share its external id, so the units it reports are
+    split across all of them pro rata by amount, as at placement.
+    """
+    now = now or datetime.utcnow()
+    totals = defaultdict(int)
+    after = 0
+    while True:
+        batch = (
+            InvestmentOrder.query
+            .filter(
+                InvestmentOrder.status == "pending",
+                InvestmentOrder.external_order_id.isnot(None),
+                InvestmentOrder.created_at < now - RECONCILE_MIN_AGE,
+                InvestmentOrder.id > after,
+            )
+            .order_by(InvestmentOrder.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not batch:
+            break
+        after = batch[-1].id
+        by_provider = defaultdict(list)
+        for order in batch:
+            provider = provider_for(order.product_type)
+            if provider is not None:
+                by_provider[provider].append(order)
+        for provider, orders in by_provider.items():
+            external_ids = sorted({o.external_order_id for o in orders})
+            try:
+                statuses = provider.get_order_statuses(external_ids)
+            except Exception as e:
+                logging.error(f"Order status lookup failed for {len(orders)} orders: {e}")
+                totals["errors"] += len(orders)
+                continue
+            # Whole omnibus groups, including members beyond this batch, in placement (id) order.
+            outcomes = []
+            groups = defaultdict(list)
+            for order in (
+                InvestmentOrder.query
+                .filter(InvestmentOrder.external_order_id.in_(external_ids))
+                .order_by(InvestmentOrder.id)
+            ):
+                groups[order.external_order_id].append(order)
+            for external_id, members in groups.items():
+                info = statuses.get(external_id) or {}
+                status = str(info.get("status") or "pending").lower()
+                units = info.get("units_micro")
+                shares = split_units(int(units), [o.amount_paise for o in members]) if units is not None else None
+                for i, order in enumerate(members):
+                    if order.status != "pending":
+                        continue
+                    outcomes.append((order, status, None, shares[i] if shares is not None else None))
+                    totals[status] += 1
+            apply_order_statuses(outcomes, now)
+        db.session.commit()
+    return dict(totals)
@@ -0,0 +1,121 @@
+"""
+Daily price store for MF NAVs and gold rates.
+
+Each instrument (scheme code) is one flat binary file of fixed-size
+``(day, price_paise)`` records sorted by day: 12 bytes a day, so ten years of
+history is ~44 KB. Reads memory-map the file; writes merge into a copy and
+atomically replace it, so readers holding an old map are never torn.
+
+Latest prices are served from an in-process LRU keyed by the file's
+(mtime, size, inode); a rewrite changes the key, so the cache never needs
+explicit invalidation and valuation never touches the DB for prices.
+"""
+
+import os
+import tempfile
+import threading
+from datetime import date
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+from flask import current_app
+
+# day: days since 1970-01-01; price_paise: paise per unit (per gram for gold)
+RECORD_DTYPE = np.dtype([("day", "<i4"), ("price_paise", "<i8")])
+_EPOCH = date(1970, 1, 1)
+
+_store: Optional["PriceStore"] = None
+_store_lock = threading.Lock()
+
+
+def day_number(d: date) -> int:
+    return (d - _EPOCH).days
+
+
+def day_from_number(n: int) -> date:
+    return date.fromordinal(_EPOCH.toordinal() + int(n))
+
+
+@lru_cache(maxsize=1024)
+def _latest_for_version(path: str, mtime_ns: int, size: int, inode: int) -> Optional[Tuple[int, int]]:
+    series = np.memmap(path, dtype=RECORD_DTYPE, mode="r")
+    last = series[-1]
+    return int(last["day"]), int(last["price_paise"])
+
+
+class PriceStore:
+    def __init__(self, root: str):
+        self.root = root
+        self._write_lock = threading.Lock()
+
+    def _path(self, instrument: str) -> str:
+        safe = "".join(c if c.isalnum() or c in "-_" else "_" for c in instrument)
+        return os.path.join(self.root, f"{safe}.prices")
+
+    def series(self, instrument: str) -> np.ndarray:
+        """Read-only view of an instrument's records (empty if none stored)."""
+        path = self._path(instrument)
+        try:
+            if os.path.getsize(path) == 0:
+                return np.empty(0, dtype=RECORD_DTYPE)
+        except FileNotFoundError:
+            return np.empty(0, dtype=RECORD_DTYPE)
+        return np.memmap(path, dtype=RECORD_DTYPE, mode="r")
+
+    def latest(self, instrument: str) -> Optional[Tuple[date, int]]:
+        """Most recent ``(day, price_paise)`` or None, from the LRU when the file is unchanged."""
+        path = self._path(instrument)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        if st.st_size < RECORD_DTYPE.itemsize:
+            return None
+        day, price = _latest_for_version(path, st.st_mtime_ns, st.st_size, st.st_ino)
+        return day_from_number(day), price
+
+    def latest_prices(self, instruments: Iterable[str]) -> Dict[str, int]:
+        """instrument -> latest price in paise, for instruments that have one."""
+        prices = {}
+        for instrument in instruments:
+            found = self.latest(instrument)
+            if found is not None:
+                prices[instrument] = found[1]
+        return prices
+
+    def price_on(self, instrument: str, day: date) -> Optional[int]:
+        """Price in effect on ``day`` (last record on or before it)."""
+        series = self.series(instrument)
+        i = int(np.searchsorted(series["day"], day_number(day), side="right"))
+        return int(series["price_paise"][i - 1]) if i else None
+
+    def write(self, instrument: str, prices: Dict[date, int]) -> int:
+        """Merge ``{day: price_paise}`` into the instrument's series (later writes win); returns the record count."""
+        if not prices:
+            return len(self.series(instrument))
+        new = np.array(
+            sorted((day_number(d), int(p)) for d, p in prices.items()), dtype=RECORD_DTYPE
+        )
+        with self._write_lock:
+            old = np.array(self.series(instrument))
+            keep = old[~np.isin(old["day"], new["day"])]
+            merged = np.concatenate([keep, new])
+            merged = merged[np.argsort(merged["day"], kind="stable")]
+            os.makedirs(self.root, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                merged.tofile(f)
+            os.replace(tmp, self._path(instrument))
+        return len(merged)
+
+
+def get_price_store() -> PriceStore:
+    global _store
+    root = current_app.config.get("PRICE_STORE_DIR") or os.path.join(current_app.instance_path, "prices")
+    if _store is not None and _store.root == root:
+        return _store
+    with _store_lock:
+        if _store is None or _store.root != root:
+            _store = PriceStore(root)
+    return _store
@@ -0,0 +1,66 @@
+"""
+Token-bucket rate limiting for outbound provider calls.
+
+A bucket refills at ``rate`` tokens per second up to ``capacity`` (the
+allowed burst). Callers take one token per API request before making it, so
+any number of worker threads together stay within the provider's published
+limit. Buckets are per process; size the rate for the number of replicas
+running the job.
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1) -> float:
+        """Take ``tokens`` if available; returns 0 on success, else the seconds until they will be."""
+        if tokens > self.capacity:
+            raise ValueError("cannot acquire more tokens than the bucket holds")
+        with self._lock:
+            self._refill(self._clock())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens: float = 1, timeout: Optional[float] = None) -> bool:
+        """Block until ``tokens`` are taken; False if that would take longer than ``timeout`` seconds."""
+        deadline = None if timeout is None else self._clock() + timeout
+        while True:
+            wait = self.try_acquire(tokens)
+            if not wait:
+                return True
+            if deadline is not None and self._clock() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+_buckets: Dict[str, TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def get_rate_limiter(name: str, rate: float, capacity: Optional[float] = None) -> TokenBucket:
+    """Process-wide bucket for ``name`` (e.g. a provider), created on first use with the given limits."""
+    bucket = _buckets.get(name)
+    if bucket is not None:
+        return bucket
+    with _buckets_lock:
+        if name not in _buckets:
+            _buckets[name] = TokenBucket(rate, capacity)
+        return _buckets[name]
@@ -0,0 +1,101 @@
+"""
+Vectorized roundup computation for batch paths (bulk ingest, backfills, simulations).
+
+Every function here matches the scalar ``calculate_roundup_paise`` and the
+sequential cap clipping in ``claim_cap_allowance`` exactly; they just run
+over NumPy int64 arrays instead of one Python call per transaction.
+"""
+
+from typing import Optional, Sequence, Union
+
+import numpy as np
+
+# Stand-in for "no cap" in remaining-allowance arrays.
+UNCAPPED = np.iinfo(np.int64).max
+
+ArrayLike = Union[Sequence[int], np.ndarray]
+
+
+def calculate_roundups(amounts_paise: ArrayLike, bases_rupees: Union[int, ArrayLike]) -> np.ndarray:
+    """Roundup in paise for each amount; ``bases_rupees`` is a scalar or one base per amount."""
+    amounts = np.asarray(amounts_paise, dtype=np.int64)
+    base = np.asarray(bases_rupees, dtype=np.int64) * 100
+    target = ((amounts + base - 1) // base) * base
+    return np.maximum(0, target - amounts)
+
+
+def combine_remaining(day_remaining: Optional[ArrayLike], month_remaining: Optional[ArrayLike], size: int) -> np.ndarray:
+    """
+    Per-group remaining allowance given optional daily and monthly remainders.
+
+    ``None`` (or a negative entry) means that cap is not set for the group.
+    """
+    remaining = np.full(size, UNCAPPED, dtype=np.int64)
+    for part in (day_remaining, month_remaining):
+        if part is None:
+            continue
+        part = np.asarray(part, dtype=np.int64)
+        remaining = np.where(part >= 0, np.minimum(remaining, np.maximum(part, 0)), remaining)
+    return remaining
+
+
+def clip_to_caps(roundups: ArrayLike, group_index: ArrayLike, remaining: ArrayLike) -> np.ndarray:
+    """
+    Clip roundups against a per-group remaining allowance, first come first served.
+
+    Within each group (usually a user) items are granted in input order until
+    the allowance runs out, exactly like clipping one item at a time. With a
+    single effective cap this is ``diff(min(cumsum(roundups), remaining))``,
+    computed with one stable sort and grouped cumulative sums.
+
+    Args:
+        roundups: Requested roundup per item (paise)
+        group_index: Group id per item, 0 <= id < len(remaining)
+        remaining: Allowance per group (paise); use ``UNCAPPED`` for none
+
+    Returns:
+        np.ndarray: Granted roundup per item, aligned with ``roundups``
+    """
+    roundups = np.asarray(roundups, dtype=np.int64)
+    groups = np.asarray(group_index, dtype=np.int64)
+    remaining = np.asarray(remaining, dtype=np.int64)
+    if roundups.size == 0:
+        return roundups.copy()
+
+    order = np.argsort(groups, kind="stable")
+    g = groups[order]
+    r = roundups[order]
+    starts = np.empty(g.size, dtype=bool)
+    starts[0] = True
+    np.not_equal(g[1:], g[:-1], out=starts[1:])
+
+    running = np.cumsum(r)
+    before_group = (running - r)[starts]
+    group_running = running - np.repeat(before_group, np.diff(np.append(np.flatnonzero(starts), g.size)))
+
+    allowed_running = np.minimum(group_running, remaining[g])
+    granted_sorted = np.diff(allowed_running, prepend=0)
+    granted_sorted[starts] = allowed_running[starts]
+
+    granted = np.empty_like(granted_sorted)
+    granted[order] = granted_sorted
+    return granted
+
+
+def compute_capped_roundups(
+    amounts_paise: ArrayLike,
+    user_index: ArrayLike,
+    user_bases_rupees: ArrayLike,
+    user_remaining: Optional[ArrayLike] = None,
+) -> np.ndarray:
+    """
+    Roundups for a batch spanning many users, with per-user bases and caps.
+
+    ``user_index`` maps each amount to a row of ``user_bases_rupees`` /
+    ``user_remaining``. Without ``user_remaining`` no caps are applied.
+    """
+    idx = np.asarray(user_index, dtype=np.int64)
+    raw = calculate_roundups(amounts_paise, np.asarray(user_bases_rupees, dtype=np.int64)[idx])
+    if user_remaining is None:
+        return raw
+    return clip_to_caps(raw, idx, user_remaining)
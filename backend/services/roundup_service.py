@@ -1,7 +1,19 @@
-from datetime import datetime, timedelta
+import logging
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import update
+
 from ..extensions import db
 from ..models.roundup import Roundup
 from ..models.cap_setting import CapSetting
+from ..models.roundup_cap_counter import RoundupCapCounter
+from .sql_helpers import insert_ignore
+from .roundup_engine import UNCAPPED, clip_to_caps
+from .balance_service import adjust_pending_balance
+
+# How often a cap claim is retried after losing a race with a concurrent writer.
+CAP_CLAIM_ATTEMPTS = 5
 
 
 def calculate_roundup_paise(amount_paise: int, base_rupees: int) -> int:
@@ -10,6 +22,157 @@ def calculate_roundup_paise(amount_paise: int, base_rupees: int) -> int:
     return max(0, target - amount_paise)
 
 
+def cap_periods(now: datetime) -> Dict[str, Tuple[date, datetime, datetime]]:
+    """UTC day and month windows containing ``now``: period_type -> (period_start, start, end)."""
+    day_start = datetime(now.year, now.month, now.day)
+    month_start = datetime(now.year, now.month, 1)
+    next_month = datetime(now.year + 1, 1, 1) if now.month == 12 else datetime(now.year, now.month + 1, 1)
+    return {
+        "day": (day_start.date(), day_start, datetime.fromordinal(day_start.toordinal() + 1)),
+        "month": (month_start.date(), month_start, next_month),
+    }
+
+
+def _sum_roundups(user_id: int, start: datetime, end: datetime) -> int:
+    return int(
+        db.session.query(db.func.coalesce(db.func.sum(Roundup.amount_paise), 0))
+        .filter(Roundup.user_id == user_id, Roundup.created_at >= start, Roundup.created_at < end)
+        .scalar()
+    )
+
+
+def _load_counters(user_id: int, now: datetime) -> Dict[str, int]:
+    """
+    Current day/month counter values for a user.
+
+    A missing row (first roundup of the period, or data created before the
+    counters existed) is seeded once from a SUM over that period only.
+    """
+    periods = cap_periods(now)
+    rows = (
+        db.session.query(RoundupCapCounter.period_type, RoundupCapCounter.amount_paise)
+        .filter(
+            RoundupCapCounter.user_id == user_id,
+            db.or_(*[
+                db.and_(RoundupCapCounter.period_type == ptype, RoundupCapCounter.period_start == pstart)
+                for ptype, (pstart, _, _) in periods.items()
+            ]),
+        )
+        .all()
+    )
+    values = {ptype: int(amount) for ptype, amount in rows}
+    for ptype, (pstart, start, end) in periods.items():
+        if ptype in values:
+            continue
+        seed = _sum_roundups(user_id, start, end)
+        db.session.execute(
+            insert_ignore(RoundupCapCounter, ["user_id", "period_type", "period_start"]).values(
+                user_id=user_id, period_type=ptype, period_start=pstart, amount_paise=seed, updated_at=datetime.utcnow(),
+            )
+        )
+        values[ptype] = int(
+            db.session.query(RoundupCapCounter.amount_paise)
+            .filter_by(user_id=user_id, period_type=ptype, period_start=pstart)
+            .scalar()
+        )
+    return values
+
+
+def _bump_counter(user_id: int, period_type: str, period_start: date, amount: int, limit: Optional[int]) -> bool:
+    """Add ``amount`` to one counter; with a ``limit`` the UPDATE only applies if it stays within it."""
+    stmt = (
+        update(RoundupCapCounter)
+        .where(
+            RoundupCapCounter.user_id == user_id,
+            RoundupCapCounter.period_type == period_type,
+            RoundupCapCounter.period_start == period_start,
+        )
+        .values(amount_paise=RoundupCapCounter.amount_paise + amount, updated_at=datetime.utcnow())
+    )
+    if limit is not None:
+        stmt = stmt.where(RoundupCapCounter.amount_paise + amount <= limit)
+    return db.session.execute(stmt).rowcount == 1
+
+
+def claim_cap_allowance(user_id: int, cap: Optional[CapSetting], amounts: List[int], now: datetime) -> List[int]:
+    """
+    Grant roundup amounts against the user's daily/monthly caps.
+
+    Amounts are clipped in order against the remaining allowance, and the
+    granted total is added to the day and month counters with conditional
+    UPDATEs (``amount + granted <= cap``), so concurrent writers can never
+    push a counter past its cap: whoever loses the race re-reads the
+    counters and tries again. Counters are maintained for uncapped users too,
+    which keeps them exact if a cap is set later.
+
+    Must run in the same DB transaction as the roundup INSERT and before it.
+    Returns the granted amount for each input amount.
+    """
+    limits = {
+        "day": cap.daily_cap_paise if cap else None,
+        "month": cap.monthly_cap_paise if cap else None,
+    }
+    periods = cap_periods(now)
+    for _ in range(CAP_CLAIM_ATTEMPTS):
+        counters = _load_counters(user_id, now)
+        remaining = None
+        for ptype, limit in limits.items():
+            if limit is not None:
+                left = max(0, limit - counters[ptype])
+                remaining = left if remaining is None else min(remaining, left)
+        granted = clip_to_caps(
+            [max(0, amount) for amount in amounts],
+            [0] * len(amounts),
+            [UNCAPPED if remaining is None else remaining],
+        ).tolist()
+        total = sum(granted)
+        if total == 0:
+            return granted
+        applied = []
+        for ptype, (pstart, _, _) in periods.items():
+            if not _bump_counter(user_id, ptype, pstart, total, limits[ptype]):
+                break
+            applied.append((ptype, pstart))
+        else:
+            return granted
+        # Lost a race on one counter: undo the ones already bumped and retry.
+        for ptype, pstart in applied:
+            _bump_counter(user_id, ptype, pstart, -total, None)
+    logging.warning(f"Cap claim for user {user_id} gave up after {CAP_CLAIM_ATTEMPTS} contended attempts")
+    return [0] * len(amounts)
+
+
+def release_cap_allowance(user_id: int, amount: int, at: datetime) -> None:
+    """Give ``amount`` back to the day/month counters of the period containing ``at``."""
+    if amount <= 0:
+        return
+    _load_counters(user_id, at)
+    for ptype, (pstart, _, _) in cap_periods(at).items():
+        _bump_counter(user_id, ptype, pstart, -amount, None)
+
+
+def rebuild_cap_counters(user_id: int, now: Optional[datetime] = None) -> Dict[str, int]:
+    """Recompute the current day/month counters for a user from the roundups table."""
+    now = now or datetime.utcnow()
+    values = {}
+    for ptype, (pstart, start, end) in cap_periods(now).items():
+        total = _sum_roundups(user_id, start, end)
+        updated = db.session.execute(
+            update(RoundupCapCounter)
+            .where(
+                RoundupCapCounter.user_id == user_id,
+                RoundupCapCounter.period_type == ptype,
+                RoundupCapCounter.period_start == pstart,
+            )
+            .values(amount_paise=total, updated_at=now)
+        ).rowcount
+        if not updated:
+            db.session.add(RoundupCapCounter(user_id=user_id, period_type=ptype, period_start=pstart, amount_paise=total))
+        values[ptype] = total
+    db.session.commit()
+    return values
+
+
 def create_roundup_for_transaction(user, transaction):
     amount = calculate_roundup_paise(transaction.amount_paise, user.rounding_base)
     if amount <= 0:
@@ -20,36 +183,15 @@ def create_roundup_for_transaction(user, transaction):
     if cap and cap.investing_paused:
         return None
 
-    # Compute remaining caps for today and this month
-    allowed = amount
     now = datetime.utcnow()
-    if cap and (cap.daily_cap_paise or cap.monthly_cap_paise):
-        # Start of today (UTC)
-        day_start = datetime(now.year, now.month, now.day)
-        # Start of month (UTC)
-        month_start = datetime(now.year, now.month, 1)
-        # Sum existing roundups created today/this month
-        today_sum = (
-            db.session.query(db.func.coalesce(db.func.sum(Roundup.amount_paise), 0))
-            .filter(Roundup.user_id == user.id, Roundup.created_at >= day_start)
-            .scalar()
-        )
-        month_sum = (
-            db.session.query(db.func.coalesce(db.func.sum(Roundup.amount_paise), 0))
-            .filter(Roundup.user_id == user.id, Roundup.created_at >= month_start)
-            .scalar()
-        )
-        if cap.daily_cap_paise is not None:
-            remaining_day = max(0, cap.daily_cap_paise - int(today_sum))
-            allowed = min(allowed, remaining_day)
-        if cap.monthly_cap_paise is not None:
-            remaining_month = max(0, cap.monthly_cap_paise - int(month_sum))
-            allowed = min(allowed, remaining_month)
-
+    allowed = claim_cap_allowance(user.id, cap, [amount], now)[0]
     if allowed <= 0:
+        db.session.commit()
         return None
 
-    r = Roundup(user_id=user.id, transaction_id=transaction.id, amount_paise=allowed, status="pending")
+    r = Roundup(user_id=user.id, transaction_id=transaction.id, amount_paise=allowed, status="pending", created_at=now)
     db.session.add(r)
+    db.session.flush()
+    adjust_pending_balance(user.id, allowed, 1)
     db.session.commit()
     return r
@@ -0,0 +1,80 @@
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy import insert, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from ..extensions import db
+
+
+def dialect_name() -> str:
+    return db.session.get_bind().dialect.name
+
+
+def insert_ignore(model, conflict_columns: List[str]):
+    """
+    ``INSERT ... ON CONFLICT (cols) DO NOTHING`` for the active dialect.
+
+    Rows that hit the unique constraint are silently skipped and do not
+    appear in RETURNING. Other dialects fall back to a plain INSERT.
+    """
+    name = dialect_name()
+    if name == "postgresql":
+        return postgresql.insert(model).on_conflict_do_nothing(index_elements=conflict_columns)
+    if name == "sqlite":
+        return sqlite.insert(model).on_conflict_do_nothing(index_elements=conflict_columns)
+    return insert(model)
+
+
+def claim_batch(model, key_col, filters: List, order_by, limit: int, lease: timedelta,
+                now: Optional[datetime] = None) -> Tuple[Optional[str], List]:
+    """
+    Claim up to ``limit`` rows of ``model`` for this worker and commit.
+
+    Rows are leased by writing a random owner token and an expiry into the
+    model's ``lease_owner``/``lease_until`` columns; rows with a live lease
+    are skipped, so N workers get disjoint slices and a crashed worker's rows
+    come back once its lease runs out. On PostgreSQL the candidate SELECT
+    also uses ``FOR UPDATE SKIP LOCKED`` so concurrent claimers neither block
+    on nor race for the same rows; on SQLite (one writer at a time) the
+    conditional UPDATE alone decides.
+
+    If a concurrent worker leases every candidate between the SELECT and the
+    UPDATE, the SELECT is re-run: those rows are no longer free, so each
+    round moves on. Returns ``(token, keys)``; ``token`` is None (and keys
+    empty) only when no free row matches, so callers may stop on it.
+    """
+    now = now or datetime.utcnow()
+    free = or_(model.lease_until.is_(None), model.lease_until < now)
+    candidates = select(key_col).where(*filters, free).order_by(order_by).limit(limit)
+    if dialect_name() == "postgresql":
+        candidates = candidates.with_for_update(skip_locked=True)
+    while True:
+        keys = db.session.scalars(candidates).all()
+        if not keys:
+            db.session.commit()
+            return None, []
+        token = uuid.uuid4().hex
+        db.session.execute(
+            update(model)
+            .where(key_col.in_(keys), free)
+            .values(lease_owner=token, lease_until=now + lease),
+            execution_options={"synchronize_session": False},
+        )
+        db.session.commit()
+        claimed = db.session.scalars(select(key_col).where(model.lease_owner == token).order_by(order_by)).all()
+        if claimed:
+            return token, claimed
+
+
+def release_claims(model, key_col, keys: List, token: str) -> None:
+    """Drop this worker's lease on ``keys`` (no commit)."""
+    if not keys:
+        return
+    db.session.execute(
+        update(model)
+        .where(key_col.in_(keys), model.lease_owner == token)
+        .values(lease_owner=None, lease_until=None),
+        execution_options={"synchronize_session": False},
+    )
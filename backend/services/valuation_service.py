@@ -1,19 +1,60 @@
 from collections import defaultdict
+from ..extensions import db
 from ..models.investment import InvestmentOrder
+from ..models.redemption import Redemption
+from .omnibus_service import scheme_for
+from .price_store import get_price_store
 
 
 def compute_positions_value(user_id: int):
-    orders = InvestmentOrder.query.filter_by(user_id=user_id, status="executed").all()
+    """
+    Value executed positions at units x latest price from the price store.
+
+    Units come from the orders (minus redeemed units); orders placed without
+    an allotment, and products with no stored price, stay valued at cost.
+    """
     invested_paise_by_product = defaultdict(int)
-    for o in orders:
-        invested_paise_by_product[o.product_type] += o.amount_paise
-    # Stub: current value equals invested amount (PnL = 0)
-    current_value_paise_by_product = dict(invested_paise_by_product)
+    units_by_product = defaultdict(int)
+    unit_less_cost_by_product = defaultdict(int)
+    for product_type, amount, units, unit_less in (
+        db.session.query(
+            InvestmentOrder.product_type,
+            db.func.sum(InvestmentOrder.amount_paise),
+            db.func.sum(InvestmentOrder.units_micro),
+            db.func.sum(db.case((InvestmentOrder.units_micro.is_(None), InvestmentOrder.amount_paise), else_=0)),
+        )
+        .filter_by(user_id=user_id, status="executed")
+        .group_by(InvestmentOrder.product_type)
+    ):
+        invested_paise_by_product[product_type] = int(amount)
+        units_by_product[product_type] = int(units or 0)
+        unit_less_cost_by_product[product_type] = int(unit_less or 0)
+    for product_type, units in (
+        db.session.query(Redemption.product_type, db.func.sum(Redemption.units_micro))
+        .filter(Redemption.user_id == user_id, Redemption.status == "executed", Redemption.units_micro.isnot(None))
+        .group_by(Redemption.product_type)
+    ):
+        units_by_product[product_type] -= int(units)
+
+    prices = get_price_store().latest_prices({scheme_for(p) for p in invested_paise_by_product})
+    current_value_paise_by_product = {}
+    price_paise_by_product = {}
+    for product_type, invested in invested_paise_by_product.items():
+        price = prices.get(scheme_for(product_type))
+        if price is None:
+            current_value_paise_by_product[product_type] = invested
+            continue
+        price_paise_by_product[product_type] = price
+        held = max(0, units_by_product[product_type])
+        current_value_paise_by_product[product_type] = held * price // 1_000_000 + unit_less_cost_by_product[product_type]
+
     total_invested = sum(invested_paise_by_product.values())
     total_value = sum(current_value_paise_by_product.values())
     return {
         "invested_paise_by_product": dict(invested_paise_by_product),
         "current_value_paise_by_product": current_value_paise_by_product,
+        "price_paise_by_product": price_paise_by_product,
+        "units_micro_by_product": {p: max(0, u) for p, u in units_by_product.items()},
         "total_invested_paise": total_invested,
         "total_value_paise": total_value,
         "pnl_paise": total_value - total_invested,
@@ -1,17 +1,23 @@
 import os
+import uuid
+
 import pytest
 
+# Config reads DATABASE_URL at import time, so point it away from instance/roundup.db
+# before anything under backend is imported.
+os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+
 from backend.extensions import db
 from backend.app import create_app
 
 
 @pytest.fixture(scope="session")
 def app():
-    os.environ["DATABASE_URL"] = "sqlite:///:memory:"
     application = create_app()
     application.config.update({
         "TESTING": True,
     })
+    assert application.config["SQLALCHEMY_DATABASE_URI"] == "sqlite:///:memory:"
     with application.app_context():
         db.create_all()
     yield application
@@ -22,3 +28,17 @@ def app():
 @pytest.fixture()
 def client(app):
     return app.test_client()
+
+
+@pytest.fixture()
+def register_user(client):
+    """Register a fresh user per call; returns (auth headers, user id)."""
+    def register():
+        r = client.post("/api/auth/register", json={
+            "email": f"{uuid.uuid4().hex}@example.com",
+            "password": "secret",
+        })
+        assert r.status_code == 200, r.data
+        data = r.get_json()
+        return {"Authorization": f"Bearer {data['access_token']}"}, data["user"]["id"]
+    return register
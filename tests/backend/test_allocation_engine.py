@@ -0,0 +1,55 @@
+import uuid
+
+import numpy as np
+
+from backend.services.allocation_engine import PRODUCTS, TIERS, allocate_batch, allocate_one, largest_remainder
+from backend.services.allocations_service import RISK_ALLOCATIONS
+
+
+def test_largest_remainder_preserves_totals():
+    rng = np.random.default_rng(11)
+    for _ in range(50):
+        n, k = int(rng.integers(1, 200)), int(rng.integers(1, 8))
+        totals = rng.integers(0, 10**12, size=n)
+        weights = rng.integers(0, 100, size=(n, k))
+        weights[:, 0] += 1
+        alloc = largest_remainder(totals, weights)
+        assert alloc.dtype == np.int64
+        assert (alloc >= 0).all()
+        assert (alloc.sum(axis=1) == totals).all()
+        exact = totals[:, None] * weights / weights.sum(axis=1)[:, None]
+        assert (np.abs(alloc - exact) < 1 + 1e-6 * exact).all()
+    assert largest_remainder([10], [1, 1, 1]).tolist() == [[4, 3, 3]]
+    assert largest_remainder([101], [30, 30, 40]).tolist() == [[30, 30, 41]]
+    assert largest_remainder([5], [0, 0]).tolist() == [[0, 0]]
+
+
+def test_allocate_batch_uses_tiers_and_custom_splits():
+    rng = np.random.default_rng(3)
+    totals = rng.integers(0, 1_000_000, size=1000)
+    tiers = [TIERS[i % len(TIERS)] for i in range(1000)]
+    tiers[5] = None
+    custom = {7: {"gold": 100}, 8: {PRODUCTS[0]: 1, PRODUCTS[-1]: 2}}
+    alloc = allocate_batch(totals, tiers, custom)
+    assert alloc.shape == (1000, len(PRODUCTS))
+    assert (alloc.sum(axis=1) == totals).all()
+    gold = PRODUCTS.index("gold")
+    assert alloc[7, gold] == totals[7]
+    assert alloc[8, 0] + alloc[8, -1] == totals[8]
+    assert alloc[5].tolist() == allocate_batch([totals[5]], ["medium"])[0].tolist()
+    for i in (0, 1, 2, 5):
+        split = RISK_ALLOCATIONS[tiers[i] or "medium"]
+        expected = dict(allocate_one(int(totals[i]), split))
+        assert {p: int(a) for p, a in zip(PRODUCTS, alloc[i]) if split.get(p)} == expected
+
+
+def test_allocated_execution_gives_remainder_to_largest_fraction(client):
+    r = client.post("/api/auth/register", json={"email": f"{uuid.uuid4().hex}@example.com", "password": "secret"})
+    headers = {"Authorization": f"Bearer {r.get_json()['access_token']}"}
+    client.post("/api/mandates", json={}, headers=headers)
+    client.post("/api/transactions", json={"amount": 99.99}, headers=headers)
+    r = client.post("/api/investments/execute/allocated", json={}, headers=headers)
+    assert r.status_code == 200, r.data
+    # One paisa over 40/50/10 goes to mf_equity (0.5), not the first key (mf_debt)
+    orders = r.get_json()["orders"]
+    assert [(o["product_type"], o["amount_paise"]) for o in orders] == [("mf_equity", 1)]
@@ -0,0 +1,125 @@
+import uuid
+
+from backend.services import dedupe_filter
+
+
+def test_batch_creates_transactions_and_roundups(client, register_user):
+    headers, _ = register_user()
+    r = client.post("/api/transactions/batch", headers=headers, json=[
+        {"amount": 247.00, "merchant": "Coffee"},
+        {"amount": 118},
+        {"merchant": "missing amount"},
+        {"amount": 250},
+    ])
+    assert r.status_code == 200, r.data
+    data = r.get_json()
+    assert data["created"] == 3
+    assert data["roundups_created"] == 2
+    assert data["roundup_total_paise"] == 300 + 200
+    statuses = [item["status"] for item in data["results"]]
+    assert statuses == ["created", "created", "error", "created"]
+    assert data["results"][3]["roundup_paise"] == 0
+
+    r = client.get("/api/roundups/pending", headers=headers)
+    assert r.get_json()["total_paise"] == 500
+
+
+def test_batch_respects_daily_cap(client, register_user):
+    headers, _ = register_user()
+    client.patch("/api/user/caps", headers=headers, json={"daily_cap_paise": 450})
+    r = client.post("/api/transactions/batch", headers=headers, json={
+        "transactions": [{"amount": 247}, {"amount": 118}, {"amount": 11}],
+    })
+    assert r.status_code == 200, r.data
+    data = r.get_json()
+    assert [item["roundup_paise"] for item in data["results"]] == [300, 150, 0]
+    assert data["roundup_total_paise"] == 450
+
+
+def test_batch_rejects_non_array(client, register_user):
+    headers, _ = register_user()
+    r = client.post("/api/transactions/batch", headers=headers, json={"amount": 10})
+    assert r.status_code == 400
+
+
+def test_import_ndjson_in_chunks(client, register_user):
+    headers, _ = register_user()
+    body = "\n".join([
+        '{"amount": 247, "merchant": "Coffee"}',
+        "",
+        '{"amount": "118.00"}',
+        "not json",
+        '{"amount": 99.5}',
+    ])
+    r = client.post(
+        "/api/transactions/import?chunk_size=2",
+        headers={**headers, "Content-Type": "application/x-ndjson"},
+        data=body,
+    )
+    assert r.status_code == 200, r.data
+    data = r.get_json()
+    assert data["rows"] == 4
+    assert data["created"] == 3
+    assert data["failed"] == 1
+    assert data["chunks"] == 2
+    assert data["errors"] == [{"row": 3, "error": "item must be an object"}]
+    assert data["roundup_total_paise"] == 300 + 200 + 50
+
+
+def test_import_csv(client, register_user):
+    headers, _ = register_user()
+    body = "Amount,Merchant,Timestamp\n247.00,Coffee,2025-01-02T10:00:00\n12.34,Bus,\n"
+    r = client.post(
+        "/api/transactions/import",
+        headers={**headers, "Content-Type": "text/csv"},
+        data=body,
+    )
+    assert r.status_code == 200, r.data
+    data = r.get_json()
+    assert data["created"] == 2
+    r = client.get("/api/transactions", headers=headers)
+    merchants = {t["merchant"] for t in r.get_json()}
+    assert merchants == {"Coffee", "Bus"}
+
+
+def test_batch_redelivery_is_idempotent(client, register_user):
+    headers, _ = register_user()
+    ext = uuid.uuid4().hex
+    batch = [
+        {"amount": 247, "external_transaction_id": f"{ext}-1"},
+        {"amount": 118, "external_transaction_id": f"{ext}-2"},
+        {"amount": 118, "external_transaction_id": f"{ext}-2"},
+    ]
+    r = client.post("/api/transactions/batch", headers=headers, json=batch)
+    first = r.get_json()
+    assert first["created"] == 2
+    assert [item["status"] for item in first["results"]] == ["created", "created", "duplicate"]
+    assert first["results"][2]["transaction_id"] == first["results"][1]["transaction_id"]
+
+    r = client.post("/api/transactions/batch", headers=headers, json=batch)
+    again = r.get_json()
+    assert again["created"] == 0
+    assert again["duplicates"] == 3
+    assert again["roundups_created"] == 0
+    r = client.get("/api/roundups/pending", headers=headers)
+    assert r.get_json()["total_paise"] == 500
+
+    # A fresh process has an empty pre-filter; ON CONFLICT DO NOTHING still dedupes.
+    dedupe_filter._recent_external_ids = None
+    r = client.post("/api/transactions/batch", headers=headers, json=batch)
+    assert r.get_json()["duplicates"] == 3
+
+
+def test_single_create_with_external_id_is_idempotent(client, register_user):
+    headers, _ = register_user()
+    payload = {"amount": 247, "external_transaction_id": uuid.uuid4().hex}
+    r1 = client.post("/api/transactions", headers=headers, json=payload)
+    r2 = client.post("/api/transactions", headers=headers, json=payload)
+    assert r1.status_code == r2.status_code == 200
+    assert r2.get_json()["duplicate"] is True
+    assert r2.get_json()["transaction"]["id"] == r1.get_json()["transaction"]["id"]
+    assert r2.get_json()["roundup"]["id"] == r1.get_json()["roundup"]["id"]
+
+    other_headers, _ = register_user()
+    r3 = client.post("/api/transactions", headers=other_headers, json=payload)
+    assert r3.status_code == 409
@@ -0,0 +1,193 @@
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+
+from backend.extensions import db
+from backend.jobs import mandate_debits
+from backend.providers.upi import mock as upi_mock
+from backend.models.mandate import Mandate
+from backend.models.user import User
+from backend.models.user_balance import UserBalance
+from backend.services.rate_limiter import TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.t = 100.0
+
+    def __call__(self):
+        return self.t
+
+
+def test_token_bucket_bursts_then_refills():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, capacity=4, clock=clock)
+    assert [bucket.try_acquire() for _ in range(4)] == [0, 0, 0, 0]
+    assert bucket.try_acquire(2) == pytest.approx(1.0)
+    clock.t += 0.5
+    assert bucket.try_acquire() == 0
+    assert bucket.try_acquire() == pytest.approx(0.5)
+    clock.t += 10
+    assert bucket.try_acquire(4) == 0
+    assert not bucket.acquire(4, timeout=0.1)
+    with pytest.raises(ValueError):
+        bucket.try_acquire(5)
+
+
+class SlowProvider:
+    API_CALLS_PER_DEBIT = 2
+
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def execute_debit(self, external_mandate_id, amount_paise, description=None, idempotency_key=None):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.05)
+        with self.lock:
+            self.active -= 1
+            self.calls.append(external_mandate_id)
+        if external_mandate_id.endswith("-bad"):
+            return {"payment_id": None, "status": "failed", "error": "insufficient balance"}
+        return {"payment_id": f"pay-{external_mandate_id}", "status": "captured"}
+
+
+def test_due_debits_run_in_parallel_under_rate_limit(app, monkeypatch):
+    provider = SlowProvider()
+    monkeypatch.setattr(mandate_debits, "create_app", lambda: app)
+    monkeypatch.setattr(mandate_debits, "get_upi_provider", lambda: provider)
+    monkeypatch.setattr(mandate_debits, "_upi_rate_limiter", lambda: limiter)
+    limiter = TokenBucket(rate=1000, capacity=40)
+    monkeypatch.setitem(app.config, "DEBIT_MAX_WORKERS", 4)
+    monkeypatch.setitem(app.config, "DEBIT_COMMIT_BATCH", 3)
+    commits = []
+    real_commit = db.session.commit
+    real_run_debits = mandate_debits.run_debits
+
+    def counting_run_debits(debits):
+        monkeypatch.setattr(db.session, "commit", lambda: commits.append(len(debits)) or real_commit())
+        try:
+            return real_run_debits(debits)
+        finally:
+            monkeypatch.setattr(db.session, "commit", real_commit)
+    with app.app_context():
+        # Earlier tests in this session may have left due mandates behind; settle them first.
+        mandate_debits.process_due_debits()
+        notified = datetime.utcnow() - timedelta(hours=25)
+        mandates = []
+        for i in range(8):
+            user = User(email=f"{uuid.uuid4().hex}@example.com", password_hash="x")
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(UserBalance(user_id=user.id, pending_paise=1_000 + i, pending_count=1))
+            mandates.append(Mandate(
+                user_id=user.id, status="active", max_amount_paise=50_000, frequency="daily",
+                external_mandate_id=f"ext-{i}" + ("-bad" if i == 5 else ""),
+                next_debit_at=notified, pre_debit_notification_sent_at=notified,
+            ))
+        db.session.add_all(mandates)
+        db.session.commit()
+        ids = [m.id for m in mandates]
+
+        monkeypatch.setattr(mandate_debits, "run_debits", counting_run_debits)
+        started = time.monotonic()
+        mandate_debits.process_due_debits()
+        elapsed = time.monotonic() - started
+
+        assert sorted(provider.calls) == sorted(m.external_mandate_id for m in mandates)
+        assert 1 < provider.peak <= 4
+        assert elapsed < 8 * 0.05
+        db.session.expire_all()
+        after = {m.id: m for m in Mandate.query.filter(Mandate.id.in_(ids))}
+        assert all(after[i].last_debit_at is not None for i in ids if i != ids[5])
+        bad = after[ids[5]]
+        assert (bad.failure_count, bad.last_debit_at, bad.pre_debit_notification_sent_at) == (1, None, None)
+        # 8 results at 3 per commit: two intermediate commits and the final one.
+        assert len(commits) == 3
+
+
+class RecordingProvider:
+    API_CALLS_PER_DEBIT = 1
+
+    def __init__(self):
+        self.keys = []
+        self.charges = {}
+
+    def execute_debit(self, external_mandate_id, amount_paise, description=None, idempotency_key=None):
+        self.keys.append(idempotency_key)
+        # Replays the first charge for a repeated key, as the gateway does.
+        return self.charges.setdefault(idempotency_key, {"payment_id": f"pay-{len(self.charges)}", "status": "captured"})
+
+
+def test_failed_commit_logs_outcomes_and_retry_reuses_keys(app, monkeypatch, capsys):
+    provider = RecordingProvider()
+    monkeypatch.setattr(mandate_debits, "create_app", lambda: app)
+    monkeypatch.setattr(mandate_debits, "get_upi_provider", lambda: provider)
+    monkeypatch.setattr(mandate_debits, "_upi_rate_limiter", lambda: TokenBucket(rate=1000, capacity=10))
+    monkeypatch.setitem(app.config, "DEBIT_COMMIT_BATCH", 2)
+    real_commit = db.session.commit
+    real_run_debits = mandate_debits.run_debits
+
+    def run_debits_with_broken_commit(debits):
+        def broken():
+            raise RuntimeError("connection lost")
+        monkeypatch.setattr(db.session, "commit", broken)
+        try:
+            return real_run_debits(debits)
+        finally:
+            monkeypatch.setattr(db.session, "commit", real_commit)
+
+    with app.app_context():
+        mandate_debits.process_due_debits()
+        notified = datetime.utcnow() - timedelta(hours=25)
+        mandates = []
+        for i in range(3):
+            user = User(email=f"{uuid.uuid4().hex}@example.com", password_hash="x")
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(UserBalance(user_id=user.id, pending_paise=1_000, pending_count=1))
+            mandates.append(Mandate(user_id=user.id, status="active", max_amount_paise=50_000, frequency="daily",
+                                    external_mandate_id=f"ext-{uuid.uuid4().hex[:8]}",
+                                    next_debit_at=notified, pre_debit_notification_sent_at=notified))
+        db.session.add_all(mandates)
+        db.session.commit()
+        ids = [m.id for m in mandates]
+        capsys.readouterr()
+
+        monkeypatch.setattr(mandate_debits, "run_debits", run_debits_with_broken_commit)
+        with pytest.raises(RuntimeError):
+            mandate_debits.process_due_debits()
+        out = capsys.readouterr().out
+        assert all(f"[DEBIT UNRECORDED] Mandate {i}:" in out for i in ids)
+        first_keys = list(provider.keys)
+
+        # The money moved but nothing was recorded; once the row leases lapse the next run retries.
+        db.session.execute(update(Mandate).where(Mandate.id.in_(ids)).values(lease_owner=None, lease_until=None))
+        db.session.commit()
+        monkeypatch.setattr(mandate_debits, "run_debits", real_run_debits)
+        mandate_debits.process_due_debits()
+
+        assert sorted(provider.keys[len(first_keys):]) == sorted(first_keys)
+        assert len(provider.charges) == 3
+        db.session.expire_all()
+        assert all(db.session.get(Mandate, i).last_debit_at is not None for i in ids)
+
+
+def test_mock_upi_replays_keys_per_instance_and_forgets_the_oldest(monkeypatch):
+    monkeypatch.setattr(upi_mock, "MAX_REMEMBERED_DEBITS", 2)
+    provider = upi_mock.MockUPIProvider()
+    first = provider.execute_debit("ext-1", 100, idempotency_key="k1")
+    assert provider.execute_debit("ext-1", 100, idempotency_key="k1") is first
+    assert upi_mock.MockUPIProvider().execute_debit("ext-1", 100, idempotency_key="k1") is not first
+
+    provider.execute_debit("ext-1", 100, idempotency_key="k2")
+    provider.execute_debit("ext-1", 100, idempotency_key="k3")
+    assert list(provider._debits) == ["k2", "k3"]
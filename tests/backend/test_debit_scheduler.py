@@ -0,0 +1,112 @@
+import uuid
+from datetime import datetime, timedelta
+
+from backend.extensions import db
+from backend.jobs import mandate_debits
+from backend.jobs.scheduler import DebitScheduler, due_time
+from backend.models.mandate import Mandate
+from backend.models.user import User
+from backend.models.user_balance import UserBalance
+from backend.services.rate_limiter import TokenBucket
+
+
+def test_due_time_waits_for_notice_and_lease():
+    now = datetime(2026, 1, 1, 12)
+    due = now - timedelta(hours=1)
+    assert due_time("active", due, None, None, now) == due
+    assert due_time("paused", due, None, None, now) is None
+    assert due_time("active", due, now - timedelta(hours=2), None, now) == now + timedelta(hours=22)
+    assert due_time("active", due, None, now + timedelta(minutes=30), now) == now + timedelta(minutes=30)
+
+
+def test_heap_fires_in_due_order_and_spreads_bursts():
+    now = datetime(2026, 1, 1, 12)
+    sched = DebitScheduler(fire=lambda ids, at: len(ids), max_per_tick=2)
+    for i in range(5):
+        sched.schedule(i, now - timedelta(seconds=i))
+    sched.schedule(9, now + timedelta(minutes=5))
+    sched.schedule(3, None)
+    sched.schedule(1, now + timedelta(hours=1))
+    assert sched.pop_due(now, 2) == [4, 2]
+    assert sched.pop_due(now, 2) == [0]
+    assert sched.next_due() == now + timedelta(minutes=5)
+    assert len(sched) == 2
+
+
+def test_scheduler_fires_due_mandates_and_picks_up_changes(app):
+    fired = []
+
+    def fire(ids, at):
+        fired.extend(ids)
+        return len(ids)
+
+    with app.app_context():
+        now = datetime.utcnow()
+        user = User(email=f"{uuid.uuid4().hex}@example.com", password_hash="x")
+        db.session.add(user)
+        db.session.flush()
+        soon = Mandate(user_id=user.id, status="active", max_amount_paise=10_000, next_debit_at=now + timedelta(minutes=1))
+        later = Mandate(user_id=user.id, status="active", max_amount_paise=10_000, next_debit_at=now + timedelta(hours=2))
+        paused = Mandate(user_id=user.id, status="paused", max_amount_paise=10_000, next_debit_at=now)
+        db.session.add_all([soon, later, paused])
+        db.session.commit()
+        ids = {"soon": soon.id, "later": later.id, "paused": paused.id}
+
+        sched = DebitScheduler(fire=fire, max_per_tick=10_000)
+        sched.load(now)
+        assert sched._due[ids["soon"]] == soon.next_debit_at
+        assert ids["paused"] not in sched._due
+
+        # Nothing of ours is due yet; a minute later only the first mandate fires.
+        sched.tick(now)
+        assert not set(fired) & set(ids.values())
+        sched.tick(now + timedelta(minutes=1))
+        assert ids["soon"] in fired and ids["later"] not in fired
+
+        # Resuming the paused mandate and moving the other one earlier are seen by the next refresh.
+        db.session.get(Mandate, ids["paused"]).status = "active"
+        db.session.get(Mandate, ids["later"]).next_debit_at = now + timedelta(minutes=2)
+        db.session.commit()
+        fired.clear()
+        sched.tick(now + timedelta(minutes=3))
+        assert {ids["paused"], ids["later"]} <= set(fired)
+
+
+def test_failed_debit_backs_off_instead_of_refiring(app, monkeypatch):
+    calls = []
+
+    class DownProvider:
+        API_CALLS_PER_DEBIT = 1
+
+        def execute_debit(self, external_mandate_id, amount_paise, description=None, idempotency_key=None):
+            calls.append(external_mandate_id)
+            raise RuntimeError("gateway timeout")
+
+    monkeypatch.setattr(mandate_debits, "get_upi_provider", lambda: DownProvider())
+    monkeypatch.setattr(mandate_debits, "_upi_rate_limiter", lambda: TokenBucket(rate=1000, capacity=10))
+
+    with app.app_context():
+        now = datetime.utcnow()
+        user = User(email=f"{uuid.uuid4().hex}@example.com", password_hash="x")
+        db.session.add(user)
+        db.session.flush()
+        db.session.add(UserBalance(user_id=user.id, pending_paise=2_000, pending_count=1))
+        mandate = Mandate(user_id=user.id, status="active", max_amount_paise=10_000,
+                          external_mandate_id=f"ext-{uuid.uuid4().hex[:8]}", next_debit_at=now - timedelta(minutes=1),
+                          pre_debit_notification_sent_at=now - timedelta(hours=25))
+        db.session.add(mandate)
+        db.session.commit()
+        mandate_id = mandate.id
+
+        # Other tests' mandates share the table; only ours is fired for real.
+        sched = DebitScheduler(fire=lambda ids, at: mandate_debits.process_mandates([i for i in ids if i == mandate_id], at))
+        sched.load(now)
+        for second in range(3):
+            sched.tick(now + timedelta(seconds=second))
+
+        assert len(calls) == 1
+        db.session.expire_all()
+        mandate = db.session.get(Mandate, mandate_id)
+        assert mandate.status == "active" and mandate.failure_count == 1
+        assert mandate.next_debit_at >= now + mandate_debits.DEBIT_RETRY_BASE
+        assert sched._due[mandate_id] == mandate.next_debit_at
@@ -0,0 +1,21 @@
+from backend.services.dedupe_filter import BloomFilter, RecentIdFilter
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bf = BloomFilter(capacity=1000, error_rate=0.01)
+    keys = [f"txn-{i}" for i in range(1000)]
+    for k in keys:
+        bf.add(k)
+    assert all(k in bf for k in keys)
+    false_positives = sum(1 for i in range(10000) if f"other-{i}" in bf)
+    assert false_positives < 300
+
+
+def test_recent_id_filter_rotates_generations():
+    f = RecentIdFilter(capacity=10, error_rate=0.01)
+    f.add_many(f"a{i}" for i in range(10))
+    f.add_many(f"b{i}" for i in range(10))
+    assert f.might_contain("a0") and f.might_contain("b9")
+    f.add_many(f"c{i}" for i in range(10))
+    assert f.might_contain("c0")
+    assert not all(f.might_contain(f"a{i}") for i in range(10))
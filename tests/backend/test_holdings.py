@@ -0,0 +1,59 @@
+import uuid
+
+from backend.extensions import db
+from backend.models.holding import Holding
+from backend.models.investment import InvestmentOrder
+from backend.models.user import User
+from backend.services.holdings_service import add_to_holdings, rebuild_holdings, redeem_from_holding
+
+
+def test_holding_follows_orders_and_redemptions(app, client, register_user):
+    headers, user_id = register_user()
+    client.post("/api/mandates", json={}, headers=headers)
+    for amount in (95, 48.5):
+        client.post("/api/transactions", json={"amount": amount}, headers=headers)
+    client.post("/api/investments/execute", json={}, headers=headers)
+    client.post("/api/transactions", json={"amount": 91}, headers=headers)
+    client.post("/api/investments/execute/allocated", json={}, headers=headers)
+    with app.app_context():
+        mf = db.session.get(Holding, (user_id, "mf"))
+        assert (mf.invested_paise, mf.redeemed_paise) == (650, 0)
+        assert mf.units_micro == InvestmentOrder.query.filter_by(user_id=user_id, product_type="mf").one().units_micro
+        assert {h.product_type for h in Holding.query.filter_by(user_id=user_id)} == {"mf", "mf_debt", "mf_equity", "gold"}
+
+    r = client.post("/api/investments/redeem", json={"amount_paise": 651, "product_type": "mf"}, headers=headers)
+    assert r.status_code == 400
+    assert r.get_json()["available_paise"] == 650
+    assert client.post("/api/investments/redeem", json={"amount_paise": 600, "product_type": "mf"}, headers=headers).status_code == 200
+    r = client.post("/api/investments/redeem", json={"amount_paise": 51, "product_type": "mf"}, headers=headers)
+    assert r.get_json() == {"error": "insufficient_invested_balance", "available_paise": 50}
+    with app.app_context():
+        assert db.session.get(Holding, (user_id, "mf")).redeemed_paise == 600
+        assert rebuild_holdings(user_id) == {}
+
+
+def test_conditional_decrement_and_seeding(app):
+    with app.app_context():
+        user = User(email=f"{uuid.uuid4().hex}@example.com", password_hash="x")
+        db.session.add(user)
+        db.session.flush()
+        db.session.add(InvestmentOrder(user_id=user.id, product_type="gold", amount_paise=1_000, units_micro=1_400, status="executed"))
+        db.session.flush()
+        # No holding row yet (as for data older than the table): seeded from the orders on first use.
+        assert redeem_from_holding(user.id, "gold", 600, 700)
+        # Each of these fits the original amount, but not after the first.
+        assert not redeem_from_holding(user.id, "gold", 600, 700)
+        assert redeem_from_holding(user.id, "gold", 400, 900)
+        db.session.commit()
+        row = db.session.get(Holding, (user.id, "gold"))
+        db.session.refresh(row)
+        assert (row.invested_paise, row.redeemed_paise, row.units_micro) == (1_000, 1_000, 0)
+
+        order = InvestmentOrder(user_id=user.id, product_type="gold", amount_paise=300, units_micro=420, status="executed")
+        db.session.add(order)
+        db.session.flush()
+        add_to_holdings([{"user_id": user.id, "product_type": "gold", "amount_paise": 300, "units_micro": 420}])
+        db.session.commit()
+        db.session.refresh(row)
+        assert (row.invested_paise, row.units_micro) == (1_300, 420)
+        assert redeem_from_holding(user.id, "mf", 1) is False
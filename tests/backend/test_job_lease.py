@@ -0,0 +1,62 @@
+import uuid
+from datetime import datetime, timedelta
+
+from backend.extensions import db
+from backend.jobs import mandate_debits
+from backend.models.mandate import Mandate
+from backend.models.user import User
+from backend.services.job_lease_service import JobLeaseHolder, advisory_key
+
+
+def test_one_leader_until_lease_expires_or_is_released(app):
+    with app.app_context():
+        name = f"test-{uuid.uuid4().hex[:8]}"
+        now = datetime.utcnow()
+        a = JobLeaseHolder(name, timedelta(seconds=30))
+        b = JobLeaseHolder(name, timedelta(seconds=30))
+        assert a.acquire(now)
+        assert not b.acquire(now + timedelta(seconds=10))
+
+        # Heartbeats keep the lease alive past the original TTL.
+        assert a.hold(now + timedelta(seconds=20))
+        assert not b.acquire(now + timedelta(seconds=40))
+
+        # A leader that stops heartbeating is replaced, and finds out on its next renew.
+        assert b.acquire(now + timedelta(seconds=60))
+        assert not a.hold(now + timedelta(seconds=61))
+        assert not a.held
+
+        b.release()
+        assert a.acquire(now + timedelta(seconds=62))
+        a.release()
+
+
+def test_advisory_key_is_stable_and_signed_64_bit():
+    assert advisory_key("mandate_debits") == advisory_key("mandate_debits")
+    assert advisory_key("mandate_debits") != advisory_key("debit_scheduler")
+    assert -(2 ** 63) <= advisory_key("debit_scheduler:3") < 2 ** 63
+
+
+def test_debit_job_skips_while_another_worker_leads(app, monkeypatch):
+    monkeypatch.setattr(mandate_debits, "create_app", lambda: app)
+    with app.app_context():
+        user = User(email=f"{uuid.uuid4().hex}@example.com", password_hash="x")
+        db.session.add(user)
+        db.session.flush()
+        mandate = Mandate(user_id=user.id, status="active", max_amount_paise=10_000,
+                          next_debit_at=datetime.utcnow() - timedelta(minutes=1))
+        db.session.add(mandate)
+        db.session.commit()
+
+        other = JobLeaseHolder(mandate_debits.DEBIT_JOB_NAME, mandate_debits.DEBIT_LEASE)
+        assert other.acquire()
+        try:
+            mandate_debits.process_due_debits()
+            db.session.expire_all()
+            assert db.session.get(Mandate, mandate.id).next_debit_at < datetime.utcnow()
+        finally:
+            other.release()
+
+        mandate_debits.process_due_debits()
+        db.session.expire_all()
+        assert db.session.get(Mandate, mandate.id).next_debit_at > datetime.utcnow()
@@ -0,0 +1,176 @@
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from backend.extensions import db
+from backend.jobs import mandate_debits
+from backend.models.event import EventLog
+from backend.models.job_checkpoint import JobCheckpoint
+from backend.models.mandate import Mandate
+from backend.models.user import User
+from backend.models.user_balance import UserBalance
+
+
+def test_pending_totals_prefetched_once_per_batch(app, monkeypatch):
+    monkeypatch.setattr(mandate_debits, "create_app", lambda: app)
+    monkeypatch.setattr(mandate_debits, "DEBIT_CLAIM_BATCH", 2)
+    with app.app_context():
+        due = datetime.utcnow() - timedelta(minutes=1)
+        users = [User(email=f"{uuid.uuid4().hex}@example.com", password_hash="x") for _ in range(3)]
+        db.session.add_all(users)
+        db.session.flush()
+        for user, pending in zip(users, (2_500, 90_000, 0)):
+            db.session.add(UserBalance(user_id=user.id, pending_paise=pending, pending_count=1 if pending else 0))
+        mandates = [
+            Mandate(user_id=u.id, status="active", max_amount_paise=50_000, frequency="daily", next_debit_at=due)
+            for u in users
+        ]
+        db.session.add_all(mandates)
+        db.session.commit()
+        ids = [m.id for m in mandates]
+        user_ids = [u.id for u in users]
+
+        # The session DB may hold due mandates from other tests; each batch of 2 is one query.
+        due_count = Mandate.query.filter(Mandate.status == "active", Mandate.next_debit_at <= datetime.utcnow()).count()
+        balance_queries = []
+
+        def count(conn, cursor, statement, *args):
+            if statement.lstrip().upper().startswith("SELECT") and "user_balances" in statement:
+                balance_queries.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", count)
+        try:
+            mandate_debits.process_due_debits()
+        finally:
+            event.remove(db.engine, "before_cursor_execute", count)
+
+        db.session.expire_all()
+        assert len(balance_queries) == -(-due_count // 2)
+        notices = dict(
+            db.session.query(EventLog.user_id, EventLog.amount_paise)
+            .filter(EventLog.user_id.in_(user_ids), EventLog.event_type == "pre_debit_sent")
+        )
+        assert notices == {user_ids[0]: 2_500, user_ids[1]: 50_000}
+        skipped = db.session.get(Mandate, ids[2])
+        assert skipped.next_debit_at > datetime.utcnow() + timedelta(hours=23)
+        assert all(db.session.get(Mandate, i).lease_owner is None for i in ids)
+
+
+def test_interrupted_run_resumes_after_last_committed_batch(app, monkeypatch):
+    monkeypatch.setattr(mandate_debits, "create_app", lambda: app)
+    monkeypatch.setattr(mandate_debits, "DEBIT_CLAIM_BATCH", 2)
+    with app.app_context():
+        # Earlier tests in this session may have left due mandates behind; settle them first.
+        mandate_debits.process_due_debits()
+        due = datetime.utcnow() - timedelta(minutes=1)
+        user = User(email=f"{uuid.uuid4().hex}@example.com", password_hash="x")
+        db.session.add(user)
+        db.session.flush()
+        db.session.add(UserBalance(user_id=user.id, pending_paise=1_000, pending_count=1))
+        mandates = [Mandate(user_id=user.id, status="active", max_amount_paise=50_000, next_debit_at=due) for _ in range(5)]
+        db.session.add_all(mandates)
+        db.session.commit()
+        ids = [m.id for m in mandates]
+
+        seen = []
+        real = mandate_debits.process_mandate
+
+        def crash_on_third(mandate, *args, **kwargs):
+            if mandate.id == ids[2]:
+                raise RuntimeError("worker killed")
+            seen.append(mandate.id)
+            return real(mandate, *args, **kwargs)
+
+        monkeypatch.setattr(mandate_debits, "process_mandate", crash_on_third)
+        try:
+            mandate_debits.process_due_debits()
+        except RuntimeError:
+            pass
+        db.session.rollback()
+        checkpoint = db.session.get(JobCheckpoint, mandate_debits.DEBIT_JOB_NAME)
+        db.session.refresh(checkpoint)
+        assert (checkpoint.status, checkpoint.last_key) == ("running", ids[1])
+        # The crashed batch's lease runs out before the rerun.
+        Mandate.query.filter(Mandate.id.in_(ids)).update({"lease_owner": None, "lease_until": None})
+        db.session.commit()
+
+        seen.clear()
+        monkeypatch.setattr(mandate_debits, "process_mandate", lambda mandate, *a, **kw: seen.append(mandate.id) or real(mandate, *a, **kw))
+        mandate_debits.process_due_debits()
+        assert seen == ids[2:]
+        db.session.refresh(checkpoint)
+        assert checkpoint.status == "completed"
+
+
+def test_pre_debit_notices_written_in_bulk(app, monkeypatch):
+    monkeypatch.setattr(mandate_debits, "create_app", lambda: app)
+    with app.app_context():
+        # Earlier tests in this session may have left due mandates behind; settle them first.
+        mandate_debits.process_due_debits()
+        due = datetime.utcnow() - timedelta(minutes=1)
+        users = [User(email=f"{uuid.uuid4().hex}@example.com", password_hash="x") for _ in range(6)]
+        db.session.add_all(users)
+        db.session.flush()
+        db.session.add_all(UserBalance(user_id=u.id, pending_paise=1_000 * (i + 1), pending_count=1) for i, u in enumerate(users))
+        mandates = [Mandate(user_id=u.id, status="active", max_amount_paise=50_000, next_debit_at=due) for u in users]
+        db.session.add_all(mandates)
+        db.session.commit()
+        ids = [m.id for m in mandates]
+
+        writes = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith(("INSERT INTO EVENT_LOGS", "UPDATE MANDATES SET PRE_DEBIT")):
+                writes.append(statement.split()[0])
+
+        event.listen(db.engine, "before_cursor_execute", capture)
+        try:
+            mandate_debits.process_due_debits()
+        finally:
+            event.remove(db.engine, "before_cursor_execute", capture)
+
+        assert writes == ["INSERT", "UPDATE"]
+        db.session.expire_all()
+        notified = Mandate.query.filter(Mandate.id.in_(ids)).all()
+        assert all(m.pre_debit_notification_sent_at is not None for m in notified)
+        amounts = sorted(
+            a for (a,) in db.session.query(EventLog.amount_paise)
+            .filter(EventLog.user_id.in_([u.id for u in users]), EventLog.event_type == "pre_debit_sent")
+        )
+        assert amounts == [1_000, 2_000, 3_000, 4_000, 5_000, 6_000]
+
+
+def test_pre_debit_notices_dispatched_after_commit(app, monkeypatch):
+    monkeypatch.setattr(mandate_debits, "create_app", lambda: app)
+    with app.app_context():
+        mandate_debits.process_due_debits()
+        user = User(email=f"{uuid.uuid4().hex}@example.com", password_hash="x")
+        db.session.add(user)
+        db.session.flush()
+        db.session.add(UserBalance(user_id=user.id, pending_paise=2_500, pending_count=1))
+        mandate = Mandate(user_id=user.id, status="active", max_amount_paise=50_000,
+                          next_debit_at=datetime.utcnow() - timedelta(minutes=1))
+        db.session.add(mandate)
+        db.session.commit()
+
+        steps = []
+        real_write, real_commit = mandate_debits.send_pre_debit_notifications, db.session.commit
+
+        def write(notices, now=None):
+            steps.append("write")
+            return real_write(notices, now)
+
+        def commit():
+            steps.append("commit")
+            real_commit()
+
+        monkeypatch.setattr(mandate_debits, "send_pre_debit_notifications", write)
+        monkeypatch.setattr(db.session, "commit", commit)
+        monkeypatch.setattr(mandate_debits, "dispatch_notifications",
+                            lambda messages: steps.append(("dispatch", [m["user_id"] for m in messages])))
+        mandate_debits.process_due_debits()
+
+        written = steps.index("write")
+        assert steps[written + 1] == "commit"
+        assert steps[written + 2] == ("dispatch", [user.id])
@@ -0,0 +1,43 @@
+import random
+
+from backend.providers.mf.mock import MockMFProvider
+from backend.services.omnibus_service import place_omnibus_orders, split_units
+
+
+def test_split_units_is_exact_and_proportional():
+    rng = random.Random(7)
+    for _ in range(200):
+        amounts = [rng.randint(1, 50_000) for _ in range(rng.randint(1, 30))]
+        total = rng.randint(0, 10**9)
+        shares = split_units(total, amounts)
+        assert sum(shares) == total
+        for amount, share in zip(amounts, shares):
+            exact = total * amount / sum(amounts)
+            assert abs(share - exact) < 1
+    assert split_units(10, [1, 1, 1]) == [4, 3, 3]
+
+
+def test_one_provider_call_per_batch(app, monkeypatch):
+    calls = []
+    real = MockMFProvider.place_orders
+
+    def counting(self, orders):
+        calls.append(orders)
+        return real(self, orders)
+
+    monkeypatch.setattr(MockMFProvider, "place_orders", counting)
+    orders = [
+        {"user_id": 1, "product_type": "mf_equity", "amount_paise": 30_000},
+        {"user_id": 2, "product_type": "mf_equity", "amount_paise": 10_000},
+        {"user_id": 3, "product_type": "mf_debt", "amount_paise": 7_000},
+    ]
+    with app.app_context():
+        place_omnibus_orders(orders)
+    assert len(calls) == 1
+    assert sorted(o["scheme_code"] for o in calls[0]) == ["MOCK-DEBT-G", "MOCK-EQUITY-G"]
+    equity = next(o for o in calls[0] if o["scheme_code"] == "MOCK-EQUITY-G")
+    assert equity["amount_paise"] == 40_000
+    assert {o["status"] for o in orders} == {"executed"}
+    assert orders[0]["external_order_id"] == orders[1]["external_order_id"] != orders[2]["external_order_id"]
+    assert orders[0]["units_micro"] + orders[1]["units_micro"] == 40_000 * 1_000_000 // 12_345_600
+    assert orders[0]["units_micro"] > 2 * orders[1]["units_micro"]
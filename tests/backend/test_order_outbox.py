@@ -0,0 +1,99 @@
+import uuid
+from datetime import datetime, timedelta
+
+from backend.extensions import db
+from backend.jobs.order_outbox import drain_outbox
+from backend.jobs.sweep import sweep_chunk
+from backend.models.holding import Holding
+from backend.models.investment import InvestmentOrder
+from backend.models.ledger import LedgerEntry
+from backend.models.order_outbox import OrderOutbox
+from backend.models.roundup import Roundup
+from backend.providers.mf.mock import MockMFProvider
+from backend.services.balance_service import get_pending_balance
+from backend.services.investment_service import execute_pending_roundups
+from backend.services.order_outbox_service import reconcile_pending_orders
+
+
+def user_with_pending(client):
+    r = client.post("/api/auth/register", json={
+        "email": f"{uuid.uuid4().hex}@example.com",
+        "password": "secret",
+    })
+    data = r.get_json()
+    headers = {"Authorization": f"Bearer {data['access_token']}"}
+    client.post("/api/transactions/batch", headers=headers, json=[{"amount": 247}, {"amount": 118}])
+    return data["user"]["id"]
+
+
+def respond(status):
+    def place_orders(self, orders):
+        return [{"reference": o["reference"], "external_order_id": f"EXT-{o['reference']}", "status": status} for o in orders]
+    return place_orders
+
+
+def test_provider_error_is_retried_by_worker(app, client, monkeypatch):
+    user_id = user_with_pending(client)
+
+    def broken(self, orders):
+        raise ConnectionError("provider down")
+
+    monkeypatch.setattr(MockMFProvider, "place_orders", broken)
+    with app.app_context():
+        order = execute_pending_roundups(user_id)
+        assert order.status == "pending"
+        assert {r.status for r in Roundup.query.filter_by(user_id=user_id)} == {"reserved"}
+        assert get_pending_balance(user_id) == (0, 0)
+        entry = OrderOutbox.query.filter_by(order_id=order.id).one()
+        assert (entry.status, entry.attempts) == ("queued", 1) and entry.next_attempt_at > datetime.utcnow()
+
+        monkeypatch.undo()
+        entry.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+        db.session.commit()
+        assert drain_outbox() >= 1
+        db.session.refresh(order)
+        assert order.status == "executed"
+        assert {r.status for r in Roundup.query.filter_by(user_id=user_id)} == {"invested"}
+        assert LedgerEntry.query.filter_by(reference_id=order.id, reference_type="InvestmentOrder").count() == 1
+
+
+def test_accepted_order_is_reconciled(app, client, monkeypatch):
+    user_id = user_with_pending(client)
+    monkeypatch.setattr(MockMFProvider, "place_orders", respond("pending"))
+    with app.app_context():
+        order = execute_pending_roundups(user_id)
+        assert order.status == "pending" and order.external_order_id
+        assert OrderOutbox.query.filter_by(order_id=order.id).one().status == "sent"
+        reconcile_pending_orders(now=datetime.utcnow() + timedelta(minutes=5))
+        db.session.refresh(order)
+        assert order.status == "executed"
+        assert {r.status for r in Roundup.query.filter_by(user_id=user_id)} == {"invested"}
+
+
+def test_rejected_order_releases_roundups(app, client, monkeypatch):
+    user_id = user_with_pending(client)
+    monkeypatch.setattr(MockMFProvider, "place_orders", respond("failed"))
+    with app.app_context():
+        order = execute_pending_roundups(user_id)
+        assert order.status == "failed"
+        roundups = Roundup.query.filter_by(user_id=user_id).all()
+        assert {(r.status, r.investment_id) for r in roundups} == {("pending", None)}
+        assert get_pending_balance(user_id) == (500, 2)
+
+
+def test_reconciled_omnibus_units_are_split_across_members(app, client, monkeypatch):
+    user_ids = [user_with_pending(client) for _ in range(3)]
+    monkeypatch.setattr(MockMFProvider, "place_orders", respond("pending"))
+    monkeypatch.setattr(
+        MockMFProvider, "get_order_statuses",
+        lambda self, ids: {ext_id: {"status": "executed", "units_micro": 3_000_001} for ext_id in ids},
+    )
+    with app.app_context():
+        sweep_chunk(user_ids, datetime.utcnow())
+        orders = InvestmentOrder.query.filter(InvestmentOrder.user_id.in_(user_ids)).all()
+        assert len({o.external_order_id for o in orders}) == 1
+
+        reconcile_pending_orders(now=datetime.utcnow() + timedelta(minutes=5))
+
+        units = sorted(db.session.get(Holding, (uid, "mf")).units_micro for uid in user_ids)
+        assert units == [1_000_000, 1_000_000, 1_000_001]
@@ -0,0 +1,36 @@
+def test_cursor_walks_every_row_once_in_order(client, register_user):
+    headers, _ = register_user()
+    # Two rows share a timestamp so the id tie-breaker is exercised.
+    stamps = ["2024-01-01T10:00:00", "2024-01-02T10:00:00", "2024-01-02T10:00:00", "2024-01-03T10:00:00", "2024-01-04T10:00:00"]
+    client.post("/api/transactions/batch", headers=headers, json=[
+        {"amount": 10 + i, "timestamp": ts} for i, ts in enumerate(stamps)
+    ])
+    seen, cursor = [], None
+    while True:
+        query = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        r = client.get("/api/transactions", headers=headers, query_string=query)
+        assert r.status_code == 200
+        page = r.get_json()
+        assert len(page) <= 2
+        seen.extend(page)
+        cursor = r.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    keys = [(t["timestamp"], t["id"]) for t in seen]
+    assert len(keys) == 5 and len(set(keys)) == 5
+    assert keys == sorted(keys, reverse=True)
+
+
+def test_bad_cursor_and_page_size_cap(app, client, register_user):
+    headers, _ = register_user()
+    r = client.get("/api/roundups", headers=headers, query_string={"cursor": "not-a-cursor"})
+    assert r.status_code == 400
+    client.post("/api/transactions/batch", headers=headers, json=[{"amount": 11}] * 3)
+    app.config["MAX_PAGE_SIZE"] = 2
+    try:
+        r = client.get("/api/ledger", headers=headers, query_string={"limit": 1000})
+        assert r.status_code == 200
+        r = client.get("/api/roundups", headers=headers, query_string={"limit": 1000})
+        assert len(r.get_json()) == 2 and r.headers.get("X-Next-Cursor")
+    finally:
+        app.config["MAX_PAGE_SIZE"] = 200
@@ -0,0 +1,57 @@
+from datetime import datetime
+
+from backend.jobs.sweep import sweep_chunk
+from backend.providers.mf.mock import MockMFProvider
+
+
+def poll(client, headers, etag=None):
+    extra = {"If-None-Match": etag} if etag else {}
+    return client.get("/api/portfolio", headers={**headers, **extra})
+
+
+def test_portfolio_etag_changes_only_on_writes(client, register_user):
+    headers, _ = register_user()
+    client.post("/api/mandates", json={}, headers=headers)
+    first = poll(client, headers)
+    assert first.status_code == 200 and first.headers["ETag"]
+    assert first.get_json() == {"pending_roundups_paise": 0, "invested_total_paise": 0, "positions_paise": {}}
+
+    unchanged = poll(client, headers, first.headers["ETag"])
+    assert unchanged.status_code == 304 and unchanged.data == b""
+    assert unchanged.headers["ETag"] == first.headers["ETag"]
+
+    client.post("/api/transactions", json={"amount": 95}, headers=headers)
+    after_tx = poll(client, headers, first.headers["ETag"])
+    assert after_tx.status_code == 200
+    assert after_tx.get_json()["pending_roundups_paise"] == 500
+    assert poll(client, headers, after_tx.headers["ETag"]).status_code == 304
+
+    client.post("/api/investments/execute", json={}, headers=headers)
+    after_invest = poll(client, headers, after_tx.headers["ETag"])
+    assert after_invest.status_code == 200
+    assert after_invest.get_json() == {"pending_roundups_paise": 0, "invested_total_paise": 500, "positions_paise": {"mf": 500}}
+
+    client.post("/api/investments/redeem", json={"amount_paise": 100, "product_type": "mf"}, headers=headers)
+    assert poll(client, headers, after_invest.headers["ETag"]).status_code == 200
+    # A rejected redeem changes nothing.
+    etag = poll(client, headers).headers["ETag"]
+    client.post("/api/investments/redeem", json={"amount_paise": 10_000, "product_type": "mf"}, headers=headers)
+    assert poll(client, headers, etag).status_code == 304
+
+
+def test_portfolio_etag_changes_when_sweep_order_is_only_accepted(app, client, register_user, monkeypatch):
+    headers, user_id = register_user()
+    client.post("/api/transactions/batch", headers=headers, json=[{"amount": 247}, {"amount": 118}])
+    before = poll(client, headers)
+    assert before.get_json()["pending_roundups_paise"] == 500
+
+    def accept(self, orders):
+        return [{"reference": o["reference"], "external_order_id": f"EXT-{o['reference']}", "status": "pending"} for o in orders]
+
+    monkeypatch.setattr(MockMFProvider, "place_orders", accept)
+    with app.app_context():
+        sweep_chunk([user_id], datetime.utcnow())
+
+    after = poll(client, headers, before.headers["ETag"])
+    assert after.status_code == 200
+    assert after.get_json()["pending_roundups_paise"] == 0
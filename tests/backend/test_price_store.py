@@ -0,0 +1,47 @@
+import uuid
+from datetime import date
+
+from backend.jobs.load_prices import load_prices
+from backend.services.price_store import PriceStore, get_price_store
+
+
+def test_store_merges_days_and_serves_latest(tmp_path):
+    store = PriceStore(str(tmp_path))
+    assert store.latest("X") is None
+    assert store.write("X", {date(2024, 1, 3): 300, date(2024, 1, 1): 100}) == 2
+    assert store.latest("X") == (date(2024, 1, 3), 300)
+    # Overwrite a day, backfill an older one; the cached latest must follow the rewrite.
+    assert store.write("X", {date(2024, 1, 3): 310, date(2023, 12, 31): 90}) == 3
+    assert store.latest("X") == (date(2024, 1, 3), 310)
+    assert store.series("X")["day"].tolist() == sorted(store.series("X")["day"].tolist())
+    assert store.price_on("X", date(2024, 1, 2)) == 100
+    assert store.price_on("X", date(2023, 1, 1)) is None
+    assert store.latest_prices(["X", "missing"]) == {"X": 310}
+
+
+def test_valuation_uses_units_and_latest_price(app, client, tmp_path, monkeypatch):
+    monkeypatch.setitem(app.config, "PRICE_STORE_DIR", str(tmp_path))
+    r = client.post("/api/auth/register", json={"email": f"{uuid.uuid4().hex}@example.com", "password": "secret"})
+    headers = {"Authorization": f"Bearer {r.get_json()['access_token']}"}
+    client.post("/api/mandates", json={}, headers=headers)
+    client.post("/api/transactions", json={"amount": 95}, headers=headers)
+
+    # No prices loaded yet: valued at cost.
+    order = client.post("/api/investments/execute", json={}, headers=headers).get_json()
+    assert order["status"] == "executed" and order["units_micro"] == 500
+    value = client.get("/api/portfolio/value", headers=headers).get_json()
+    assert value["current_value_paise_by_product"] == {"mf": 500}
+
+    with app.app_context():
+        load_prices(date(2024, 1, 1))
+        get_price_store().write("MOCK-LIQUID-G", {date(2024, 1, 2): 1_100_000})
+    value = client.get("/api/portfolio/value", headers=headers).get_json()
+    assert value["price_paise_by_product"] == {"mf": 1_100_000}
+    assert value["current_value_paise_by_product"] == {"mf": 550}
+    assert value["pnl_paise"] == 50
+
+    redemption = client.post("/api/investments/redeem", json={"amount_paise": 110, "product_type": "mf"}, headers=headers).get_json()
+    assert redemption["units_micro"] == 100
+    value = client.get("/api/portfolio/value", headers=headers).get_json()
+    assert value["units_micro_by_product"] == {"mf": 400}
+    assert value["current_value_paise_by_product"] == {"mf": 440}
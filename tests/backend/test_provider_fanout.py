@@ -0,0 +1,74 @@
+import time
+
+from backend.models.investment import InvestmentOrder
+from backend.models.order_outbox import OrderOutbox
+from backend.models.roundup import Roundup
+from backend.providers.gold.mock import MockGoldProvider
+from backend.providers.mf.mock import MockMFProvider
+from backend.services.balance_service import get_pending_balance
+from backend.services.investment_service import execute_pending_roundups_allocated
+
+
+def register_with_pending(client, register_user):
+    headers, user_id = register_user()
+    client.post("/api/mandates", headers=headers, json={})
+    client.post("/api/transactions/batch", headers=headers, json=[{"amount": 247}, {"amount": 118}])
+    return headers, user_id
+
+
+def slow(delay):
+    def place_order(self, user_id, amount_paise, product_type="mf"):
+        time.sleep(delay)
+        return {"external_order_id": f"SLOW-{product_type}-{user_id}", "status": "executed"}
+    return place_order
+
+
+def test_allocated_calls_run_in_parallel(client, monkeypatch, register_user):
+    headers, _ = register_with_pending(client, register_user)
+    monkeypatch.setattr(MockMFProvider, "place_order", slow(0.3))
+    monkeypatch.setattr(MockGoldProvider, "place_order", slow(0.3))
+    started = time.monotonic()
+    r = client.post("/api/investments/execute/allocated", headers=headers, json={})
+    elapsed = time.monotonic() - started
+    assert r.status_code == 200, r.data
+    orders = r.get_json()["orders"]
+    assert len(orders) == 3 and {o["status"] for o in orders} == {"executed"}
+    # Three sequential calls would take 0.9s.
+    assert elapsed < 0.7
+
+
+def test_timed_out_call_leaves_order_pending(app, client, monkeypatch, register_user):
+    headers, user_id = register_with_pending(client, register_user)
+    monkeypatch.setattr(MockMFProvider, "place_order", slow(0.01))
+    monkeypatch.setattr(MockGoldProvider, "place_order", slow(0.5))
+    monkeypatch.setitem(app.config, "PROVIDER_TIMEOUT_SECONDS", 0.2)
+    r = client.post("/api/investments/execute/allocated", headers=headers, json={})
+    assert r.status_code == 200, r.data
+    orders = {o["product_type"]: o for o in r.get_json()["orders"]}
+    assert {p: o["status"] for p, o in orders.items()} == {"mf_debt": "executed", "mf_equity": "executed", "gold": "pending"}
+    with app.app_context():
+        # The outbox owns the timed-out order, and no roundup is left pending to be invested twice.
+        assert OrderOutbox.query.filter_by(order_id=orders["gold"]["id"]).one().status == "queued"
+        linked = {(r.status, r.investment_id) for r in Roundup.query.filter_by(user_id=user_id)}
+        assert {status for status, _ in linked} <= {"invested", "reserved"}
+        assert all(oid in {o["id"] for o in orders.values()} for _, oid in linked)
+        assert get_pending_balance(user_id) == (0, 0)
+
+
+def test_failed_call_keeps_only_its_roundups_pending(app, client, monkeypatch, register_user):
+    _, user_id = register_with_pending(client, register_user)
+
+    def down(self, user_id, amount_paise, product_type="mf"):
+        raise ConnectionError("provider down")
+
+    monkeypatch.setattr(MockMFProvider, "place_order", slow(0))
+    monkeypatch.setattr(MockGoldProvider, "place_order", down)
+    with app.app_context():
+        orders = {o.product_type: o.to_dict() for o in execute_pending_roundups_allocated(user_id, {"mf_debt": 50, "gold": 50})}
+        assert orders["gold"]["status"] == "failed"
+        roundups = Roundup.query.filter_by(user_id=user_id).order_by(Roundup.id).all()
+        assert [(r.status, r.investment_id) for r in roundups] == [
+            ("invested", orders["mf_debt"]["id"]), ("pending", None),
+        ]
+        assert get_pending_balance(user_id) == (roundups[1].amount_paise, 1)
+        assert InvestmentOrder.query.filter_by(id=orders["gold"]["id"]).one().external_order_id is None
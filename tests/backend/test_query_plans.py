@@ -0,0 +1,129 @@
+"""
+Query-plan regression checks for the hot per-user queries.
+
+Each query is compiled from the same ORM expressions the app uses and run
+through EXPLAIN against the seeded test database. A full table scan (SQLite
+``SCAN <table>`` / PostgreSQL ``Seq Scan``) or, for paged queries, a sort
+step fails the test, so a dropped or mismatched index shows up here rather
+than in production latency.
+"""
+
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select, text, tuple_
+
+from backend.extensions import db
+from backend.models.event import EventLog
+from backend.models.investment import InvestmentOrder
+from backend.models.ledger import LedgerEntry
+from backend.models.mandate import Mandate
+from backend.models.redemption import Redemption
+from backend.models.roundup import Roundup
+from backend.models.transaction import Transaction
+from backend.models.user import User
+
+NOW = datetime(2024, 6, 15, 12, 0, 0)
+
+
+def hot_queries(user_id):
+    """name -> (statement, must_avoid_sort)"""
+    def page(model, ts_col, *filters):
+        return (
+            select(model)
+            .where(model.user_id == user_id, *filters, tuple_(ts_col, model.id) < tuple_(NOW, 10**9))
+            .order_by(ts_col.desc(), model.id.desc())
+            .limit(101)
+        )
+
+    return {
+        "pending_roundups": (
+            select(db.func.sum(Roundup.amount_paise)).where(Roundup.user_id == user_id, Roundup.status == "pending"),
+            False,
+        ),
+        "roundup_cap_window": (
+            select(db.func.sum(Roundup.amount_paise)).where(
+                Roundup.user_id == user_id, Roundup.created_at >= NOW - timedelta(days=1), Roundup.created_at < NOW,
+            ),
+            False,
+        ),
+        "roundups_page": (page(Roundup, Roundup.created_at), True),
+        "roundups_page_by_status": (page(Roundup, Roundup.created_at, Roundup.status == "invested"), True),
+        "transactions_page": (page(Transaction, Transaction.timestamp), True),
+        "ledger_page": (page(LedgerEntry, LedgerEntry.timestamp), True),
+        "investments_page": (page(InvestmentOrder, InvestmentOrder.created_at), True),
+        "redemptions_page": (page(Redemption, Redemption.created_at), True),
+        "executed_orders_by_product": (
+            select(db.func.sum(InvestmentOrder.amount_paise)).where(
+                InvestmentOrder.user_id == user_id,
+                InvestmentOrder.status == "executed",
+                InvestmentOrder.product_type == "mf",
+            ),
+            False,
+        ),
+        "last_sweep_event": (
+            select(EventLog)
+            .where(EventLog.user_id == user_id, EventLog.event_type == "sweep_executed")
+            .order_by(EventLog.created_at.desc())
+            .limit(1),
+            True,
+        ),
+        "due_mandates": (
+            select(Mandate).where(Mandate.status == "active", Mandate.next_debit_at <= NOW),
+            False,
+        ),
+    }
+
+
+def explain(statement):
+    bind = db.session.get_bind()
+    sql = str(statement.compile(dialect=bind.dialect, compile_kwargs={"literal_binds": True}))
+    if bind.dialect.name == "postgresql":
+        db.session.execute(text("SET LOCAL enable_seqscan = off"))
+        return [row[0] for row in db.session.execute(text("EXPLAIN " + sql))]
+    return [row[-1] for row in db.session.execute(text("EXPLAIN QUERY PLAN " + sql))]
+
+
+def plan_problems(lines, must_avoid_sort):
+    problems = []
+    for line in lines:
+        if (line.startswith("SCAN ") and " USING " not in line) or "Seq Scan" in line:
+            problems.append(line)
+        if must_avoid_sort and ("TEMP B-TREE" in line or line.lstrip().startswith("Sort")):
+            problems.append(line)
+    return problems
+
+
+@pytest.fixture(scope="module")
+def seeded_user(app):
+    with app.app_context():
+        users = [User(email=f"{uuid.uuid4().hex}@example.com", password_hash="x") for _ in range(5)]
+        db.session.add_all(users)
+        db.session.flush()
+        for u in users:
+            for i in range(40):
+                ts = NOW - timedelta(hours=i)
+                tx = Transaction(user_id=u.id, amount_paise=1000 + i, timestamp=ts)
+                db.session.add(tx)
+                db.session.flush()
+                db.session.add(Roundup(
+                    user_id=u.id, transaction_id=tx.id, amount_paise=i + 1,
+                    status="pending" if i % 2 else "invested", created_at=ts,
+                ))
+                db.session.add(LedgerEntry(user_id=u.id, type="credit", amount_paise=i, timestamp=ts))
+                db.session.add(EventLog(user_id=u.id, event_type="sweep_executed", created_at=ts))
+            db.session.add(InvestmentOrder(user_id=u.id, product_type="mf", amount_paise=100, status="executed"))
+            db.session.add(Redemption(user_id=u.id, product_type="mf", amount_paise=100))
+            db.session.add(Mandate(user_id=u.id, status="active", next_debit_at=NOW))
+        db.session.commit()
+        yield users[0].id
+
+
+@pytest.mark.parametrize("name", sorted(hot_queries(0)))
+def test_hot_query_uses_index(app, seeded_user, name):
+    with app.app_context():
+        statement, must_avoid_sort = hot_queries(seeded_user)[name]
+        lines = explain(statement)
+        db.session.rollback()
+        assert not plan_problems(lines, must_avoid_sort), f"{name} plan:\n" + "\n".join(lines)
@@ -0,0 +1,68 @@
+from datetime import date
+
+import numpy as np
+
+from backend.extensions import db
+from backend.jobs.revalue_portfolios import revalue_chunk, revalue_portfolios, value_units
+from backend.models.investment import InvestmentOrder
+from backend.models.portfolio_snapshot import PortfolioSnapshot
+from backend.models.redemption import Redemption
+from backend.models.user import User
+from backend.services.price_store import get_price_store
+from backend.services.valuation_service import compute_positions_value
+
+
+def test_value_units_matches_exact_integer_math():
+    units = np.array([0, 1, 999_999, 10**15, 123_456_789_012], dtype=np.int64)
+    price = np.array([12_345_600, 720_000, 1, 9_999_999, 3_500_000], dtype=np.int64)
+    assert value_units(units, price).tolist() == [u * p // 1_000_000 for u, p in zip(units.tolist(), price.tolist())]
+
+
+def test_revalue_chunk_handles_redemptions_and_missing_prices():
+    orders = [
+        (1, "mf_equity", 10_000, 2_000_000, 0),
+        (1, "gold", 5_000, 0, 5_000),
+        (2, "mf_debt", 7_000, 700_000, 2_000),
+    ]
+    redemptions = [(1, "mf_equity", 500_000), (3, "mf_equity", 1)]
+    result = revalue_chunk(orders, redemptions, {"mf_equity": 6_000, "mf_debt": None, "gold": 700_000})
+    assert result["user_id"].tolist() == [1, 2]
+    assert result["invested_paise"].tolist() == [15_000, 7_000]
+    # user 1: 1.5 units x 6000 + gold at cost; user 2: no mf_debt price, at cost
+    assert result["value_paise"].tolist() == [9_000 + 5_000, 7_000]
+
+
+def test_snapshots_match_per_user_valuation(app, tmp_path, monkeypatch):
+    monkeypatch.setitem(app.config, "PRICE_STORE_DIR", str(tmp_path))
+    day = date(2024, 3, 1)
+    with app.app_context():
+        users = [User(email=f"reval{i}@example.com", password_hash="x") for i in range(5)]
+        db.session.add_all(users)
+        db.session.flush()
+        rng = np.random.default_rng(5)
+        for u in users[:4]:
+            for product in ("mf", "mf_equity", "gold"):
+                amount = int(rng.integers(100, 100_000))
+                units = None if product == "mf" and u is users[0] else amount * 1_000 // 7
+                db.session.add(InvestmentOrder(user_id=u.id, product_type=product, amount_paise=amount,
+                                               units_micro=units, status="executed"))
+        db.session.add(InvestmentOrder(user_id=users[4].id, product_type="gold", amount_paise=900, status="failed"))
+        db.session.add(Redemption(user_id=users[1].id, product_type="gold", amount_paise=50, units_micro=7_000))
+        db.session.commit()
+        store = get_price_store()
+        store.write("MOCK-EQUITY-G", {date(2024, 2, 28): 9_000, date(2024, 3, 2): 1})
+        store.write("GOLD-24K", {day: 6_500})
+
+        result = revalue_portfolios(day, chunk_size=2)
+        again = revalue_portfolios(day, chunk_size=3)
+        assert {k: v for k, v in result.items() if k != "chunks"} == {k: v for k, v in again.items() if k != "chunks"}
+        ids = [u.id for u in users]
+        snapshots = {s.user_id: s for s in PortfolioSnapshot.query.filter(PortfolioSnapshot.user_id.in_(ids))}
+        assert len(snapshots) == 4 and users[4].id not in snapshots
+        # The day after as_of has a new equity price; pin the store to as_of for the comparison.
+        store.write("MOCK-EQUITY-G", {date(2024, 3, 2): 9_000})
+        for u in users[:4]:
+            expected = compute_positions_value(u.id)
+            assert snapshots[u.id].invested_paise == expected["total_invested_paise"]
+            assert snapshots[u.id].value_paise == expected["total_value_paise"]
+            assert snapshots[u.id].pnl_paise == expected["pnl_paise"]
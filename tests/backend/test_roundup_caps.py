@@ -0,0 +1,47 @@
+from datetime import datetime
+
+from backend.extensions import db
+from backend.models.cap_setting import CapSetting
+from backend.models.roundup_cap_counter import RoundupCapCounter
+from backend.services.roundup_service import cap_periods, claim_cap_allowance, rebuild_cap_counters
+
+
+def test_single_transactions_respect_caps_via_counters(app, client, register_user):
+    headers, user_id = register_user()
+    client.patch("/api/user/caps", headers=headers, json={"daily_cap_paise": 500, "monthly_cap_paise": 450})
+    amounts = []
+    for amt in [247, 118, 11]:
+        r = client.post("/api/transactions", headers=headers, json={"amount": amt})
+        roundup = r.get_json()["roundup"]
+        amounts.append(roundup["amount_paise"] if roundup else 0)
+    assert amounts == [300, 150, 0]
+    with app.app_context():
+        counters = {c.period_type: c.amount_paise for c in RoundupCapCounter.query.filter_by(user_id=user_id)}
+        assert counters == {"day": 450, "month": 450}
+
+
+def test_claim_never_overshoots_cap(app, client, register_user):
+    _, user_id = register_user()
+    with app.app_context():
+        now = datetime.utcnow()
+        cap = CapSetting(user_id=user_id, daily_cap_paise=1000)
+        db.session.add(cap)
+        db.session.commit()
+        assert claim_cap_allowance(user_id, cap, [400, 400], now) == [400, 400]
+        # Another writer pushes the day counter right up to the cap.
+        day_start = cap_periods(now)["day"][0]
+        counter = RoundupCapCounter.query.filter_by(user_id=user_id, period_type="day", period_start=day_start).one()
+        counter.amount_paise = 950
+        db.session.commit()
+        assert claim_cap_allowance(user_id, cap, [300, 300], now) == [50, 0]
+        db.session.commit()
+        assert RoundupCapCounter.query.filter_by(user_id=user_id, period_type="day").one().amount_paise == 1000
+
+
+def test_counters_seed_and_rebuild_from_existing_roundups(app, client, register_user):
+    headers, user_id = register_user()
+    client.post("/api/transactions/batch", headers=headers, json=[{"amount": 247}, {"amount": 118}])
+    with app.app_context():
+        RoundupCapCounter.query.filter_by(user_id=user_id).delete()
+        db.session.commit()
+        assert rebuild_cap_counters(user_id) == {"day": 500, "month": 500}
@@ -0,0 +1,47 @@
+import numpy as np
+
+from backend.services.roundup_engine import UNCAPPED, calculate_roundups, clip_to_caps, combine_remaining, compute_capped_roundups
+from backend.services.roundup_service import calculate_roundup_paise
+
+
+def _clip_scalar(roundups, groups, remaining):
+    left = list(remaining)
+    out = []
+    for r, g in zip(roundups, groups):
+        allowed = min(r, left[g])
+        left[g] -= allowed
+        out.append(allowed)
+    return out
+
+
+def test_vectorized_roundups_match_scalar():
+    rng = np.random.default_rng(7)
+    amounts = rng.integers(1, 5_000_000, size=20_000)
+    bases = rng.choice([1, 5, 10, 50, 100, 1000], size=amounts.size)
+    expected = [calculate_roundup_paise(int(a), int(b)) for a, b in zip(amounts, bases)]
+    assert calculate_roundups(amounts, bases).tolist() == expected
+    assert calculate_roundups([24700, 24750], 10).tolist() == [300, 250]
+
+
+def test_clip_to_caps_matches_sequential_clipping():
+    rng = np.random.default_rng(11)
+    for _ in range(20):
+        n_groups = int(rng.integers(1, 30))
+        groups = rng.integers(0, n_groups, size=500)
+        roundups = rng.integers(0, 1000, size=500)
+        remaining = rng.integers(0, 20_000, size=n_groups)
+        remaining[rng.random(n_groups) < 0.2] = UNCAPPED
+        got = clip_to_caps(roundups, groups, remaining).tolist()
+        assert got == _clip_scalar(roundups.tolist(), groups.tolist(), remaining.tolist())
+
+
+def test_compute_capped_roundups_with_day_and_month_caps():
+    remaining = combine_remaining([450, -1], [1000, 200], size=2)
+    assert remaining.tolist() == [450, 200]
+    got = compute_capped_roundups(
+        amounts_paise=[24700, 11800, 24700, 1100, 4900],
+        user_index=[0, 0, 1, 0, 1],
+        user_bases_rupees=[10, 100],
+        user_remaining=remaining,
+    )
+    assert got.tolist() == [300, 150, 200, 0, 0]
@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from backend.extensions import db
+from backend.jobs import recompute_roundups
+from backend.models.cap_setting import CapSetting
+from backend.models.event import EventLog
+from backend.models.job_checkpoint import JobCheckpoint
+from backend.models.roundup import Roundup
+from backend.models.roundup_cap_counter import RoundupCapCounter
+from backend.models.user import User
+from backend.services.balance_service import get_pending_balance
+
+
+def test_rounding_base_change_recomputes_pending_roundups(app, client, register_user):
+    app.config["ROUNDUP_RECOMPUTE_INLINE"] = True
+    app.config["ROUNDUP_RECOMPUTE_CHUNK_SIZE"] = 2
+    try:
+        headers, user_id = register_user()
+        client.patch("/api/user/caps", headers=headers, json={"daily_cap_paise": 10000})
+        client.post("/api/transactions/batch", headers=headers, json=[
+            {"amount": 247}, {"amount": 118}, {"amount": 1.5},
+        ])
+        r = client.patch("/api/user/settings", headers=headers, json={"rounding_base": 100})
+        assert r.status_code == 200
+        with app.app_context():
+            amounts = [x.amount_paise for x in Roundup.query.filter_by(user_id=user_id).order_by(Roundup.id)]
+            # 300/200/850 become 5300/8200/9850 at base 100, but only 8650 of cap is left.
+            assert amounts == [5300, 3850, 850]
+            counters = {c.period_type: c.amount_paise for c in RoundupCapCounter.query.filter_by(user_id=user_id)}
+            assert counters["day"] == sum(amounts)
+            events = [e.event_type for e in EventLog.query.filter_by(user_id=user_id)]
+            assert "roundup_recompute_started" in events and "roundup_recompute_completed" in events
+    finally:
+        app.config["ROUNDUP_RECOMPUTE_INLINE"] = False
+
+
+def test_roundup_reserved_mid_chunk_keeps_counters_and_balance(app, client, register_user):
+    headers, user_id = register_user()
+    client.patch("/api/user/caps", headers=headers, json={"daily_cap_paise": 100_000})
+    client.post("/api/transactions/batch", headers=headers, json=[{"amount": 247}, {"amount": 118}])
+    with app.app_context():
+        rows = recompute_roundups._fetch_chunk(user_id, 0, 100)
+        # The sweep reserves the first roundup between the read and the write.
+        db.session.execute(update(Roundup).where(Roundup.id == rows[0][0]).values(status="reserved"))
+        cap = CapSetting.query.filter_by(user_id=user_id).first()
+        result = recompute_roundups._apply_chunk(user_id, cap, rows, 100)
+        db.session.commit()
+
+        amounts = [x.amount_paise for x in Roundup.query.filter_by(user_id=user_id).order_by(Roundup.id)]
+        assert amounts == [300, 8200]
+        assert result == {"updated": 1, "delta_paise": 8000}
+        counters = {c.period_type: c.amount_paise for c in RoundupCapCounter.query.filter_by(user_id=user_id)}
+        assert counters["day"] == sum(amounts)
+        assert get_pending_balance(user_id) == (500 + 8000, 2)
+
+
+def test_stalled_recompute_is_resumed_by_worker(app, client, register_user):
+    headers, user_id = register_user()
+    client.patch("/api/user/caps", headers=headers, json={"daily_cap_paise": 100_000})
+    client.post("/api/transactions/batch", headers=headers, json=[{"amount": 247}, {"amount": 118}])
+    with app.app_context():
+        # The base change and its recompute request commit together; the process then dies.
+        db.session.get(User, user_id).rounding_base = 100
+        recompute_roundups.request_recompute(user_id)
+        db.session.commit()
+        name = f"roundup_recompute:{user_id}"
+        db.session.execute(
+            update(JobCheckpoint).where(JobCheckpoint.job_name == name)
+            .values(updated_at=datetime.utcnow() - timedelta(hours=1))
+        )
+        db.session.commit()
+
+        assert recompute_roundups.resume_stalled_recomputes() >= 1
+        amounts = [x.amount_paise for x in Roundup.query.filter_by(user_id=user_id).order_by(Roundup.id)]
+        assert amounts == [5300, 8200]
+        assert db.session.get(JobCheckpoint, name).status == "completed"
+        events = [e.event_type for e in EventLog.query.filter_by(user_id=user_id)]
+        assert events.count("roundup_recompute_started") == events.count("roundup_recompute_completed") == 1
@@ -0,0 +1,121 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.extensions import db
+from backend.jobs import sweep
+from backend.jobs.order_outbox import drain_outbox
+from backend.jobs.sweep import run_sweep
+from backend.models.event import EventLog
+from backend.models.investment import InvestmentOrder
+from backend.models.ledger import LedgerEntry
+from backend.models.order_outbox import OrderOutbox
+from backend.models.roundup import Roundup
+from backend.providers.mf.mock import MockMFProvider
+from backend.services.balance_service import get_pending_balance
+from backend.services.order_outbox_service import reserve_roundups
+
+
+def test_sweep_invests_due_users_in_bulk(app, client, register_user):
+    users = [register_user() for _ in range(3)]
+    for headers, _ in users:
+        client.post("/api/transactions/batch", headers=headers, json=[{"amount": 247}, {"amount": 118}])
+    paused_headers, paused_id = users[1]
+    client.patch("/api/user/caps", headers=paused_headers, json={"investing_paused": True})
+    _, recent_id = users[2]
+    with app.app_context():
+        db.session.add(EventLog(user_id=recent_id, event_type="sweep_executed", created_at=datetime.utcnow() - timedelta(hours=2)))
+        db.session.commit()
+
+        run_sweep(chunk_size=2)
+
+        swept_id = users[0][1]
+        order = InvestmentOrder.query.filter_by(user_id=swept_id).one()
+        assert (order.status, order.amount_paise) == ("executed", 500)
+        assert {r.status for r in Roundup.query.filter_by(user_id=swept_id)} == {"invested"}
+        assert {r.investment_id for r in Roundup.query.filter_by(user_id=swept_id)} == {order.id}
+        assert LedgerEntry.query.filter_by(user_id=swept_id, reference_id=order.id).one().amount_paise == 500
+        assert get_pending_balance(swept_id) == (0, 0)
+        for skipped in (paused_id, recent_id):
+            assert InvestmentOrder.query.filter_by(user_id=skipped).count() == 0
+            assert get_pending_balance(skipped) == (500, 2)
+
+        # Nothing left to sweep for the first user on a second run.
+        run_sweep()
+        assert InvestmentOrder.query.filter_by(user_id=swept_id).count() == 1
+
+
+def test_sweep_only_invests_roundups_it_reserved(app, client, register_user, monkeypatch):
+    headers, user_id = register_user()
+    client.post("/api/transactions/batch", headers=headers, json=[{"amount": 247}, {"amount": 118}])
+    real_reserve = sweep._reserve_pending
+
+    def execute_first(user_ids):
+        # An execute request reserves the first roundup onto its own order just before the sweep does.
+        first = Roundup.query.filter_by(user_id=user_id, status="pending").order_by(Roundup.id).first()
+        order = InvestmentOrder(user_id=user_id, product_type="mf", amount_paise=first.amount_paise, status="pending")
+        db.session.add(order)
+        db.session.flush()
+        reserve_roundups(order, [first])
+        return real_reserve(user_ids)
+
+    monkeypatch.setattr(sweep, "_reserve_pending", execute_first)
+    with app.app_context():
+        stats = sweep.sweep_chunk([user_id], datetime.utcnow())
+
+        assert stats["roundups"] == 1
+        swept = InvestmentOrder.query.filter_by(user_id=user_id, status="executed").one()
+        assert swept.amount_paise == 200
+        statuses = sorted((r.status, r.investment_id == swept.id) for r in Roundup.query.filter_by(user_id=user_id))
+        assert statuses == [("invested", True), ("reserved", False)]
+        assert get_pending_balance(user_id) == (0, 0)
+
+
+def test_sweep_commits_orders_before_calling_the_provider(app, client, register_user, monkeypatch):
+    headers, user_id = register_user()
+    client.post("/api/transactions/batch", headers=headers, json=[{"amount": 247}, {"amount": 118}])
+    in_transaction = []
+    real_place = MockMFProvider.place_orders
+
+    def place_orders(self, orders):
+        in_transaction.append(db.session().in_transaction())
+        return real_place(self, orders)
+
+    monkeypatch.setattr(MockMFProvider, "place_orders", place_orders)
+    with app.app_context():
+        stats = sweep.sweep_chunk([user_id], datetime.utcnow())
+
+        assert in_transaction == [False]
+        assert (stats["executed"], stats["roundups"], stats["amount_paise"]) == (1, 2, 500)
+        order = InvestmentOrder.query.filter_by(user_id=user_id).one()
+        assert OrderOutbox.query.filter_by(order_id=order.id).one().status == "done"
+
+
+def test_sweep_crash_after_commit_is_finished_by_the_outbox(app, client, register_user, monkeypatch):
+    headers, user_id = register_user()
+    client.post("/api/transactions/batch", headers=headers, json=[{"amount": 247}, {"amount": 118}])
+
+    def crash(token):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(sweep, "dispatch_claimed", crash)
+    with app.app_context():
+        with pytest.raises(KeyboardInterrupt):
+            sweep.sweep_chunk([user_id], datetime.utcnow())
+        db.session.rollback()
+        order = InvestmentOrder.query.filter_by(user_id=user_id).one()
+        assert order.status == "pending"
+        assert {(r.status, r.investment_id) for r in Roundup.query.filter_by(user_id=user_id)} == {("reserved", order.id)}
+        assert get_pending_balance(user_id) == (0, 0)
+
+        # Nothing is swept twice; once the claim lapses the outbox worker places the order.
+        monkeypatch.undo()
+        run_sweep()
+        assert InvestmentOrder.query.filter_by(user_id=user_id).count() == 1
+        entry = OrderOutbox.query.filter_by(order_id=order.id).one()
+        entry.locked_until = datetime.utcnow() - timedelta(seconds=1)
+        db.session.commit()
+        drain_outbox()
+        db.session.refresh(order)
+        assert order.status == "executed"
+        assert {r.status for r in Roundup.query.filter_by(user_id=user_id)} == {"invested"}
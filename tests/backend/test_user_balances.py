@@ -0,0 +1,33 @@
+from backend.extensions import db
+from backend.models.user_balance import UserBalance
+from backend.services.balance_service import get_pending_balance, rebuild_pending_balances
+
+
+def test_balance_follows_create_and_invest(app, client, register_user):
+    headers, user_id = register_user()
+    client.post("/api/transactions", headers=headers, json={"amount": 247})
+    client.post("/api/transactions/batch", headers=headers, json=[{"amount": 118}, {"amount": 1.5}])
+    with app.app_context():
+        assert get_pending_balance(user_id) == (1350, 3)
+
+    assert client.get("/api/portfolio", headers=headers).get_json()["pending_roundups_paise"] == 1350
+    assert client.get("/api/roundups/pending", headers=headers).get_json()["total_paise"] == 1350
+    r = client.post("/api/notifications/pre-debit/send", headers=headers)
+    assert r.get_json()["amount_paise"] == 1350
+
+    client.post("/api/mandates", headers=headers, json={})
+    r = client.post("/api/investments/execute", headers=headers, json={"product_type": "mf"})
+    assert r.status_code == 200, r.data
+    with app.app_context():
+        assert get_pending_balance(user_id) == (0, 0)
+
+
+def test_rebuild_fixes_drifted_balance(app, client, register_user):
+    headers, user_id = register_user()
+    client.post("/api/transactions/batch", headers=headers, json=[{"amount": 247}, {"amount": 118}])
+    with app.app_context():
+        db.session.get(UserBalance, user_id).pending_paise = 1
+        db.session.commit()
+        assert rebuild_pending_balances(user_id) == {user_id: (1, 500)}
+        assert get_pending_balance(user_id) == (500, 2)
+        assert rebuild_pending_balances(user_id) == {}
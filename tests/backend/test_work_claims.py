@@ -0,0 +1,80 @@
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, update
+
+from backend.extensions import db
+from backend.jobs.sweep import run_sweep
+from backend.models.investment import InvestmentOrder
+from backend.models.user_balance import UserBalance
+from backend.services.sql_helpers import claim_batch, release_claims
+
+
+def user_with_pending(client):
+    r = client.post("/api/auth/register", json={
+        "email": f"{uuid.uuid4().hex}@example.com",
+        "password": "secret",
+    })
+    data = r.get_json()
+    headers = {"Authorization": f"Bearer {data['access_token']}"}
+    client.post("/api/transactions/batch", headers=headers, json=[{"amount": 247}])
+    return data["user"]["id"]
+
+
+def test_claims_are_disjoint_until_released_or_expired(app, client):
+    ids = sorted(user_with_pending(client) for _ in range(3))
+    lease = timedelta(minutes=5)
+    with app.app_context():
+        now = datetime.utcnow()
+        filters = [UserBalance.user_id.in_(ids)]
+        token_a, claimed_a = claim_batch(UserBalance, UserBalance.user_id, filters, UserBalance.user_id, 2, lease, now)
+        token_b, claimed_b = claim_batch(UserBalance, UserBalance.user_id, filters, UserBalance.user_id, 2, lease, now)
+        assert claimed_a == ids[:2] and claimed_b == ids[2:]
+        assert claim_batch(UserBalance, UserBalance.user_id, filters, UserBalance.user_id, 5, lease, now) == (None, [])
+
+        release_claims(UserBalance, UserBalance.user_id, claimed_a[:1], token_a)
+        db.session.commit()
+        _, again = claim_batch(UserBalance, UserBalance.user_id, filters, UserBalance.user_id, 5, lease, now)
+        assert again == ids[:1]
+        # A crashed worker's lease runs out.
+        _, later = claim_batch(UserBalance, UserBalance.user_id, filters, UserBalance.user_id, 5, lease, now + 2 * lease)
+        assert later == ids
+
+
+def test_claim_moves_on_when_a_concurrent_worker_takes_every_candidate(app, client):
+    ids = sorted(user_with_pending(client) for _ in range(4))
+    lease = timedelta(minutes=5)
+    with app.app_context():
+        now = datetime.utcnow()
+        filters = [UserBalance.user_id.in_(ids)]
+        raced = []
+
+        def rival_claims_first(state):
+            # Another worker leases the first two candidates between our SELECT and UPDATE.
+            if state.is_update and not raced:
+                raced.append(True)
+                state.session.connection().execute(
+                    update(UserBalance.__table__)
+                    .where(UserBalance.__table__.c.user_id.in_(ids[:2]))
+                    .values(lease_owner="rival", lease_until=now + lease)
+                )
+
+        event.listen(db.session, "do_orm_execute", rival_claims_first)
+        try:
+            token, claimed = claim_batch(UserBalance, UserBalance.user_id, filters, UserBalance.user_id, 2, lease, now)
+        finally:
+            event.remove(db.session, "do_orm_execute", rival_claims_first)
+        assert raced and token is not None
+        assert claimed == ids[2:]
+
+
+def test_sweep_skips_users_leased_by_another_worker(app, client):
+    mine, theirs = user_with_pending(client), user_with_pending(client)
+    with app.app_context():
+        db.session.get(UserBalance, theirs).lease_owner = "other-worker"
+        db.session.get(UserBalance, theirs).lease_until = datetime.utcnow() + timedelta(minutes=10)
+        db.session.commit()
+        run_sweep()
+        assert InvestmentOrder.query.filter_by(user_id=mine).count() == 1
+        assert InvestmentOrder.query.filter_by(user_id=theirs).count() == 0
+        assert db.session.get(UserBalance, mine).lease_owner is None